@@ -0,0 +1,351 @@
+# -*- coding: utf-8 -*-
+# Komandna linija za CiefpRottenTomatoes (bez enigma importa), npr. iz crona:
+#   python3 -m Plugins.Extensions.CiefpRottenTomatoes.cli search "dune" --type movie
+#   python3 cli.py warm -i urls.txt -j 4 --details
+# Ispis je JSON, jedan red po ulazu; sazetak (trajanje, zahtjevi, p50/p90)
+# ide na stderr. Kes, zaglavlja i ttl-ovi su iz rtfetch (isti kao u pluginu),
+# pa "warm" puni tacno one stranice koje plugin cita i plugin se na tim
+# naslovima otvara bez mreze.
+import os
+import re
+import sys
+import json
+import time
+import queue
+import argparse
+import threading
+import urllib.parse
+import urllib.request
+
+try:
+    from .rtparse import (
+        BASE, JsonLdDoc, browse_napi_url, browse_page_url, detail_needs_page, fill_detail, itemlist_browse_items,
+        itemlist_entries, iter_editorial_items, iter_search_results, media_json_url, normalize_rt_url,
+        parse_autocomplete, parse_browse_napi, parse_celebrity, parse_detail_page, parse_media_json, rt_media_type,
+    )
+    from .rtfetch import CACHE_DIR, DETAIL_TTL, LIST_TTL, page_path, poster_path, read_cached, rt_request, ssl_ctx, \
+        write_cached
+except ImportError:  # pokrenut kao skripta
+    sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+    from rtparse import (
+        BASE, JsonLdDoc, browse_napi_url, browse_page_url, detail_needs_page, fill_detail, itemlist_browse_items,
+        itemlist_entries, iter_editorial_items, iter_search_results, media_json_url, normalize_rt_url,
+        parse_autocomplete, parse_browse_napi, parse_celebrity, parse_detail_page, parse_media_json, rt_media_type,
+    )
+    from rtfetch import CACHE_DIR, DETAIL_TTL, LIST_TTL, page_path, poster_path, read_cached, rt_request, ssl_ctx, \
+        write_cached
+
+HTTP_TIMEOUT = 10
+WARM_MAX_THREADS = 16   # warm --details: detalj threadova ukupno (-j liste x po listi)
+ENIGMA_SETTINGS = "/etc/enigma2/settings"
+
+
+def plugin_data_source(path=ENIGMA_SETTINGS):
+    """The plugin's data_source setting ("auto"/"html"); enigma2 saves only non-default values"""
+    try:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            for line in f:
+                if line.startswith("config.plugins.ciefprt.data_source="):
+                    return line.split("=", 1)[1].strip() or "html"
+    except OSError:
+        pass
+    return "html"
+
+
+class Fetcher(object):
+    """HTTP GET with the plugin's headers and page cache; counts requests for the summary"""
+
+    def __init__(self, cache_dir=CACHE_DIR, use_cache=True, timeout=HTTP_TIMEOUT):
+        self.cache_dir = cache_dir
+        self.use_cache = use_cache
+        self.timeout = timeout
+        self.requests = 0
+        self.bytes = 0
+        self.cache_hits = 0
+        self._lock = threading.Lock()
+        self._ctx = ssl_ctx()
+        for d in ("pages", "posters"):
+            os.makedirs(os.path.join(cache_dir, d), exist_ok=True)
+
+    def _download(self, url):
+        with urllib.request.urlopen(rt_request(url), context=self._ctx, timeout=self.timeout) as r:
+            data = r.read()
+        with self._lock:
+            self.requests += 1
+            self.bytes += len(data)
+        return data
+
+    def _cached(self, fn, ttl):
+        data = read_cached(fn, ttl) if self.use_cache else None
+        if data is not None:
+            with self._lock:
+                self.cache_hits += 1
+        return data
+
+    def get(self, url, ttl=DETAIL_TTL, cache=True):
+        """Page bytes; cache=True reads and fills the plugin's page cache"""
+        fn = page_path(url, self.cache_dir)
+        data = self._cached(fn, ttl) if cache else None
+        if data is None:
+            data = self._download(url)
+            if cache:
+                write_cached(fn, data)
+        return data
+
+    def get_json(self, url, ttl=DETAIL_TTL, cache=True):
+        return json.loads(self.get(url, ttl, cache).decode("utf-8", "ignore"))
+
+    def poster(self, img_url):
+        """Poster file under the name the plugin's detail screen uses"""
+        fn = poster_path(img_url, cache_dir=self.cache_dir)
+        if self._cached(fn, 0) is None:
+            write_cached(fn, self._download(img_url))
+        return fn
+
+
+# ---------- Operacije ----------
+# Svaka operacija cita iste url-ove istim ttl-om kao plugin (search_all,
+# BrowsePager, parse_browse, load_detail), pa njen rezultat ostaje u kesu
+# pod imenom koje plugin trazi.
+def search(fetch, query, search_type=None, limit=20):
+    """Autocomplete API, the search page if that fails; like the plugin's search_all"""
+    clean = re.sub(r"\s+", " ", re.sub(r"[:;!?]", " ", query)).strip()
+    try:
+        url = "%s/api/autocomplete?v=1&query=%s" % (BASE, urllib.parse.quote(clean))
+        results = parse_autocomplete(fetch.get_json(url, cache=False))
+    except Exception:
+        url = "%s/search?search=%s" % (BASE, urllib.parse.quote(clean))
+        results = list(iter_search_results(fetch.get(url, cache=False).decode("utf-8", "ignore")))
+    if search_type:
+        results = [r for r in results if r.get("type") == search_type]
+    return results[:limit]
+
+
+def _browse_html(fetch, url):
+    """A list page as the plugin reads it: /browse/ as ?page=1 (BrowsePager HTML), others as is"""
+    if browse_napi_url(url):
+        url = browse_page_url(url, 1)
+    html = fetch.get(url, ttl=LIST_TTL).decode("utf-8", "ignore")
+    if "editorial.rottentomatoes.com" in url:
+        return list(iter_editorial_items(html))
+    return itemlist_browse_items(itemlist_entries(JsonLdDoc.from_html(html)))
+
+
+def browse(fetch, url, pages=1, source="html"):
+    """
+    List entries from the source the plugin's BrowsePager uses: /napi/browse
+    cursor pages (source auto/json, HTML if that fails), else the HTML page
+    (JSON-LD ItemList / editorial guide). Every page lands in the cache.
+    """
+    if browse_napi_url(url) and source != "html":
+        items, cursor = [], ""
+        try:
+            for i in range(max(1, pages)):
+                page, cursor, has_next = parse_browse_napi(fetch.get_json(browse_napi_url(url, cursor), ttl=LIST_TTL))
+                items += page
+                if not has_next:
+                    break
+            return items
+        except Exception:
+            if items:
+                return items
+            if source == "json":
+                raise
+    return _browse_html(fetch, url)
+
+
+def detail(fetch, url, source="html"):
+    """
+    DetailInfo like the plugin's load_detail: the HTML page, or (source
+    auto/json) media JSON first, with the page read too only if the reply
+    lacks a field the detail screen shows. No trailer search.
+    """
+    url = normalize_rt_url(url)
+    json_url = media_json_url(url)
+
+    def page():
+        return parse_detail_page(fetch.get(url, ttl=DETAIL_TTL).decode("utf-8", "ignore"))
+
+    if json_url and source != "html":
+        try:
+            info = parse_media_json(fetch.get_json(json_url, ttl=DETAIL_TTL))
+        except Exception:
+            if source == "json":
+                raise
+        else:
+            if detail_needs_page(info):
+                fill_detail(info, page())
+            return info
+    return page()
+
+
+def celebrity(fetch, url):
+    return parse_celebrity(fetch.get(normalize_rt_url(url)).decode("utf-8", "ignore"))
+
+
+def parallel(fn, items, workers):
+    """fn(item) for every item on up to workers threads; returns when all are done"""
+    jobs = queue.Queue()
+    for it in items:
+        jobs.put(it)
+
+    def worker():
+        while True:
+            try:
+                it = jobs.get_nowait()
+            except queue.Empty:
+                return
+            fn(it)
+
+    threads = [threading.Thread(target=worker, daemon=True) for i in range(max(1, min(workers, len(items))))]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+
+def warm(fetch, arg, details=False, posters=False, workers=1, source="html"):
+    """
+    Fill the plugin's caches for one input: a list url (its first page the
+    way the plugin's data source reads it, then with details the detail of
+    every entry, on workers threads), a /m/ or /tv/ url, or a title (best
+    search result). Returns what was warmed.
+    """
+    out = {"lists": 0, "details": 0, "posters": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def count(key):
+        with lock:
+            out[key] += 1
+
+    def one_detail(url, image=""):
+        try:
+            info = detail(fetch, url, source)
+            count("details")
+            img = image or info.get("poster_url")
+            if posters and img:
+                fetch.poster(img)
+                count("posters")
+        except Exception:
+            count("errors")
+
+    if arg.startswith("http") and rt_media_type(urllib.parse.urlsplit(arg).path):
+        one_detail(arg)
+    elif arg.startswith("http"):
+        items = browse(fetch, arg, 1, source)
+        out["lists"] += 1
+        if details:
+            parallel(lambda it: one_detail(it["url"], it.get("image") or ""), items, workers)
+    else:
+        results = search(fetch, arg, limit=1)
+        if results:
+            one_detail(results[0]["url"], results[0].get("image") or "")
+    return out
+
+
+# ---------- Komandna linija ----------
+def _jsonable(v):
+    if hasattr(v, "to_dict"):
+        return v.to_dict()
+    if isinstance(v, list):
+        return [_jsonable(x) for x in v]
+    return v
+
+
+def read_inputs(args):
+    """Positional args plus the lines of --input ("-" = stdin); blank lines and # comments skipped"""
+    inputs = list(args.args)
+    if args.input:
+        f = sys.stdin if args.input == "-" else open(args.input, "r", encoding="utf-8")
+        try:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#"):
+                    inputs.append(line)
+        finally:
+            if f is not sys.stdin:
+                f.close()
+    return inputs
+
+
+def run(args, out=sys.stdout, err=sys.stderr):
+    fetch = Fetcher(args.cache_dir, not args.no_cache, args.timeout)
+    source = args.source or plugin_data_source()
+    # -j liste istovremeno, svaka sa svojim detalj threadovima: ukupno ograniceno
+    detail_workers = max(1, min(args.detail_concurrency, WARM_MAX_THREADS // max(1, args.concurrency)))
+    ops = {
+        "search": lambda a: search(fetch, a, args.type, args.limit),
+        "browse": lambda a: browse(fetch, a, args.pages, source),
+        "detail": lambda a: detail(fetch, a, source),
+        "celebrity": lambda a: celebrity(fetch, a),
+        "warm": lambda a: warm(fetch, a, args.details, args.posters, detail_workers, source),
+    }
+    op = ops[args.command]
+    inputs = read_inputs(args)
+    times = []
+    failed = [0]
+    lock = threading.Lock()
+
+    def one(a):
+        t0 = time.monotonic()
+        rec = {"input": a}
+        try:
+            rec["result"] = _jsonable(op(a))
+            rec["ok"] = True
+        except Exception as e:
+            rec["ok"] = False
+            rec["error"] = "%s: %s" % (type(e).__name__, e)
+        rec["seconds"] = round(time.monotonic() - t0, 3)
+        line = json.dumps(rec, ensure_ascii=False, indent=2 if args.pretty else None)
+        with lock:
+            times.append(rec["seconds"])
+            failed[0] += not rec["ok"]
+            out.write(line + "\n")
+            out.flush()
+
+    t0 = time.monotonic()
+    parallel(one, inputs, args.concurrency)
+    wall = time.monotonic() - t0
+
+    if times and not args.quiet:
+        times.sort()
+        err.write("%s: %d inputs, %d failed, %.2fs (%.1f/s), p50 %.2fs, p90 %.2fs, "
+                  "%d requests, %d KB, %d cache hits\n" % (
+                      args.command, len(times), failed[0], wall, len(times) / wall if wall else 0,
+                      times[len(times) // 2], times[min(len(times) - 1, int(len(times) * 0.9))],
+                      fetch.requests, fetch.bytes // 1024, fetch.cache_hits))
+    return 1 if failed[0] else 0
+
+
+def build_parser():
+    p = argparse.ArgumentParser(prog="cli", description="Rotten Tomatoes fetches without enigma2 (JSON output)")
+    p.add_argument("command", choices=("search", "browse", "detail", "celebrity", "warm"))
+    p.add_argument("args", nargs="*", help="queries or urls")
+    p.add_argument("-i", "--input", help="file with one query/url per line, - for stdin")
+    p.add_argument("-j", "--concurrency", type=int, default=1, help="parallel inputs (default 1)")
+    p.add_argument("--type", choices=("movie", "tv"), help="search: only movies or series")
+    p.add_argument("--limit", type=int, default=20, help="search: max results")
+    p.add_argument("--pages", type=int, default=1, help="browse: JSON pages to follow")
+    p.add_argument("--source", choices=("auto", "json", "html"),
+                   help="browse/detail/warm: backend (default: the plugin's data source setting)")
+    p.add_argument("--details", action="store_true", help="warm: also every entry of a list")
+    p.add_argument("--detail-concurrency", type=int, default=4,
+                   help="warm: parallel details per list (default 4, at most %d detail threads in all)" % WARM_MAX_THREADS)
+    p.add_argument("--posters", action="store_true", help="warm: also poster images")
+    p.add_argument("--cache-dir", default=CACHE_DIR)
+    p.add_argument("--no-cache", action="store_true", help="always fetch (still writes the cache)")
+    p.add_argument("--timeout", type=float, default=HTTP_TIMEOUT)
+    p.add_argument("--pretty", action="store_true", help="indented JSON")
+    p.add_argument("-q", "--quiet", action="store_true", help="no summary on stderr")
+    return p
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if not args.args and not args.input:
+        build_parser().error("no queries or urls (arguments or --input)")
+    return run(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# Parse worker za CiefpRottenTomatoes.
+# plugin.py ga pokrece kao "python3 parse_worker.py" i drzi ga zivog.
+# Zahtjev (op, html, kwargs) i odgovori su pickle frameovi sa 4-bajtnom
+# duzinom (big endian) na stdin/stdout:
+#   ("more", [items])  - komad rezultata (samo STREAM_OPS)
+#   ("ok", result)     - kraj, rezultat (None za STREAM_OPS)
+#   ("err", "poruka")  - greska u parseru, worker ostaje ziv
+import os
+import sys
+import struct
+import pickle
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+import rtparse
+
+STREAM_CHUNK = 20
+
+
+def read_frame(f):
+    head = f.read(4)
+    if len(head) < 4:
+        return None
+    size = struct.unpack(">I", head)[0]
+    data = f.read(size)
+    if len(data) < size:
+        return None
+    return pickle.loads(data)
+
+
+def write_frame(f, obj):
+    data = pickle.dumps(obj, pickle.HIGHEST_PROTOCOL)
+    f.write(struct.pack(">I", len(data)))
+    f.write(data)
+    f.flush()
+
+
+def handle(out, op, html, kwargs):
+    fn = rtparse.PARSE_OPS[op]
+    if op not in rtparse.STREAM_OPS:
+        write_frame(out, ("ok", fn(html, **kwargs)))
+        return
+
+    chunk = []
+    for item in fn(html, **kwargs):
+        chunk.append(item)
+        if len(chunk) >= STREAM_CHUNK:
+            write_frame(out, ("more", chunk))
+            chunk = []
+    if chunk:
+        write_frame(out, ("more", chunk))
+    write_frame(out, ("ok", None))
+
+
+def main():
+    inp = sys.stdin.buffer
+    out = sys.stdout.buffer
+    # print() iz bilo kog modula ne smije u protokol
+    sys.stdout = sys.stderr
+
+    # enigma2 (UI) ima prednost kad je jezgro zauzeto
+    try:
+        os.nice(5)
+    except OSError:
+        pass
+
+    while True:
+        req = read_frame(inp)
+        if req is None:
+            # plugin je zatvorio pipe (ili je enigma2 pala)
+            break
+        op, html, kwargs = req
+        try:
+            handle(out, op, html, kwargs)
+        except Exception as e:
+            write_frame(out, ("err", "%s: %s" % (type(e).__name__, e)))
+
+
+if __name__ == "__main__":
+    main()
@@ -2,40 +2,79 @@
 import os
 import re
 import json
-import html as _html
-import ssl
 import time
 import threading
 import traceback
 import urllib.request
 import urllib.parse
 import math
-
-from Components.ActionMap import ActionMap
+import fcntl
+import collections
+import contextlib
+import io
+import marshal
+import zlib
+import pickle
+import queue
+import select
+import shutil
+import struct
+from select import POLLIN
+
+from Components.ActionMap import ActionMap, NumberActionMap
+from Components.ChoiceList import ChoiceEntryComponent
+from Components.Input import Input
 from Components.Label import Label
+from Components.MenuList import MenuList
 from Components.Pixmap import Pixmap
-from Components.config import config, ConfigSubsection, ConfigYesNo, ConfigSelection
+from Components.config import config, ConfigSubsection, ConfigYesNo, ConfigSelection, ConfigText
 from Screens.Screen import Screen
 from Screens.ChoiceBox import ChoiceBox
 from Screens.MessageBox import MessageBox
 from Screens.VirtualKeyBoard import VirtualKeyBoard
-from enigma import eTimer, ePicLoad, getDesktop
+from enigma import eTimer, ePicLoad, getDesktop, eSocketNotifier, eRCInput, getPrevAsciiCode, iPlayableService
 from Plugins.Plugin import PluginDescriptor
 
+from .rtparse import (
+    BASE, PARSE_OPS, RECORD_TYPES, STREAM_OPS, BrowseItem, DetailStreamScanner, JsonLdDoc,
+    browse_napi_url, browse_page_url, detail_needs_page, fill_detail, itemlist_browse_items, itemlist_entries,
+    media_json_url, normalize_query, parse_autocomplete, parse_browse_napi, parse_media_json, query_matches,
+)
+from .rtfetch import (
+    CACHE_DIR, CACHE_PAGES, CACHE_POSTERS, DETAIL_TTL, LIST_TTL, cache_key, page_path, poster_path, read_cached,
+    rt_request, ssl_ctx, write_cached,
+)
+from .titleindex import EPG_AGREE_BONUS, EPG_TRUST, EpgTitleMap, TitleIndex, best_title_match
+from .recordings import RecordingIndex, recording_title, scan_recordings
+
 
 PLUGIN_NAME = "CiefpRottenTomatoes"
 PLUGIN_VERSION = "1.4"
-BASE = "https://www.rottentomatoes.com"
 
 
-CACHE_DIR = "/tmp/CiefpRottenTomatoes"
-CACHE_POSTERS = os.path.join(CACHE_DIR, "posters")
-CACHE_PAGES = os.path.join(CACHE_DIR, "pages")
 DEBUG_LOG = os.path.join(CACHE_DIR, "debug.log")
+METRICS_FILE = "/tmp/ciefprt_metrics.prom"
+TITLE_INDEX_FILE = "/etc/enigma2/ciefprt_titles.idx"  # flash, samo ako nema HDD/USB
+TITLE_INDEX_DIRS = ("/media/hdd", "/media/usb")
+EPG_MAP_FILE = "/etc/enigma2/ciefprt_epgmap.json"
+REC_INDEX_FILE = "/etc/enigma2/ciefprt_recordings.json"
+DEBUG_LOG_MAX_BYTES = 256 * 1024  # rotacija: debug.log -> debug.log.1
+DEBUG_LOG_RING = 500              # zadnje poruke u RAM-u (log viewer)
+DEBUG_LOG_FLUSH = 2.0             # sekunde izmedju upisa na disk
+
+LOG_DEBUG = 10
+LOG_INFO = 20
+LOG_WARNING = 30
+LOG_ERROR = 40
+LOG_LEVELS = {"debug": LOG_DEBUG, "info": LOG_INFO, "warning": LOG_WARNING, "error": LOG_ERROR}
+LOG_LEVEL_NAMES = {LOG_DEBUG: "D", LOG_INFO: "I", LOG_WARNING: "W", LOG_ERROR: "E"}
 
 BROWSE_PAGE_SIZE = 28   # RT tipično šalje 28-32 po "load more"
+HTTP_STREAM_CHUNK = 16384
+HTTP_MAX_BODY = 4 * 1024 * 1024   # vise od ovoga se ne cita u memoriju (streaming fetch)
 BROWSE_MAX_ITEMS = 150  # tvoj limit
 LOAD_MORE_LABEL = ">> Load more..."
+EDITORIAL_FIRST_BATCH = 20  # editorial lista se otvara cim se parsira prvih N
 
 PLUGIN_PATH = os.path.dirname(os.path.abspath(__file__))
 PLACEHOLDER_IMG = os.path.join(PLUGIN_PATH, "placeholder.png")
@@ -56,6 +95,36 @@ config.plugins.ciefprt.player = ConfigSelection(  # NOVO
     default="movieplayer",
     choices=[("movieplayer", "Movie Player"), ("browser", "External Browser"), ("download", "Download & Play")]
 )
+config.plugins.ciefprt.log_level = ConfigSelection(
+    default="info",
+    choices=[("debug", "Debug"), ("info", "Info"), ("warning", "Warning"), ("error", "Error")]
+)
+config.plugins.ciefprt.metrics_export = ConfigYesNo(default=False)
+config.plugins.ciefprt.metrics_path = ConfigText(default=METRICS_FILE, fixed_size=False)
+config.plugins.ciefprt.metrics_interval = ConfigSelection(
+    default="60",
+    choices=[("15", "15s"), ("30", "30s"), ("60", "60s"), ("300", "5min")]
+)
+config.plugins.ciefprt.parse_worker = ConfigSelection(
+    default="auto",
+    choices=[("off", "Off (parse in thread)"), ("auto", "Auto"), ("1", "1 process"), ("2", "2 processes")]
+)
+config.plugins.ciefprt.jitter_probe = ConfigYesNo(default=False)
+config.plugins.ciefprt.stream_detail = ConfigYesNo(default=True)
+config.plugins.ciefprt.data_source = ConfigSelection(
+    default="html",
+    choices=[("auto", "JSON, HTML fallback"), ("html", "HTML pages (details, lists)")]
+)
+config.plugins.ciefprt.live_search = ConfigYesNo(default=True)
+config.plugins.ciefprt.title_index = ConfigYesNo(default=True)
+config.plugins.ciefprt.epg_bulk = ConfigYesNo(default=False)
+config.plugins.ciefprt.epg_bulk_hours = ConfigSelection(
+    default="12",
+    choices=[("6", "6 hours"), ("12", "12 hours"), ("24", "24 hours")]
+)
+config.plugins.ciefprt.zap_prefetch = ConfigYesNo(default=False)
+
+
 def ensure_dirs():
     for p in (CACHE_DIR, CACHE_POSTERS, CACHE_PAGES):
         if not os.path.exists(p):
@@ -65,34 +134,655 @@ def ensure_dirs():
                 pass
 
 
-def dlog(msg):
+class AsyncLogger(object):
+    """
+    Buffered logger.
+    dlog() samo dodaje liniju u RAM (ring buffer + pending lista), a
+    pozadinski thread upisuje pending linije u debug.log najvise
+    DEBUG_LOG_FLUSH sekundi nakon prve (ili odmah za ERROR); bez poruka
+    thread spava bez budjenja. Kad fajl predje DEBUG_LOG_MAX_BYTES,
+    rotira se u debug.log.1.
+    """
+
+    def __init__(self, path, max_bytes=DEBUG_LOG_MAX_BYTES, ring_size=DEBUG_LOG_RING):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.level = LOG_INFO
+        self._ring = collections.deque(maxlen=ring_size)
+        self._pending = []
+        self._lock = threading.Lock()
+        self._io_lock = threading.Lock()
+        self._wake = threading.Event()     # ima pending linija
+        self._urgent = threading.Event()   # ERROR - upis odmah
+        self._thread = None
+        self._size = None
+
+    def set_level(self, name):
+        self.level = LOG_LEVELS.get(name, LOG_INFO)
+
+    def log(self, msg, level=LOG_INFO):
+        if level < self.level:
+            return
+        line = "[%s] %s %s" % (time.strftime("%Y-%m-%d %H:%M:%S"), LOG_LEVEL_NAMES.get(level, "I"), msg)
+        with self._lock:
+            self._ring.append(line)
+            first = not self._pending
+            self._pending.append(line)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="ciefprt-log", daemon=True)
+                self._thread.start()
+        if level >= LOG_ERROR:
+            self._urgent.set()
+            self._wake.set()
+        elif first:
+            self._wake.set()
+
+    def _run(self):
+        while True:
+            self._wake.wait()
+            self._wake.clear()
+            # skupi linije do DEBUG_LOG_FLUSH s, pa jedan upis
+            self._urgent.wait(DEBUG_LOG_FLUSH)
+            self._urgent.clear()
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            lines = self._pending
+            self._pending = []
+        if not lines:
+            return
+        data = ("\n".join(lines) + "\n").encode("utf-8", "ignore")
+        with self._io_lock:
+            try:
+                if self._size is None:
+                    ensure_dirs()
+                    self._size = os.path.getsize(self.path) if os.path.exists(self.path) else 0
+                if self._size + len(data) > self.max_bytes:
+                    self._rotate()
+                with open(self.path, "ab") as f:
+                    f.write(data)
+                self._size += len(data)
+            except:
+                self._size = None
+
+    def _rotate(self):
+        try:
+            if os.path.exists(self.path):
+                os.replace(self.path, self.path + ".1")
+        except:
+            pass
+        self._size = 0
+
+    def tail(self, lines=80):
+        with self._lock:
+            data = list(self._ring)
+        return data[-lines:]
+
+    def clear(self):
+        with self._lock:
+            self._ring.clear()
+            self._pending = []
+        with self._io_lock:
+            for fn in (self.path, self.path + ".1"):
+                try:
+                    if os.path.exists(fn):
+                        os.remove(fn)
+                except:
+                    pass
+            self._size = 0
+
+
+LOGGER = AsyncLogger(DEBUG_LOG)
+LOGGER.set_level(config.plugins.ciefprt.log_level.value)
+
+
+def dlog(msg, level=LOG_INFO):
     try:
-        ensure_dirs()
-        ts = time.strftime("%Y-%m-%d %H:%M:%S")
-        with open(DEBUG_LOG, "a", encoding="utf-8", errors="ignore") as f:
-            f.write("[%s] %s\n" % (ts, msg))
+        LOGGER.log(msg, level)
     except:
         pass
 
 
 def clear_debug_log():
+    LOGGER.clear()
+
+
+def tail_debug_log(lines=80):
+    data = LOGGER.tail(lines)
+    return "\n".join(data) if data else "(empty)"
+
+
+# ---------- Tracing ----------
+TRACE_SAMPLES = 200        # zadnjih N trajanja po stage-u
+TRACE_ACTIONS = 30         # zadnjih N user akcija
+TRACE_ACTION_SPANS = 64    # max spanova po akciji
+
+
+class TraceAction(object):
+    """One user action (open detail, load list...) and the spans it caused"""
+    __slots__ = ("name", "label", "start", "end", "spans")
+
+    def __init__(self, name, label=""):
+        self.name = name
+        self.label = label
+        self.start = time.monotonic()
+        self.end = self.start
+        self.spans = []
+
+    def duration(self):
+        return self.end - self.start
+
+
+class Tracer(object):
+    """
+    Lagani tracing: span = (stage, trajanje).
+    Svaki thread ima "trenutnu" akciju (thread-local), pa se spanovi
+    grupisu po user akciji. Po stage-u cuvamo zadnjih TRACE_SAMPLES
+    trajanja za p50/p95.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._stages = {}
+        self._actions = collections.deque(maxlen=TRACE_ACTIONS)
+
+    def begin_action(self, name, label=""):
+        action = TraceAction(name, label)
+        with self._lock:
+            self._actions.append(action)
+        self._local.action = action
+        dlog("TRACE: action '%s' %s" % (name, label), LOG_DEBUG)
+        return action
+
+    def current(self):
+        return getattr(self._local, "action", None)
+
+    def bind(self, action):
+        """Attach action to the calling thread, returns the previous one"""
+        prev = getattr(self._local, "action", None)
+        self._local.action = action
+        return prev
+
+    def record(self, stage, seconds, action=None):
+        action = action or self.current()
+        self.sample(stage, seconds)
+        if action is not None:
+            with self._lock:
+                if len(action.spans) < TRACE_ACTION_SPANS:
+                    action.spans.append((stage, seconds))
+                action.end = max(action.end, time.monotonic())
+
+    def sample(self, stage, seconds):
+        """Stage sample that belongs to no user action (e.g. main-loop lag)"""
+        with self._lock:
+            samples = self._stages.get(stage)
+            if samples is None:
+                samples = self._stages[stage] = collections.deque(maxlen=TRACE_SAMPLES)
+            samples.append(seconds)
+
+    @contextlib.contextmanager
+    def span(self, stage):
+        t0 = time.monotonic()
+        try:
+            yield
+        finally:
+            self.record(stage, time.monotonic() - t0)
+
+    def quantile(self, stage, p, min_samples=1):
+        """p-th percentile of a stage's recent samples, None until min_samples exist"""
+        with self._lock:
+            samples = self._stages.get(stage)
+            if not samples or len(samples) < min_samples:
+                return None
+            values = sorted(samples)
+        return percentile(values, p)
+
+    def reset(self):
+        with self._lock:
+            self._stages = {}
+            self._actions.clear()
+
+    def stage_stats(self):
+        with self._lock:
+            stages = dict((k, sorted(v)) for k, v in self._stages.items())
+        out = []
+        for stage in sorted(stages):
+            v = stages[stage]
+            out.append((stage, len(v), percentile(v, 0.50), percentile(v, 0.95), v[-1]))
+        return out
+
+    def slowest_actions(self, count=5):
+        with self._lock:
+            actions = list(self._actions)
+        actions.sort(key=lambda a: a.duration(), reverse=True)
+        return actions[:count]
+
+    def report(self):
+        lines = ["%-18s %5s %8s %8s %8s" % ("Stage", "n", "p50", "p95", "max")]
+        for stage, n, p50, p95, mx in self.stage_stats():
+            lines.append("%-18s %5d %8s %8s %8s" % (stage, n, fmt_ms(p50), fmt_ms(p95), fmt_ms(mx)))
+        if len(lines) == 1:
+            lines.append("(no samples yet)")
+
+        lines.append("")
+        lines.append("Slowest recent actions:")
+        slow = self.slowest_actions()
+        for a in slow:
+            top = sorted(a.spans, key=lambda x: x[1], reverse=True)[:3]
+            parts = ", ".join("%s %s" % (st, fmt_ms(sec)) for st, sec in top)
+            label = (" - %s" % a.label) if a.label else ""
+            lines.append("%8s  %s%s" % (fmt_ms(a.duration()), a.name, label))
+            if parts:
+                lines.append("          %s" % parts)
+        if not slow:
+            lines.append("(none)")
+        return "\n".join(lines)
+
+
+def percentile(sorted_values, p):
+    if not sorted_values:
+        return 0.0
+    idx = int(round(p * (len(sorted_values) - 1)))
+    return sorted_values[idx]
+
+
+def fmt_ms(seconds):
+    if seconds >= 10:
+        return "%.1fs" % seconds
+    return "%dms" % int(seconds * 1000)
+
+
+TRACER = Tracer()
+
+
+# ---------- Metrics (Prometheus text format) ----------
+METRICS_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+METRICS_HELP = {
+    "ciefprt_http_requests_total": ("counter", "HTTP requests per endpoint"),
+    "ciefprt_http_errors_total": ("counter", "Failed HTTP requests per endpoint"),
+    "ciefprt_http_bytes_total": ("counter", "Response bytes received per endpoint"),
+    "ciefprt_http_bytes_saved_total": ("counter", "Response bytes not read thanks to early-stopped fetches"),
+    "ciefprt_http_request_duration_seconds": ("histogram", "HTTP request latency per endpoint"),
+    "ciefprt_cache_requests_total": ("counter", "Cache lookups by cache and result"),
+    "ciefprt_cache_hit_ratio": ("gauge", "Cache hit ratio since plugin start"),
+    "ciefprt_worker_threads": ("gauge", "Background worker threads currently running"),
+    "ciefprt_ui_queue_depth": ("gauge", "Callbacks waiting for the UI main loop"),
+    "ciefprt_ytdlp_invocations_total": ("counter", "yt-dlp invocations by operation and result"),
+    "ciefprt_ytdlp_duration_seconds": ("histogram", "yt-dlp run time by operation"),
+    "ciefprt_stage_seconds": ("summary", "Traced stage latency (recent samples)"),
+    "ciefprt_parse_total": ("counter", "HTML parses by op and mode (worker/thread/fallback)"),
+    "ciefprt_parse_workers": ("gauge", "Parse worker processes running"),
+    "ciefprt_browse_pages_total": ("counter", "Browse pages loaded by backend (json/html) and prefetch (hit/miss)"),
+    "ciefprt_data_requests_total": ("counter", "Data requests by kind (detail/browse/search), backend (json/html) and result"),
+    "ciefprt_search_hedge_total": ("counter", "Searches by hedge outcome (not_needed/json/html/none)"),
+    "ciefprt_title_index_titles": ("gauge", "Titles in the offline title index"),
+    "ciefprt_epg_resolve_total": ("counter", "EPG title resolutions by source (map/index/search/none)"),
+    "ciefprt_epg_bulk_titles_total": ("counter", "Titles handled by the background EPG resolver by result"),
+    "ciefprt_zap_prefetch_total": ("counter", "Zap prefetches by result (resolved/unresolved/cached/error)"),
+    "ciefprt_rate_titles_total": ("counter", "Titles rated by batch jobs (now_tv/recordings) by result (rated/unrated/error)"),
+    "ciefprt_search_keystroke_seconds": ("histogram", "Search as you type: keystroke to results shown, by source (cache/network)"),
+    "ciefprt_build_info": ("gauge", "Plugin version"),
+}
+
+
+def endpoint_of(url):
+    """Coarse endpoint label for metrics (keeps label cardinality small)"""
     try:
-        if os.path.exists(DEBUG_LOG):
-            os.remove(DEBUG_LOG)
+        parts = urllib.parse.urlsplit(url or "")
     except:
-        pass
+        return "other"
+    host = (parts.netloc or "").lower()
+    path = parts.path or "/"
+    if "editorial.rottentomatoes.com" in host:
+        return "editorial"
+    if "rottentomatoes.com" in host and host.startswith("www"):
+        if path.startswith("/api/autocomplete"):
+            return "autocomplete"
+        if path.startswith("/api/"):
+            return "api"
+        for prefix, name in (("/m/", "movie"), ("/tv/", "tv"), ("/browse/", "browse"),
+                             ("/search", "search"), ("/celebrity/", "celebrity")):
+            if path.startswith(prefix):
+                return name
+        if path.startswith("/napi/"):
+            return "napi"
+        return "other"
+    if "youtube" in host or "googlevideo" in host:
+        return "youtube"
+    if re.search(r"\.(?:jpe?g|png|webp|gif)$", path, re.I) or "image" in host or "flixster" in host:
+        return "image"
+    return "other"
+
+
+class Metrics(object):
+    """Thread-safe counters / gauges / histograms, rendered as Prometheus text"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._hists = {}
+
+    @staticmethod
+    def _key(name, labels):
+        return (name, tuple(sorted(labels.items())))
+
+    def inc(self, name, value=1, **labels):
+        k = self._key(name, labels)
+        with self._lock:
+            self._counters[k] = self._counters.get(k, 0) + value
+
+    def set_gauge(self, name, value, **labels):
+        k = self._key(name, labels)
+        with self._lock:
+            self._gauges[k] = value
+
+    def add_gauge(self, name, delta, **labels):
+        k = self._key(name, labels)
+        with self._lock:
+            self._gauges[k] = self._gauges.get(k, 0) + delta
+
+    def observe(self, name, seconds, **labels):
+        k = self._key(name, labels)
+        with self._lock:
+            h = self._hists.get(k)
+            if h is None:
+                h = self._hists[k] = [[0] * len(METRICS_BUCKETS), 0, 0.0]
+            for i, b in enumerate(METRICS_BUCKETS):
+                if seconds <= b:
+                    h[0][i] += 1
+            h[1] += 1
+            h[2] += seconds
+
+    def reset(self):
+        with self._lock:
+            self._counters = {}
+            self._gauges = {}
+            self._hists = {}
+
+    def render(self):
+        samples = {}
+
+        def add(name, labels, value):
+            samples.setdefault(name, []).append((labels, value))
+
+        with self._lock:
+            counters = dict(self._counters)
+            gauges = dict(self._gauges)
+            hists = dict((k, (list(v[0]), v[1], v[2])) for k, v in self._hists.items())
+
+        for (name, labels), v in counters.items():
+            add(name, labels, v)
+        for (name, labels), v in gauges.items():
+            add(name, labels, v)
+
+        # hit ratio iz cache brojaca
+        per_cache = {}
+        for (name, labels), v in counters.items():
+            if name != "ciefprt_cache_requests_total":
+                continue
+            d = dict(labels)
+            hm = per_cache.setdefault(d.get("cache", ""), [0, 0])
+            hm[1 if d.get("result") == "miss" else 0] += v
+        for cache, (hit, miss) in per_cache.items():
+            if hit + miss:
+                add("ciefprt_cache_hit_ratio", (("cache", cache),), float(hit) / (hit + miss))
+
+        for stage, n, p50, p95, mx in TRACER.stage_stats():
+            add("ciefprt_stage_seconds", (("quantile", "0.5"), ("stage", stage)), p50)
+            add("ciefprt_stage_seconds", (("quantile", "0.95"), ("stage", stage)), p95)
+
+        add("ciefprt_build_info", (("version", PLUGIN_VERSION),), 1)
+
+        lines = []
+        for name in sorted(set(list(samples) + [k[0] for k in hists])):
+            mtype, mhelp = METRICS_HELP.get(name, ("untyped", name))
+            lines.append("# HELP %s %s" % (name, mhelp))
+            lines.append("# TYPE %s %s" % (name, mtype))
+            for labels, v in samples.get(name, []):
+                lines.append("%s%s %s" % (name, _fmt_labels(labels), _fmt_value(v)))
+            for (hname, labels), (buckets, count, total) in hists.items():
+                if hname != name:
+                    continue
+                for b, c in zip(METRICS_BUCKETS, buckets):
+                    lines.append("%s_bucket%s %d" % (name, _fmt_labels(labels + (("le", repr(b)),)), c))
+                lines.append("%s_bucket%s %d" % (name, _fmt_labels(labels + (("le", "+Inf"),)), count))
+                lines.append("%s_sum%s %s" % (name, _fmt_labels(labels), _fmt_value(total)))
+                lines.append("%s_count%s %d" % (name, _fmt_labels(labels), count))
+        return "\n".join(lines) + "\n"
 
 
-def tail_debug_log(lines=80):
+def _fmt_labels(labels):
+    if not labels:
+        return ""
+    esc = lambda v: str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+    return "{%s}" % ",".join('%s="%s"' % (k, esc(v)) for k, v in labels)
+
+
+def _fmt_value(v):
+    if isinstance(v, float):
+        return "%.6g" % v
+    return str(v)
+
+
+METRICS = Metrics()
+
+
+class MetricsExporter(object):
+    """
+    Periodicno upisuje METRICS.render() u fajl (atomic rename), da ga
+    node_exporter textfile collector ili bilo koji scraper moze pokupiti.
+    Plugin ne otvara nikakve portove. Krece sa enigmom (sessionstart);
+    wake() prekida cekanje, pa se iskljucenje vidi odmah.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def wake(self):
+        self._wake.set()
+
+    def ensure_running(self):
+        if not config.plugins.ciefprt.metrics_export.value:
+            return
+        with self._lock:
+            if self._thread is not None and self._thread.is_alive():
+                return
+            self._thread = threading.Thread(target=self._run, name="ciefprt-metrics", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        dlog("METRICS: exporter started")
+        while config.plugins.ciefprt.metrics_export.value:
+            self.write()
+            try:
+                interval = int(config.plugins.ciefprt.metrics_interval.value)
+            except:
+                interval = 60
+            self._wake.wait(interval)
+            self._wake.clear()
+        dlog("METRICS: exporter stopped")
+
+    def write(self):
+        path = config.plugins.ciefprt.metrics_path.value or METRICS_FILE
+        tmp = path + ".tmp"
+        try:
+            d = os.path.dirname(path)
+            if d and not os.path.isdir(d):
+                os.makedirs(d)
+            with open(tmp, "w") as f:
+                f.write(METRICS.render())
+            os.replace(tmp, path)
+            return True
+        except Exception as e:
+            dlog("METRICS: write to %s failed: %s" % (path, e), LOG_WARNING)
+            return False
+
+
+METRICS_EXPORTER = MetricsExporter()
+
+
+# ---------- Profiling (cProfile on demand) ----------
+PROFILE_TOP = 30
+
+
+class ProfileCapture(object):
+    """
+    cProfile za sljedecih N user akcija.
+    cProfile radi po threadu, pa svaki worker (start_thread) i svaki UI
+    callback (UIDispatcher) dobija svoj Profile, a rezultati se spajaju u
+    jedan pstats.Stats. Od Pythona 3.12 smije raditi samo jedan profiler
+    u procesu; poziv koji ga ne dobije radi bez profila (nikad se ne
+    preskace). Capture se snima u CACHE_DIR (.pstats + .txt summary) kad
+    krene akcija N+1, na Stop iz Settings ili na izlazu iz plugina.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._active = False
+        self._remaining = 0
+        self._stats = None
+        self._actions = []
+        self._started = 0
+
+    def active(self):
+        return self._active
+
+    def captured(self):
+        return len(self._actions)
+
+    def arm(self, count):
+        with self._lock:
+            self._active = True
+            self._remaining = count
+            self._stats = None
+            self._actions = []
+            self._started = time.time()
+        dlog("PROFILE: armed for next %d actions" % count)
+
+    def on_action(self, name, label=""):
+        if not self._active:
+            return
+        if self._remaining <= 0:
+            self.stop()
+            return
+        with self._lock:
+            self._remaining -= 1
+            self._actions.append("%s %s" % (name, label))
+
+    def run(self, fn, *args, **kwargs):
+        # ne profilisi ako je capture ugasen ili smo vec unutar profila (isti thread)
+        if not self._active or getattr(self._local, "busy", False):
+            return fn(*args, **kwargs)
+        import cProfile
+        prof = cProfile.Profile()
+        try:
+            prof.enable()
+        except ValueError:
+            # 3.12+: "Another profiling tool is already active" (drugi thread)
+            return fn(*args, **kwargs)
+        self._local.busy = True
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            prof.disable()
+            self._local.busy = False
+            self._merge(prof)
+
+    def _merge(self, prof):
+        import pstats
+        try:
+            with self._lock:
+                if not self._active:
+                    return
+                if self._stats is None:
+                    self._stats = pstats.Stats(prof)
+                else:
+                    self._stats.add(prof)
+        except Exception as e:
+            dlog("PROFILE: merge failed: %s" % e, LOG_WARNING)
+
+    def stop(self):
+        """Finish the capture, returns path of the .pstats dump (or None)"""
+        with self._lock:
+            if not self._active:
+                return None
+            self._active = False
+            stats = self._stats
+            actions = self._actions
+            self._stats = None
+        if stats is None:
+            dlog("PROFILE: stopped, nothing captured")
+            return None
+
+        ensure_dirs()
+        base = os.path.join(CACHE_DIR, "profile_%s" % time.strftime("%Y%m%d_%H%M%S"))
+        try:
+            stats.dump_stats(base + ".pstats")
+
+            buf = io.StringIO()
+            buf.write("%s v%s profile\n" % (PLUGIN_NAME, PLUGIN_VERSION))
+            buf.write("Wall time: %.1fs\n" % (time.time() - self._started))
+            buf.write("Actions:\n")
+            for a in actions:
+                buf.write("  %s\n" % a)
+            buf.write("\n")
+            stats.stream = buf
+            stats.strip_dirs()
+            stats.sort_stats("cumulative").print_stats(PROFILE_TOP)
+            stats.sort_stats("tottime").print_stats(PROFILE_TOP // 2)
+            with open(base + ".txt", "w") as f:
+                f.write(buf.getvalue())
+            dlog("PROFILE: saved %s.pstats (%d actions)" % (base, len(actions)))
+            return base + ".pstats"
+        except Exception as e:
+            dlog("PROFILE: save failed: %s" % e, LOG_ERROR)
+            return None
+
+
+PROFILER = ProfileCapture()
+
+
+def begin_action(name, label=""):
+    """Start a traced user action in the calling thread; counts toward an armed profile capture"""
+    PROFILER.on_action(name, label)
+    return TRACER.begin_action(name, label)
+
+
+def start_thread(action, fn, *args):
+    """Daemon worker running fn(*args) as part of action, under the profiler"""
+    def run():
+        TRACER.bind(action)
+        PROFILER.run(fn, *args)
+
+    t = threading.Thread(target=run, daemon=True)
+    t.start()
+    return t
+
+
+def run_ytdlp(op, cmd, timeout):
+    """subprocess.run for yt-dlp with invocation time / result metrics"""
+    import subprocess
+    t0 = time.monotonic()
+    result = "error"
     try:
-        if not os.path.exists(DEBUG_LOG):
-            return "debug.log not found"
-        with open(DEBUG_LOG, "r", encoding="utf-8", errors="ignore") as f:
-            data = f.read().splitlines()
-        data = data[-lines:]
-        return "\n".join(data) if data else "(empty)"
-    except Exception as e:
-        return "error reading log: %s" % e
+        proc = subprocess.run(cmd, capture_output=True, text=True, timeout=timeout)
+        result = "ok" if proc.returncode == 0 else "fail"
+        return proc
+    except subprocess.TimeoutExpired:
+        result = "timeout"
+        raise
+    finally:
+        dt = time.monotonic() - t0
+        METRICS.inc("ciefprt_ytdlp_invocations_total", op=op, result=result)
+        METRICS.observe("ciefprt_ytdlp_duration_seconds", dt, op=op)
+        TRACER.record("ytdlp." + op, dt)
 
 
 def get_cache_size():
@@ -109,33 +799,87 @@ def get_cache_size():
         return 0
 
 
-def ssl_ctx():
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-    return ctx
+def http_get(url, timeout=8):
+    req = rt_request(url)
+    endpoint = endpoint_of(url)
+    METRICS.inc("ciefprt_http_requests_total", endpoint=endpoint)
+    t0 = time.monotonic()
+    try:
+        # connect = DNS + TCP + TLS + cekanje na headere, transfer = citanje tijela
+        with urllib.request.urlopen(req, context=ssl_ctx(), timeout=timeout) as r:
+            t1 = time.monotonic()
+            data = r.read()
+        t2 = time.monotonic()
+        TRACER.record("fetch.connect", t1 - t0)
+        TRACER.record("fetch.transfer", t2 - t1)
+        TRACER.record("fetch", t2 - t0)
+        METRICS.observe("ciefprt_http_request_duration_seconds", t2 - t0, endpoint=endpoint)
+        METRICS.inc("ciefprt_http_bytes_total", len(data), endpoint=endpoint)
+        return data
+    except Exception as e:
+        TRACER.record("fetch.error", time.monotonic() - t0)
+        METRICS.inc("ciefprt_http_errors_total", endpoint=endpoint)
+        dlog(f"HTTP GET failed for {url}: {e}")
+        raise
 
 
-def http_get(url, timeout=8):
-    req = urllib.request.Request(url)
-    req.add_header("User-Agent", "Mozilla/5.0 (Enigma2; CiefpRottenTomatoes)")
-    req.add_header("Accept", "*/*")
-    req.add_header("Referer", BASE + "/")
-    req.add_header("Origin", BASE)
+def http_get_stream(url, done=None, timeout=8, max_bytes=HTTP_MAX_BODY):
+    """
+    GET that reads the body in chunks as they arrive. done(chunk) -> True
+    closes the connection early; the body is also cut at max_bytes.
+    Returns (data, complete); bytes and estimated time not spent on the
+    rest of the body go to ciefprt_http_bytes_saved_total / "fetch.saved".
+    """
+    req = rt_request(url)
+    endpoint = endpoint_of(url)
+    METRICS.inc("ciefprt_http_requests_total", endpoint=endpoint)
+    t0 = time.monotonic()
+    parts = []
+    size = 0
+    complete = True
     try:
         with urllib.request.urlopen(req, context=ssl_ctx(), timeout=timeout) as r:
-            return r.read()
+            t1 = time.monotonic()
+            total = int(r.headers.get("Content-Length") or 0)
+            read = getattr(r, "read1", r.read)
+            while True:
+                chunk = read(HTTP_STREAM_CHUNK)
+                if not chunk:
+                    break
+                parts.append(chunk)
+                size += len(chunk)
+                if size >= max_bytes:
+                    complete = False
+                    dlog("HTTP: %s cut at %d bytes" % (url, size), LOG_WARNING)
+                    break
+                if done is not None and done(chunk):
+                    complete = False
+                    break
+        t2 = time.monotonic()
     except Exception as e:
+        TRACER.record("fetch.error", time.monotonic() - t0)
+        METRICS.inc("ciefprt_http_errors_total", endpoint=endpoint)
         dlog(f"HTTP GET failed for {url}: {e}")
         raise
 
+    TRACER.record("fetch.connect", t1 - t0)
+    TRACER.record("fetch.transfer", t2 - t1)
+    TRACER.record("fetch", t2 - t0)
+    METRICS.observe("ciefprt_http_request_duration_seconds", t2 - t0, endpoint=endpoint)
+    METRICS.inc("ciefprt_http_bytes_total", size, endpoint=endpoint)
+    if not complete and total > size:
+        # ostatak bi stizao istom brzinom kao dosad procitani dio
+        saved = total - size
+        est = saved * (t2 - t1) / size if size and t2 > t1 else 0.0
+        METRICS.inc("ciefprt_http_bytes_saved_total", saved, endpoint=endpoint)
+        TRACER.record("fetch.saved", est)
+        dlog("HTTP: %s read %d of %d bytes (~%.0f ms saved)" % (endpoint, size, total, est * 1000), LOG_DEBUG)
+    return b"".join(parts), complete
+
 
 def search_youtube_trailer(query, year=""):
     """Search YouTube for trailer by title and year using yt-dlp"""
     try:
-        import subprocess
-        import json
-
         # Kreiraj search query
         search_query = f"{query} official trailer"
         if year:
@@ -153,7 +897,7 @@ def search_youtube_trailer(query, year=""):
             f'ytsearch5:{search_query}'
         ]
 
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+        result = run_ytdlp("search", cmd, timeout=30)
 
         if result.returncode == 0:
             # Parsiraj JSON linije (svaka linija je jedan video)
@@ -220,8 +964,8 @@ def play_video_with_movieplayer(session, url, title="Trailer"):
 def fetch_trailer_url(tv_movie_url):
     """Fetch trailer URL from Rotten Tomatoes internal API"""
     try:
-        # Prvo dohvatimo HTML da izvučemo ID
-        html = http_get(tv_movie_url, timeout=10)
+        # Prvo dohvatimo HTML da izvučemo ID (parse_detail ga je vec kesirao)
+        html = get_cached_page(tv_movie_url, ttl=DETAIL_TTL) or http_get(tv_movie_url, timeout=10)
         html_str = html.decode("utf-8", "ignore")
 
         # Pokušaj pronaći ID u JSON-LD ili meta tagovima
@@ -242,13 +986,8 @@ def fetch_trailer_url(tv_movie_url):
                 pass
 
         # 2. Pokušaj pronaći u JSON-LD
-        ld_match = re.search(
-            r'<script[^>]+type="application/ld\+json"[^>]*>(.*?)</script>',
-            html_str, re.S | re.I
-        )
-        if ld_match:
+        for data in jsonld_doc(html_str, tv_movie_url).objects:
             try:
-                data = json.loads(ld_match.group(1))
                 if isinstance(data, dict):
                     # Pokušaj različite putanje
                     for key in ["video", "trailer", "videoId", "id"]:
@@ -342,12 +1081,9 @@ def fetch_trailer_by_id(video_id):
 def play_youtube_with_ytdlp(url):
     """Get YouTube stream URL using yt-dlp"""
     try:
-        import subprocess
-        import json
-
         # Prvo probaj dobiti stream URL
         cmd = ['yt-dlp', '-g', '-f', 'best[height<=720]', url]
-        result = subprocess.run(cmd, capture_output=True, text=True, timeout=30)
+        result = run_ytdlp("stream", cmd, timeout=30)
 
         if result.returncode == 0:
             stream_url = result.stdout.strip().split('\n')[0]
@@ -378,848 +1114,2073 @@ def fetch_trailer_by_id_from_data(data):
                 return result
     return None
 
-def cache_key(url):
-    return re.sub(r"[^a-zA-Z0-9]+", "_", url).strip("_")
-
-
-def get_cached_page(url, ttl=300):
+def get_cached_page(url, ttl=LIST_TTL):
     if not config.plugins.ciefprt.cache_enabled.value:
         return None
     ensure_dirs()
-    fn = os.path.join(CACHE_PAGES, cache_key(url) + ".html")
-    try:
-        if os.path.exists(fn) and (time.time() - os.path.getmtime(fn) <= ttl):
-            with open(fn, "rb") as f:
-                return f.read()
-    except:
-        pass
-    return None
+    with TRACER.span("cache.page"):
+        data = read_cached(page_path(url), ttl)
+    METRICS.inc("ciefprt_cache_requests_total", cache="page", result="hit" if data is not None else "miss")
+    return data
 
 
-def set_cached_page(url, data):
-    if not config.plugins.ciefprt.cache_enabled.value:
-        return
+def fetch_poster(img_url, timeout=8):
+    """Poster file in CACHE_POSTERS (same name the detail screen uses), downloaded if missing"""
     ensure_dirs()
-    fn = os.path.join(CACHE_PAGES, cache_key(url) + ".html")
-    try:
+    fn = poster_path(img_url)
+    if not poster_cache_hit(fn):
+        with TRACER.span("poster.download"):
+            data = http_get(img_url, timeout=timeout)
         with open(fn, "wb") as f:
             f.write(data)
-    except:
-        pass
+    return fn
 
 
-def clear_cache():
-    try:
-        for root, dirs, files in os.walk(CACHE_DIR, topdown=False):
-            for fn in files:
-                try:
-                    if fn != os.path.basename(DEBUG_LOG):
-                        os.remove(os.path.join(root, fn))
-                except:
-                    pass
-            for dn in dirs:
-                try:
-                    os.rmdir(os.path.join(root, dn))
-                except:
-                    pass
-    except:
-        pass
-    ensure_dirs()
-def normalize_rt_url(u):
-    if not u:
-        return None
+def poster_cache_hit(fn):
+    """True if image file is already cached (counted in cache metrics)"""
+    hit = os.path.exists(fn)
+    METRICS.inc("ciefprt_cache_requests_total", cache="poster", result="hit" if hit else "miss")
+    return hit
 
-    u = u.strip()
 
-    # --- FIX za //www.rottentomatoes.com/...
-    if u.startswith("//"):
-        return "https:" + u
+def set_cached_page(url, data):
+    if not config.plugins.ciefprt.cache_enabled.value:
+        return
+    ensure_dirs()
+    write_cached(page_path(url), data)
 
-    if u.startswith("http"):
-        return u
-    if u.startswith("/"):
-        return BASE + u
-    return BASE + "/" + u
 
-# ---------- Search functions ----------
-def search_rt(query, search_type="movie"):
-    """Search Rotten Tomatoes using their API/autocomplete"""
-    # Očisti query prije slanja
-    clean_query = re.sub(r'[:;!?]', ' ', query)
-    clean_query = re.sub(r'\s+', ' ', clean_query).strip()
+# ---------- JSON-LD (jedan decode po stranici) ----------
+JSONLD_DOC_CACHE = 24   # zadnjih N dokumenata u RAM-u
 
-    search_url = f"{BASE}/api/autocomplete?v=1&query={urllib.parse.quote(clean_query)}"
 
-    try:
-        raw = http_get(search_url, timeout=10)
-        data = json.loads(raw.decode("utf-8", "ignore"))
-        results = []
-        
-        # Process movies
-        if search_type == "movie" and "movies" in data:
-            limit = int(config.plugins.ciefprt.max_items.value)
-            for movie in data["movies"][:limit]:
-                name = movie.get("name", "").strip()
-                year = movie.get("year", "")
-                url = movie.get("url", "")
-                image = movie.get("image", "")
-                
-                if name and url:
-                    display_name = f"{name} ({year})" if year else name
-                    results.append({
-                        "name": display_name,
-                        "url": normalize_rt_url(url),
-                        "image": image,
-                        "year": year
-                    })
-        
-        # Process TV shows
-        elif search_type == "tv" and "tvSeries" in data:
-            limit = int(config.plugins.ciefprt.max_items.value)
-            for tv in data["tvSeries"][:limit]: 
-                name = tv.get("name", "").strip()
-                start_year = tv.get("startYear", "")
-                url = tv.get("url", "")
-                image = tv.get("image", "")
-                
-                if name and url:
-                    display_name = f"{name} ({start_year})" if start_year else name
-                    results.append({
-                        "name": display_name,
-                        "url": normalize_rt_url(url),
-                        "image": image,
-                        "year": start_year
-                    })
-                    # Ako API vrati prazan rezultat, probaj fallback (search page)
-                    if not results:
-                        return search_rt_fallback(query, search_type)
-
-                    return results
-
-        # ... ostatak koda ...
-    except Exception as e:
-        dlog(f"SEARCH API error: {e}")
-        return search_rt_fallback(clean_query, search_type)
+class JsonLdCache(object):
+    """
+    url -> JsonLdDoc. Entries are keyed by a CRC of the page text, so a
+    re-fetched page with new content is decoded again. With the page cache
+    enabled the decoded objects are also kept next to the page file
+    (marshal, much faster to load than json) for repeat views after restart.
+    """
 
+    def __init__(self, size=JSONLD_DOC_CACHE):
+        self.size = size
+        self._docs = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, html, url=None, blocks=None):
+        if not url:
+            return JsonLdDoc.from_html(html) if blocks is None else JsonLdDoc.from_blocks(blocks)
+
+        crc = zlib.crc32(html.encode("utf-8", "ignore"))
+        with self._lock:
+            hit = self._docs.get(url)
+            if hit and hit[0] == crc:
+                self._docs.move_to_end(url)
+                METRICS.inc("ciefprt_cache_requests_total", cache="jsonld", result="hit")
+                return hit[1]
+
+        doc = self._load_sidecar(url, crc)
+        METRICS.inc("ciefprt_cache_requests_total", cache="jsonld", result="hit" if doc else "miss")
+        if doc is None:
+            doc = JsonLdDoc.from_html(html) if blocks is None else JsonLdDoc.from_blocks(blocks)
+            self._save_sidecar(url, crc, doc)
+
+        with self._lock:
+            self._docs[url] = (crc, doc)
+            self._docs.move_to_end(url)
+            while len(self._docs) > self.size:
+                self._docs.popitem(last=False)
+        return doc
+
+    def clear(self):
+        with self._lock:
+            self._docs.clear()
+
+    @staticmethod
+    def _sidecar(url):
+        return os.path.join(CACHE_PAGES, cache_key(url) + ".jsonld")
+
+    def _load_sidecar(self, url, crc):
+        if not config.plugins.ciefprt.cache_enabled.value:
+            return None
+        try:
+            with open(self._sidecar(url), "rb") as f:
+                stored_crc, objects = marshal.load(f)
+            if stored_crc == crc:
+                return JsonLdDoc(objects)
+        except:
+            pass
+        return None
 
-def search_rt_fallback(query, search_type="movie"):
-    """Fallback search using RT search page - parses Shadow DOM content"""
-    try:
-        # Očisti query - pretvori & u and
-        clean_query = re.sub(r'[&]', 'and', query)
-        clean_query = re.sub(r'[:;!?]', ' ', clean_query)
-        clean_query = re.sub(r'\s+', ' ', clean_query).strip()
+    def _save_sidecar(self, url, crc, doc):
+        if not config.plugins.ciefprt.cache_enabled.value:
+            return
+        ensure_dirs()
+        fn = self._sidecar(url)
+        try:
+            with open(fn + ".tmp", "wb") as f:
+                marshal.dump((crc, doc.objects), f)
+            os.replace(fn + ".tmp", fn)
+        except:
+            pass
 
-        search_url = f"{BASE}/search?search={urllib.parse.quote(clean_query)}"
-        dlog(f"SEARCH: Fallback URL: {search_url}")
 
-        raw = http_get(search_url, timeout=10)
-        html = raw.decode("utf-8", "ignore")
+JSONLD_CACHE = JsonLdCache()
 
-        results = []
-
-        # --- METODA 1: Traži search-page-media-row elemente ---
-        # Ovi elementi sadrže podatke u atributima
-        for m in re.finditer(
-                r'<search-page-media-row[^>]*?'
-                r'data-qa="data-row"[^>]*?'
-                r'release-year="([^"]*)"[^>]*?'
-                r'tomatometer-score="([^"]*)"[^>]*?'
-                r'tomatometer-sentiment="([^"]*)"[^>]*?'
-                r'>(.*?)</search-page-media-row>',
-                html, re.I | re.S
-        ):
-            release_year = m.group(1).strip()
-            tomatometer = m.group(2).strip()
-            sentiment = m.group(3).strip()
-            inner_html = m.group(4)
-
-            # Ekstrakcija URL-a - traži <a href="..."> unutar
-            href_match = re.search(r'<a[^>]+href="([^"]+)"[^>]*>', inner_html, re.I)
-            if not href_match:
-                continue
-            href = href_match.group(1).strip()
 
-            # Filtriranje po tipu
-            if search_type == "movie" and not href.startswith("/m/"):
-                continue
-            if search_type == "tv" and not href.startswith("/tv/"):
-                continue
+def jsonld_doc(html, url=None, blocks=None):
+    """JsonLdDoc for a page; pass url to reuse the decode across calls/views."""
+    with TRACER.span("parse.jsonld"):
+        return JSONLD_CACHE.get(html, url, blocks)
 
-            # Ekstrakcija naslova
-            title = ""
-            title_match = re.search(r'<a[^>]+data-qa="info-name"[^>]*>(.*?)</a>', inner_html, re.I | re.S)
-            if title_match:
-                title = re.sub(r'<[^>]+>', '', title_match.group(1)).strip()
-                title = re.sub(r'\s+', ' ', title)
-
-            # Ako nema data-qa, probaj drugi način
-            if not title:
-                title_match = re.search(r'<a[^>]+slot="title"[^>]*>(.*?)</a>', inner_html, re.I | re.S)
-                if title_match:
-                    title = re.sub(r'<[^>]+>', '', title_match.group(1)).strip()
-                    title = re.sub(r'\s+', ' ', title)
-
-            if not title:
-                continue
 
-            # Godina iz release-year atributa ili iz naslova
-            year = release_year
-            if not year:
-                year_match = re.search(r'\((\d{4})\)', title)
-                if year_match:
-                    year = year_match.group(1)
-                    title = re.sub(r'\s*\(\d{4}\)\s*$', '', title).strip()
-
-            # Ekstrakcija slike
-            image = ""
-            img_match = re.search(r'<img[^>]+src="([^"]+)"', inner_html, re.I)
-            if img_match:
-                image = img_match.group(1).strip()
-
-            display_name = f"{title} ({year})" if year else title
-            results.append({
-                "name": display_name,
-                "url": normalize_rt_url(href),
-                "image": image,
-                "year": year
-            })
-            dlog(f"SEARCH: Found: {display_name} -> {href}")
-
-        # --- METODA 2: Ako nema rezultata, probaj sa JSON-LD ---
-        if not results:
-            dlog("SEARCH: No search-page-media-row found, trying JSON-LD...")
-            for script in re.findall(r'<script[^>]+type="application/ld\+json"[^>]*>(.*?)</script>', html, re.S | re.I):
-                try:
-                    data = json.loads(script.strip())
-                    if isinstance(data, dict):
-                        # Pokušaj pronaći ItemList
-                        if data.get("@type") == "ItemList":
-                            items = data.get("itemListElement", [])
-                            for item in items:
-                                if isinstance(item, dict):
-                                    name = item.get("name", "")
-                                    url = item.get("url", "")
-                                    if name and url:
-                                        if search_type == "movie" and not url.startswith("/m/"):
-                                            continue
-                                        if search_type == "tv" and not url.startswith("/tv/"):
-                                            continue
-                                        results.append({
-                                            "name": name,
-                                            "url": normalize_rt_url(url),
-                                            "image": "",
-                                            "year": ""
-                                        })
-                                        dlog(f"SEARCH: Found via JSON-LD: {name}")
-                except:
-                    pass
+# ---------- Parse worker (HTML parsiranje van GIL-a enigme) ----------
+PARSE_WORKER_SCRIPT = os.path.join(PLUGIN_PATH, "parse_worker.py")
+PARSE_WORKER_TIMEOUT = 15.0   # max sekundi cekanja na jedan odgovor
+PARSE_WORKER_WAIT = 2.0       # max cekanja na slobodan worker, pa u thread
+PARSE_WORKER_RETRY = 300      # nakon neuspjelog starta probaj ponovo za N sekundi
 
-        # --- METODA 3: Konačni fallback - direktno iz URL-a ---
-        if not results:
-            dlog("SEARCH: Trying direct URL construction...")
-            # Pokušaj s različitim formatima URL-a
-            possible_slugs = [
-                clean_query.lower().replace(' ', '_'),
-                clean_query.lower().replace(' ', '-'),
-                clean_query.lower().replace(' ', ''),
-            ]
-            # Dodaj i specifične varijante za Mr. & Mrs. Smith
-            if "mr" in clean_query.lower() and "mrs" in clean_query.lower():
-                possible_slugs.extend([
-                    "mr_and_mrs_smith",
-                    "mr_and_mrs_smith_2005",
-                    "mr_and_mrs_smith_2024",
-                    "1014325-mr_and_mrs_smith"
-                ])
 
-            for slug in possible_slugs:
-                test_url = f"{BASE}/m/{slug}"
-                try:
-                    req = urllib.request.Request(test_url)
-                    req.add_header("User-Agent", "Mozilla/5.0")
-                    req.get_method = lambda: 'HEAD'
-                    with urllib.request.urlopen(req, context=ssl_ctx(), timeout=5) as r:
-                        if r.getcode() == 200:
-                            results.append({
-                                "name": clean_query,
-                                "url": test_url,
-                                "image": "",
-                                "year": ""
-                            })
-                            dlog(f"SEARCH: Found via direct URL: {test_url}")
-                            break
-                except:
-                    continue
+class ParseWorkerError(Exception):
+    pass
 
-        dlog(f"SEARCH: Fallback found {len(results)} results")
-        return results[:20]
 
-    except Exception as e:
-        dlog(f"SEARCH fallback error: {e}")
-        import traceback
-        dlog(traceback.format_exc())
-        return []
+class _WorkerUnpickler(pickle.Unpickler):
+    # worker importuje rtparse kao top-level modul; record klase su nase
+    def find_class(self, module, name):
+        if module == "rtparse" and name in RECORD_TYPES:
+            return RECORD_TYPES[name]
+        return pickle.Unpickler.find_class(self, module, name)
 
 
-def parse_browse_api_page(browse_url, page=1, limit=BROWSE_PAGE_SIZE):
+class ParseWorker(object):
     """
-    Load more za BASE /browse/... preko HTML ?page=N.
-    RT često vraća kumulativnu listu (page=2 ima i page=1 + još),
-    zato ovde vraćamo SVE stavke sa te stranice.
+    One python3 child running parse_worker.py. Requests and replies are
+    pickle frames with a 4-byte big-endian length over its stdin/stdout.
     """
-    try:
-        parts = urllib.parse.urlsplit(browse_url)
-        q = urllib.parse.parse_qs(parts.query)
-
-        if page > 1:
-            q["page"] = [str(page)]
-        else:
-            q.pop("page", None)
 
-        new_query = urllib.parse.urlencode(q, doseq=True)
-        paged_url = urllib.parse.urlunsplit((parts.scheme, parts.netloc, parts.path, new_query, parts.fragment))
-        dlog("LOAD MORE URL: %s" % paged_url)
+    def __init__(self, python, generation):
+        import subprocess
+        self.generation = generation
+        self.proc = subprocess.Popen(
+            [python, PARSE_WORKER_SCRIPT],
+            stdin=subprocess.PIPE, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            close_fds=True
+        )
 
-        return parse_browse(paged_url) or []
-    except Exception as e:
-        dlog(f"BROWSE HTML page error: {e}")
-        return []
+    def alive(self):
+        return self.proc.poll() is None
+
+    def _read(self, size, deadline):
+        fd = self.proc.stdout.fileno()
+        parts = []
+        while size > 0:
+            left = deadline - time.monotonic()
+            if left <= 0 or not select.select([fd], [], [], left)[0]:
+                raise ParseWorkerError("timeout")
+            chunk = os.read(fd, min(size, 65536))
+            if not chunk:
+                raise ParseWorkerError("worker exited")
+            parts.append(chunk)
+            size -= len(chunk)
+        return b"".join(parts)
+
+    def request(self, op, html, kwargs):
+        """Yields (kind, value) frames: "more" chunks, then "ok" or "err" """
+        data = pickle.dumps((op, html, kwargs), pickle.HIGHEST_PROTOCOL)
+        try:
+            self.proc.stdin.write(struct.pack(">I", len(data)))
+            self.proc.stdin.write(data)
+            self.proc.stdin.flush()
+        except (OSError, ValueError) as e:
+            raise ParseWorkerError("write failed: %s" % e)
+
+        while True:
+            deadline = time.monotonic() + PARSE_WORKER_TIMEOUT
+            size = struct.unpack(">I", self._read(4, deadline))[0]
+            kind, value = _WorkerUnpickler(io.BytesIO(self._read(size, deadline))).load()
+            yield kind, value
+            if kind != "more":
+                return
 
-def parse_search_page(html, search_type="movie"):
-    results = []
+    def close(self):
+        try:
+            self.proc.kill()
+            self.proc.wait(timeout=2)
+        except:
+            pass
 
-    for m in re.finditer(r'(<search-results-item\b[^>]*>.*?</search-results-item>)', html, re.S | re.I):
-        block = m.group(1)
 
-        href_m = re.search(r'\bhref="([^"]+)"', block, re.I)
-        if not href_m:
-            continue
-        href = href_m.group(1).strip()
+class ParsePool(object):
+    """
+    Persistent parse worker process(es), size from config parse_worker.
+    Workers are spawned on first use and stay alive between calls; a
+    worker that times out, dies or is abandoned mid-reply is killed and
+    replaced on the next call.
+    """
 
-        # filtriranje tipa po URL-u
-        if search_type == "movie":
-            if not href.startswith("/m/"):
-                continue
-        else:
-            if not href.startswith("/tv/"):
-                continue
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._idle = []
+        self._count = 0
+        self._generation = 0
+        self._broken_until = 0.0
+
+    def size(self):
+        mode = config.plugins.ciefprt.parse_worker.value
+        if mode == "off":
+            return 0
+        if mode == "auto":
+            # jedno jezgro: i jedan proces pomaze (OS ga prekida, GIL ne)
+            return 1 if (os.cpu_count() or 1) <= 2 else 2
+        try:
+            return int(mode)
+        except:
+            return 0
 
-        # naslov
-        title = ""
-        t = re.search(r'<rt-text[^>]+slot="title"[^>]*>\s*([^<]+)\s*</rt-text>', block, re.I)
-        if t:
-            title = t.group(1).strip()
-        if not title:
-            continue
+    def _acquire(self):
+        size = self.size()
+        if size <= 0 or time.monotonic() < self._broken_until:
+            return None
+        deadline = time.monotonic() + PARSE_WORKER_WAIT
+        with self._cond:
+            while True:
+                while self._idle:
+                    worker = self._idle.pop()
+                    if worker.alive():
+                        return worker
+                    self._count -= 1
+                    worker.close()
+                    METRICS.add_gauge("ciefprt_parse_workers", -1)
+                if self._count < size:
+                    self._count += 1
+                    generation = self._generation
+                    break
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    return None
+                self._cond.wait(left)
 
-        year = ""
-        ym = re.search(r'\b(19\d{2}|20\d{2})\b', block)
-        if ym:
-            year = ym.group(1)
+        try:
+            python = shutil.which("python3") or "/usr/bin/python3"
+            worker = ParseWorker(python, generation)
+            dlog("PARSE: started worker pid %d" % worker.proc.pid, LOG_DEBUG)
+            METRICS.add_gauge("ciefprt_parse_workers", 1)
+            return worker
+        except Exception as e:
+            dlog("PARSE: cannot start worker (%s), parsing in threads" % e, LOG_WARNING)
+            self._broken_until = time.monotonic() + PARSE_WORKER_RETRY
+            with self._cond:
+                self._count -= 1
+                self._cond.notify()
+            return None
 
-        image = ""
-        im = re.search(r'<img[^>]+src="([^"]+)"', block, re.I)
-        if im:
-            image = im.group(1).strip()
+    def _release(self, worker, in_sync):
+        with self._cond:
+            if in_sync and worker.alive() and worker.generation == self._generation \
+                    and self._count <= self.size():
+                self._idle.append(worker)
+                worker = None
+            else:
+                self._count -= 1
+            self._cond.notify()
+        if worker is not None:
+            worker.close()
+            METRICS.add_gauge("ciefprt_parse_workers", -1)
+
+    def run(self, op, html, kwargs):
+        """Generator of worker frames, or None if no worker is available"""
+        worker = self._acquire()
+        if worker is None:
+            return None
+        return self._frames(worker, op, html, kwargs)
 
-        display_name = f"{title} ({year})" if year else title
+    def _frames(self, worker, op, html, kwargs):
+        in_sync = False
+        try:
+            for kind, value in worker.request(op, html, kwargs):
+                in_sync = kind != "more"
+                yield kind, value
+        finally:
+            self._release(worker, in_sync)
 
-        results.append({
-            "name": display_name,
-            "url": normalize_rt_url(href),
-            "image": image,
-            "year": year
-        })
+    def close(self):
+        """Stop idle workers now; busy ones stop when they finish"""
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._count -= len(idle)
+            self._generation += 1
+            self._broken_until = 0.0
+        for worker in idle:
+            worker.close()
+            METRICS.add_gauge("ciefprt_parse_workers", -1)
+
+
+PARSE_POOL = ParsePool()
+
+
+class ParseActivity(object):
+    """Which kind of parsing ran since the last poll (for the jitter probe)"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._active = {"worker": 0, "thread": 0}
+        self._seen = set()
+
+    @contextlib.contextmanager
+    def running(self, mode):
+        with self._lock:
+            self._active[mode] += 1
+            self._seen.add(mode)
+        try:
+            yield
+        finally:
+            with self._lock:
+                self._active[mode] -= 1
+
+    def poll(self):
+        with self._lock:
+            seen = self._seen
+            self._seen = set(m for m, n in self._active.items() if n)
+        if "thread" in seen:
+            return "thread"
+        return "worker" if "worker" in seen else "idle"
+
+
+PARSE_ACTIVITY = ParseActivity()
+
+
+def _parse_chunks(op, html, local, kwargs):
+    """
+    Result chunks of rtparse op: the single result for plain ops, lists of
+    items for STREAM_OPS. Worker first; on failure the rest is parsed in
+    this thread (stream items already delivered are skipped).
+    """
+    stream = op in STREAM_OPS
+    done = 0
+    frames = PARSE_POOL.run(op, html, kwargs)
+    if frames is not None:
+        try:
+            with PARSE_ACTIVITY.running("worker"):
+                for kind, value in frames:
+                    if kind == "more":
+                        done += len(value)
+                        yield value
+                    elif kind == "ok":
+                        METRICS.inc("ciefprt_parse_total", op=op, mode="worker")
+                        if not stream:
+                            yield value
+                        return
+                    else:
+                        raise ParseWorkerError(value)
+        except ParseWorkerError as e:
+            dlog("PARSE: worker failed on '%s' (%s), parsing in thread" % (op, e), LOG_WARNING)
+            METRICS.inc("ciefprt_parse_total", op=op, mode="fallback")
+        finally:
+            frames.close()
+    else:
+        METRICS.inc("ciefprt_parse_total", op=op, mode="thread")
+
+    args = dict(kwargs)
+    args.update(local or {})
+    with PARSE_ACTIVITY.running("thread"):
+        result = PARSE_OPS[op](html, **args)
+        if not stream:
+            yield result
+            return
+        for i, item in enumerate(result):
+            if i >= done:
+                yield [item]
+
+
+def parse_html(op, html, local=None, **kwargs):
+    """
+    Run rtparse op (PARSE_OPS) on a page, in a parse worker process when
+    enabled, else in the calling thread. kwargs go to both; local only to
+    the in-thread call (shared caches the worker can't see).
+    """
+    with TRACER.span("parse." + op):
+        for result in _parse_chunks(op, html, local, kwargs):
+            return result
+
+
+def iter_parse_html(op, html, local=None, **kwargs):
+    """Like parse_html for STREAM_OPS: yields items as they are parsed"""
+    spent = 0.0
+    t = time.monotonic()
+    for chunk in _parse_chunks(op, html, local, kwargs):
+        spent += time.monotonic() - t
+        for item in chunk:
+            yield item
+        t = time.monotonic()
+    TRACER.record("parse." + op, spent + time.monotonic() - t)
+
+
+def clear_cache():
+    try:
+        for root, dirs, files in os.walk(CACHE_DIR, topdown=False):
+            for fn in files:
+                try:
+                    if not fn.startswith(os.path.basename(DEBUG_LOG)):
+                        os.remove(os.path.join(root, fn))
+                except:
+                    pass
+            for dn in dirs:
+                try:
+                    os.rmdir(os.path.join(root, dn))
+                except:
+                    pass
+    except:
+        pass
+    JSONLD_CACHE.clear()
+    SEARCH_CACHE.clear()
+    DETAIL_STORE.clear()
+    NOW_TV_FLIGHT.clear()
+    ensure_dirs()
+# ---------- Offline title index ----------
+# Sve liste (browse, editorial, pretraga) pune TITLE_INDEX; pretraga dok
+# se kuca i EPG ga pitaju prvi, puna pretraga kad mreza ne odgovori.
+TITLE_INDEX_SAVE_EVERY = 24 * 3600  # s - inace samo pri gasenju enigme
+TITLE_INDEX_REFRESH_AGE = 24 * 3600
+TITLE_INDEX_REFRESH_LISTS = 4       # listi osvjezenih po pokretanju
+
+TITLE_INDEX = TitleIndex(TITLE_INDEX_FILE)
+_title_index_started = threading.Event()
+
+
+def index_titles(items, source=None):
+    """Feed list entries to the offline title index; source = list URL to refresh later"""
+    if not items or not config.plugins.ciefprt.title_index.value:
+        return
+    try:
+        if TITLE_INDEX.add(items, source):
+            METRICS.set_gauge("ciefprt_title_index_titles", len(TITLE_INDEX))
+        if TITLE_INDEX.loaded and time.monotonic() - TITLE_INDEX.saved_at >= TITLE_INDEX_SAVE_EVERY:
+            save_title_index()
+    except Exception as e:
+        dlog("INDEX: add failed: %s" % e, LOG_WARNING)
+
+
+def save_title_index(wait=False):
+    """Write the index if it changed (after it was loaded); in a background thread unless wait"""
+    if not TITLE_INDEX.loaded or not TITLE_INDEX.dirty:
+        return
 
+    def _save():
+        try:
+            TITLE_INDEX.save()
+        except Exception as e:
+            dlog("INDEX: save failed: %s" % e, LOG_WARNING)
+
+    if wait:
+        _save()
+    else:
+        threading.Thread(target=_save, daemon=True).start()
+
+
+def title_index_path():
+    """Index file on the first mounted HDD/USB, the flash file otherwise"""
+    for d in TITLE_INDEX_DIRS:
+        if os.path.ismount(d) and os.access(d, os.W_OK):
+            return os.path.join(d, os.path.basename(TITLE_INDEX_FILE))
+    return TITLE_INDEX_FILE
+
+
+def index_search(query, limit=20, search_type=None):
+    """Offline title matches for query ([] while the index is off or still loading)"""
+    if not config.plugins.ciefprt.title_index.value or not TITLE_INDEX.loaded:
+        return []
+    with TRACER.span("index.search"):
+        results = TITLE_INDEX.search(query, limit, search_type)
+    METRICS.inc("ciefprt_cache_requests_total", cache="index", result="hit" if results else "miss")
     return results
 
-# ---------- Browse parser (JSON-LD ItemList) ----------
-def extract_jsonld_itemlist(html_text):
-    blocks = re.findall(
-        r'<script[^>]+type="application/ld\+json"[^>]*>(.*?)</script>',
-        html_text, flags=re.S | re.I
-    )
-    for b in blocks:
-        b = b.strip()
-        try:
-            data = json.loads(b)
-        except:
+
+def index_lookup(title, year=""):
+    """The one indexed title named exactly title (year picks among remakes), else None"""
+    if not config.plugins.ciefprt.title_index.value or not TITLE_INDEX.loaded:
+        return None
+    hit = TITLE_INDEX.lookup(title, year)
+    METRICS.inc("ciefprt_cache_requests_total", cache="index", result="hit" if hit else "miss")
+    return hit
+
+
+def start_title_index():
+    """Once per enigma2 run: load the saved index, then refresh the stalest source lists"""
+    if _title_index_started.is_set() or not config.plugins.ciefprt.title_index.value:
+        return
+    _title_index_started.set()
+    threading.Thread(target=_title_index_thread, daemon=True).start()
+
+
+def _title_index_thread():
+    t0 = time.monotonic()
+    path = title_index_path()
+    if path != TITLE_INDEX_FILE and os.path.exists(TITLE_INDEX_FILE) and not os.path.exists(path):
+        # stari indeks sa flasha ide na disk
+        try:
+            shutil.move(TITLE_INDEX_FILE, path)
+        except (OSError, shutil.Error) as e:
+            dlog("INDEX: move to %s failed: %s" % (path, e), LOG_WARNING)
+    TITLE_INDEX.path = path
+    n = TITLE_INDEX.load()
+    TRACER.sample("index.load", time.monotonic() - t0)
+    METRICS.set_gauge("ciefprt_title_index_titles", len(TITLE_INDEX))
+    dlog("INDEX: loaded %d titles in %d ms" % (n, (time.monotonic() - t0) * 1000))
+
+    for url in TITLE_INDEX.stale_sources(TITLE_INDEX_REFRESH_AGE, TITLE_INDEX_REFRESH_LISTS):
+        try:
+            # oba puta lista sama puni indeks (index_titles)
+            if "/browse/" in url:
+                BrowsePager(url).next_page()
+            else:
+                parse_browse(url)
+            dlog("INDEX: refreshed %s" % url, LOG_DEBUG)
+        except Exception as e:
+            dlog("INDEX: refresh of %s failed: %s" % (url, e), LOG_WARNING)
+
+
+# ---------- Search functions ----------
+SEARCH_CACHE_SIZE = 64     # zadnjih N upita u RAM-u
+SEARCH_CACHE_TTL = 600     # sekundi
+SEARCH_PREFIX_FEW = 5      # API odgovor sa manje rezultata je kompletan
+
+
+class SearchCache(object):
+    """
+    normalize_query(query) -> typed results (movies and TV together).
+    LRU with a TTL; failed lookups are never stored. An API answer with
+    fewer than SEARCH_PREFIX_FEW results is complete, so a longer query
+    that extends it is answered by filtering it locally. get() walks the
+    prefixes of the key longest first, one dict lookup per character.
+    """
+
+    def __init__(self, size=SEARCH_CACHE_SIZE, ttl=SEARCH_CACHE_TTL):
+        self.size = size
+        self.ttl = ttl
+        self._items = collections.OrderedDict()  # key -> (vrijeme, results, complete)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        now = time.monotonic()
+        base = None
+        with self._lock:
+            for end in range(len(key), 0, -1):
+                prefix = key[:end]
+                hit = self._items.get(prefix)
+                if hit is None:
+                    continue
+                if now - hit[0] >= self.ttl:
+                    del self._items[prefix]
+                    continue
+                if end == len(key) or hit[2]:
+                    self._items.move_to_end(prefix)
+                    base = hit[1]
+                    break
+        if base is None:
+            METRICS.inc("ciefprt_cache_requests_total", cache="search", result="miss")
+            return None
+        if end == len(key):
+            METRICS.inc("ciefprt_cache_requests_total", cache="search", result="hit")
+            return list(base)
+        METRICS.inc("ciefprt_cache_requests_total", cache="search", result="prefix")
+        return [r for r in base if query_matches(key, r["name"])]
+
+    def put(self, key, results, complete=False):
+        with self._lock:
+            self._items[key] = (time.monotonic(), list(results), complete)
+            self._items.move_to_end(key)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+SEARCH_CACHE = SearchCache()
+
+
+SEARCH_API_TIMEOUT = 10
+SEARCH_HEDGE_DEFAULT = 1.0  # s, dok nema dovoljno uzoraka
+SEARCH_HEDGE_MIN = 0.4
+SEARCH_HEDGE_MAX = 3.0
+SEARCH_HEDGE_SAMPLES = 5    # min uzoraka "search.api" za p90
+LIVE_SEARCH_BACKOFF = 10    # s bez API-ja za pretragu dok se kuca, nakon greske
+
+_live_search_down = 0.0     # monotonic vrijeme do kada live pretraga ceka
+
+
+def search_hedge_delay():
+    """How long the autocomplete API gets before the page scrape joins: its recent p90"""
+    p90 = TRACER.quantile("search.api", 0.90, SEARCH_HEDGE_SAMPLES)
+    if p90 is None:
+        return SEARCH_HEDGE_DEFAULT
+    return min(SEARCH_HEDGE_MAX, max(SEARCH_HEDGE_MIN, p90))
+
+
+def search_api(clean_query):
+    """All autocomplete results for an already cleaned query (raises on failure)"""
+    search_url = f"{BASE}/api/autocomplete?v=1&query={urllib.parse.quote(clean_query)}"
+    t0 = time.monotonic()
+    results = parse_autocomplete(get_json(search_url, timeout=SEARCH_API_TIMEOUT))
+    # samo uspjesni odgovori - timeout bi razvukao p90 i odgodio hedge
+    TRACER.record("search.api", time.monotonic() - t0)
+    return results
+
+
+def search_hedged(clean_query):
+    """
+    Race the autocomplete API against the search-page scrape. The scrape
+    starts when the API has not answered within search_hedge_delay() (or
+    at once if it fails). Any API answer wins, the scrape only with
+    results; the loser is cancelled - its result is dropped and a running
+    scrape stops reading the page. Returns (results, backend), backend
+    "none" if neither answered (errors only).
+    """
+    done = queue.Queue()
+    cancel = threading.Event()
+    action = TRACER.current()
+
+    def run(backend, fn, *args):
+        TRACER.bind(action)
+        try:
+            done.put((backend, fn(*args), None))
+        except Exception as e:
+            done.put((backend, None, e))
+
+    def start(backend, fn, *args):
+        threading.Thread(target=run, args=(backend, fn) + args, daemon=True).start()
+
+    hedged = False  # scrape pokrenut
+    answered = False
+
+    def hedge():
+        nonlocal hedged
+        hedged = True
+        pending.add("html")
+        start("html", search_rt_fallback, clean_query, None, cancel, True)
+
+    start("json", search_api, clean_query)
+    pending = {"json"}
+    hedge_at = time.monotonic() + search_hedge_delay()
+    while pending:
+        wait = None if hedged else max(0.0, hedge_at - time.monotonic())
+        try:
+            backend, results, err = done.get(timeout=wait)
+        except queue.Empty:
+            dlog("SEARCH: API slow, hedging with search page for '%s'" % clean_query, LOG_DEBUG)
+            hedge()
             continue
+        pending.discard(backend)
+
+        if backend == "json":
+            if err is None:
+                cancel.set()
+                DATA_SOURCES.count("search", "json")
+                METRICS.inc("ciefprt_search_hedge_total", result="json" if hedged else "not_needed")
+                return results, "json"
+            dlog(f"SEARCH API error: {err}")
+            DATA_SOURCES.count("search", "json", "error")
+            DATA_SOURCES.json_failed("search", err)
+            if not hedged:
+                hedge()
+        elif err is not None:
+            DATA_SOURCES.count("search", "html", "error")
+        else:
+            DATA_SOURCES.count("search", "html")
+            answered = True
+            if results:
+                cancel.set()
+                METRICS.inc("ciefprt_search_hedge_total", result="html")
+                return results, "html"
+            # prazan scrape - API (ako jos radi) ima zadnju rijec
 
-        candidates = data if isinstance(data, list) else [data]
-        for obj in candidates:
-            if isinstance(obj, dict) and obj.get("@type") == "ItemList":
-                ile = obj.get("itemListElement")
-                if isinstance(ile, dict) and "itemListElement" in ile:
-                    return ile.get("itemListElement", [])
-                if isinstance(ile, list):
-                    return ile
-    return []
+    METRICS.inc("ciefprt_search_hedge_total", result="none")
+    return [], "html" if answered else "none"
+
+
+class SearchUnavailable(Exception):
+    """No search backend answered: network down or every backend failed"""
+
+
+def search_all(query, fallback=True, strict=False):
+    """
+    Movie and TV results for query as typed BrowseItems (movies first):
+    one autocomplete request, hedged with the search-page scrape when the
+    API is slow or fails (search_hedged). Cached per normalised query.
+    fallback=False (search as you type) asks the API only, whatever the
+    data source setting, and returns None when it can't answer; after an
+    error it waits LIVE_SEARCH_BACKOFF seconds. strict=True raises
+    SearchUnavailable instead of returning [] when no backend answered,
+    so a failed lookup is not taken for "no such title".
+    """
+    global _live_search_down
+    key = normalize_query(query)
+    if not key:
+        return []
+    cached = SEARCH_CACHE.get(key)
+    if cached is not None:
+        return cached
+
+    # Očisti query prije slanja
+    clean_query = re.sub(r'[:;!?]', ' ', query)
+    clean_query = re.sub(r'\s+', ' ', clean_query).strip()
+
+    if not fallback:
+        if time.monotonic() < _live_search_down:
+            return None
+        try:
+            results, backend = search_api(clean_query), "json"
+            DATA_SOURCES.count("search", "json")
+        except Exception as e:
+            dlog(f"SEARCH API error: {e}")
+            DATA_SOURCES.count("search", "json", "error")
+            _live_search_down = time.monotonic() + LIVE_SEARCH_BACKOFF
+            return None
+    elif DATA_SOURCES.use_json("search"):
+        results, backend = search_hedged(clean_query)
+    else:
+        try:
+            results, backend = search_rt_fallback(clean_query, None, raise_errors=True), "html"
+            DATA_SOURCES.count("search", "html")
+        except Exception:
+            DATA_SOURCES.count("search", "html", "error")
+            results, backend = [], "none"
+    dlog(f"SEARCH: {backend} found {len(results)} results for '{clean_query}'", LOG_DEBUG)
+
+    # prazan odgovor API-ja je validan rezultat, prazan scrape nije
+    if results or backend == "json":
+        SEARCH_CACHE.put(key, results, complete=backend == "json" and len(results) < SEARCH_PREFIX_FEW)
+        index_titles(results)
+    elif fallback:
+        # mreza nije dala nista - offline indeks
+        results = index_search(clean_query)
+        if results:
+            dlog(f"SEARCH: offline index found {len(results)} results for '{clean_query}'")
+    if strict and not results and backend == "none":
+        raise SearchUnavailable(clean_query)
+    return results
+
+
+def search_rt(query, search_type="movie"):
+    """search_all() results of one type ("movie" / "tv"), at most max_items"""
+    limit = int(config.plugins.ciefprt.max_items.value)
+    return [r for r in search_all(query) if r["type"] == search_type][:limit]
+
+
+def probe_url(url, timeout=5):
+    """HEAD request, True if the page exists (200)"""
+    try:
+        req = urllib.request.Request(url)
+        req.add_header("User-Agent", "Mozilla/5.0")
+        req.get_method = lambda: 'HEAD'
+        METRICS.inc("ciefprt_http_requests_total", endpoint=endpoint_of(url))
+        with urllib.request.urlopen(req, context=ssl_ctx(), timeout=timeout) as r:
+            return r.getcode() == 200
+    except:
+        return False
+
+
+def probe_first(urls, timeout=5, cancel=None):
+    """
+    HEAD all urls at once; returns the first url in list order that exists
+    (waits only for the urls before it), None if none does or on cancel.
+    """
+    done = queue.Queue()
+    for i, url in enumerate(urls):
+        threading.Thread(target=lambda i=i, url=url: done.put((i, probe_url(url, timeout))), daemon=True).start()
+
+    found = [None] * len(urls)
+    for _ in urls:
+        i, ok = done.get()
+        found[i] = ok
+        if cancel is not None and cancel.is_set():
+            return None
+        for url, ok in zip(urls, found):
+            if ok is None:
+                break
+            if ok:
+                return url
+    return None
+
+
+def search_rt_fallback(query, search_type="movie", cancel=None, raise_errors=False):
+    """
+    Fallback search using RT search page - parses Shadow DOM content.
+    search_type None returns movies and TV together. Setting cancel
+    (threading.Event) stops the page download and the URL probes.
+    Errors give [] unless raise_errors.
+    """
+    try:
+        # Očisti query - pretvori & u and
+        clean_query = re.sub(r'[&]', 'and', query)
+        clean_query = re.sub(r'[:;!?]', ' ', clean_query)
+        clean_query = re.sub(r'\s+', ' ', clean_query).strip()
+
+        search_url = f"{BASE}/search?search={urllib.parse.quote(clean_query)}"
+        dlog(f"SEARCH: Fallback URL: {search_url}")
+
+        if cancel is None:
+            raw = http_get(search_url, timeout=10)
+        else:
+            raw, _ = http_get_stream(search_url, done=lambda chunk: cancel.is_set(), timeout=10)
+            if cancel.is_set():
+                return []
+        html = raw.decode("utf-8", "ignore")
+
+        # --- METODA 1+2: search-page-media-row / search-results-item, pa JSON-LD ---
+        results = list(iter_parse_html("search", html, search_type=search_type))
+        for r in results:
+            dlog(f"SEARCH: Found: {r['name']} -> {r['url']}", LOG_DEBUG)
+
+        # --- METODA 3: Konačni fallback - direktno iz URL-a (samo /m/) ---
+        if not results and search_type in (None, "movie"):
+            dlog("SEARCH: Trying direct URL construction...")
+            # Pokušaj s različitim formatima URL-a
+            possible_slugs = [
+                clean_query.lower().replace(' ', '_'),
+                clean_query.lower().replace(' ', '-'),
+                clean_query.lower().replace(' ', ''),
+            ]
+            # Dodaj i specifične varijante za Mr. & Mrs. Smith
+            if "mr" in clean_query.lower() and "mrs" in clean_query.lower():
+                possible_slugs.extend([
+                    "mr_and_mrs_smith",
+                    "mr_and_mrs_smith_2005",
+                    "mr_and_mrs_smith_2024",
+                    "1014325-mr_and_mrs_smith"
+                ])
+
+            # svi HEAD probe-ovi paralelno, prednost po redoslijedu liste
+            test_url = probe_first([f"{BASE}/m/{slug}" for slug in possible_slugs], timeout=5, cancel=cancel)
+            if test_url:
+                results.append(BrowseItem(clean_query, test_url, type="movie"))
+                dlog(f"SEARCH: Found via direct URL: {test_url}")
+
+        dlog(f"SEARCH: Fallback found {len(results)} results")
+        return results[:20]
+
+    except Exception as e:
+        dlog(f"SEARCH fallback error: {e}")
+        import traceback
+        dlog(traceback.format_exc())
+        if raise_errors:
+            raise
+        return []
+
+
+def parse_browse_api_page(browse_url, page=1, limit=BROWSE_PAGE_SIZE, skip=0):
+    """
+    Load more za BASE /browse/... preko HTML ?page=N.
+    RT često vraća kumulativnu listu (page=2 ima i page=1 + još),
+    zato ovde vraćamo SVE stavke sa te stranice, osim prvih skip.
+    """
+    try:
+        paged_url = browse_page_url(browse_url, page)
+        dlog("LOAD MORE URL: %s" % paged_url)
+
+        return parse_browse(paged_url, skip=skip) or []
+    except Exception as e:
+        dlog(f"BROWSE HTML page error: {e}")
+        return []
+
+# ---------- Browse parser (JSON-LD ItemList) ----------
+def extract_jsonld_itemlist(html_text, url=None):
+    return itemlist_entries(jsonld_doc(html_text, url))
+
+
+def iter_editorial_guide(url, limit=0):
+    raw = get_cached_page(url) or http_get(url)
+    set_cached_page(url, raw)
+    html = raw.decode("utf-8", "ignore")
+
+    items = []
+    try:
+        # limit ide workeru: prekinut stream bi ubio worker proces
+        for item in iter_parse_html("editorial", html, limit=limit):
+            items.append(item)
+            yield item
+        dlog(f"EDITORIAL: Found {len(items)} items from {url}")
+    finally:
+        # i kad pozivalac prekine listu (limit), indeksiraj procitano
+        index_titles(items, url)
 
 
 def parse_editorial_guide(url):
+    return list(iter_editorial_guide(url))
+
+def parse_browse(url, skip=0):
+    dlog(f"BROWSE: Parsing URL: {url}")
+
+    # --- EDITORIAL fallback ---
+    if "editorial.rottentomatoes.com" in (url or ""):
+        dlog("BROWSE: Using editorial parser")
+        return parse_editorial_guide(url)[skip:]
+
     raw = get_cached_page(url) or http_get(url)
     set_cached_page(url, raw)
     html = raw.decode("utf-8", "ignore")
 
+    with TRACER.span("parse.browse"):
+        # stavke do skip su vec prikazane (kumulativna lista)
+        out = itemlist_browse_items(extract_jsonld_itemlist(html, url)[skip:])
+
+    index_titles(out, url if skip == 0 and "page=" not in url else None)
+    return out
+
+
+# ---------- Data sources ----------
+# JSON backend: RT-ovi strukturirani endpointi (autocomplete, /napi/browse,
+# media JSON), par KB umjesto cijele HTML stranice. HTML backend: stranice
+# + parseri. U "auto" modu JSON ide prvi, a HTML je fallback; vrsta
+# zahtjeva ciji JSON endpoint ne radi ide DATA_SOURCE_RETRY sekundi
+# direktno na HTML (bez duplog zahtjeva po naslovu). Pretraga je hedgovana
+# scrapeom, pa se gasi tek nakon vise uzastopnih gresaka i kratko.
+DATA_SOURCE_RETRY = 1800
+DATA_SOURCE_FAILS = {"search": 3}     # uzastopnih gresaka do gasenja (inace 1)
+DATA_SOURCE_BACKOFF = {"search": 120}  # s, umjesto DATA_SOURCE_RETRY
+
+
+class DataSources(object):
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._json_down = {}  # kind -> monotonic vrijeme do kada
+        self._fails = {}      # kind -> uzastopne greske JSON backenda
+
+    def use_json(self, kind):
+        # autocomplete pretraga je provjeren endpoint: data_source ("html")
+        # iskljucuje samo media/browse JSON, pretragu gasi samo backoff
+        if kind != "search" and config.plugins.ciefprt.data_source.value == "html":
+            return False
+        with self._lock:
+            return time.monotonic() >= self._json_down.get(kind, 0.0)
+
+    def json_failed(self, kind, err):
+        with self._lock:
+            fails = self._fails.get(kind, 0) + 1
+            if fails < DATA_SOURCE_FAILS.get(kind, 1):
+                self._fails[kind] = fails
+                return
+            self._fails[kind] = 0
+            retry = DATA_SOURCE_BACKOFF.get(kind, DATA_SOURCE_RETRY)
+            self._json_down[kind] = time.monotonic() + retry
+        dlog("DATA: %s JSON backend failed (%s), using HTML for %d s" % (kind, err, retry), LOG_WARNING)
+
+    def count(self, kind, backend, result="ok"):
+        METRICS.inc("ciefprt_data_requests_total", kind=kind, backend=backend, result=result)
+        if backend == "json" and result == "ok":
+            with self._lock:
+                self._fails.pop(kind, None)
+
+    def reset(self):
+        with self._lock:
+            self._json_down.clear()
+            self._fails.clear()
+
+
+DATA_SOURCES = DataSources()
+
+
+def get_json(url, timeout=8, ttl=0):
+    """GET + json.loads; ttl > 0 goes through the page cache"""
+    raw = (get_cached_page(url, ttl=ttl) if ttl else None) or http_get(url, timeout=timeout)
+    data = json.loads(raw.decode("utf-8", "ignore"))
+    if ttl:
+        set_cached_page(url, raw)
+    return data
+
+
+# ---------- Browse paging ----------
+class BrowsePager(object):
+    """
+    Incremental "Load more" for a BASE/browse/... list. next_page() returns
+    only entries not returned before. Pages come from the cursor endpoint
+    (/napi/browse/...?after=, JSON backend) and, if that is off or fails,
+    from the cumulative HTML ?page=N with the already known entries
+    skipped. prefetch() loads the next page in the background so Load more
+    can return it right away.
+    """
+
+    def __init__(self, url):
+        self.url = url
+        self.source = "json" if browse_napi_url(url) and DATA_SOURCES.use_json("browse") else "html"
+        self.has_more = True
+        self.pages = 0
+        self._cursor = ""
+        self._known = 0          # broj stavki vec dobijenih (za HTML skip)
+        self._seen = set()
+        self._lock = threading.Lock()
+        self._ready = None       # prefetchovana strana
+        self._prefetching = False
+
+    def _fetch_json(self):
+        # kroz kes stranica: "cli warm" puni iste fajlove
+        data = get_json(browse_napi_url(self.url, self._cursor), ttl=LIST_TTL)
+        with TRACER.span("parse.browse_napi"):
+            items, cursor, has_next = parse_browse_napi(data)
+        index_titles(items, None if self._cursor else self.url)
+        self._cursor = cursor
+        self.has_more = has_next
+        return items
+
+    def _fetch_html(self):
+        items = parse_browse_api_page(self.url, page=self.pages + 1, limit=None, skip=self._known)
+        self.has_more = bool(items)
+        return items
+
+    def _fetch(self):
+        items = None
+        if self.source == "json":
+            try:
+                items = self._fetch_json()
+                DATA_SOURCES.count("browse", "json")
+            except Exception as e:
+                DATA_SOURCES.count("browse", "json", "error")
+                DATA_SOURCES.json_failed("browse", e)
+                self.source = "html"
+        if items is None:
+            items = self._fetch_html()
+            DATA_SOURCES.count("browse", "html")
+        self.pages += 1
+        self._known += len(items)
+
+        out = []
+        for it in items:
+            u = it.get("url")
+            if u and u not in self._seen:
+                self._seen.add(u)
+                out.append(it)
+        if not out:
+            self.has_more = False
+        return out
+
+    def next_page(self):
+        """Blocking; takes the prefetched page if there is one (or waits for it)"""
+        with self._lock:
+            items, self._ready = self._ready, None
+            hit = items is not None
+            if not hit:
+                if not self.has_more:
+                    return []
+                items = self._fetch()
+            METRICS.inc("ciefprt_browse_pages_total", backend=self.source, prefetch="hit" if hit else "miss")
+            return items
+
+    def prefetch(self):
+        """Start loading the next page in a background thread (once)"""
+        with self._lock:
+            if self._prefetching or self._ready is not None or not self.has_more:
+                return
+            self._prefetching = True
+
+        def run():
+            with self._lock:
+                try:
+                    self._ready = self._fetch()
+                except Exception as e:
+                    dlog("BROWSE: prefetch failed: %s" % e, LOG_WARNING)
+                finally:
+                    self._prefetching = False
+
+        threading.Thread(target=run, daemon=True).start()
+
+
+def fetch_detail_page(detail_url):
+    """
+    (bytes, complete) of a detail page. With stream_detail on, the download
+    stops as soon as everything parse_detail reads has arrived
+    (DetailStreamScanner); complete is then False and the body must not go
+    to the page cache, which other readers (trailer lookup) expect whole.
+    """
+    if not config.plugins.ciefprt.stream_detail.value:
+        return http_get(detail_url, timeout=8), True
+    scanner = DetailStreamScanner()
+    return http_get_stream(detail_url, scanner.feed, timeout=8)
+
+
+DETAIL_STORE_SIZE = 300
+DETAIL_STORE_TTL = 6 * 3600
+
+
+class DetailStore(object):
+    """
+    url -> DetailInfo in RAM (LRU + TTL). Titles warmed in the background
+    (EPG resolver, zap prefetch) and titles opened before show their
+    scores without a request.
+    """
+
+    def __init__(self, size=DETAIL_STORE_SIZE, ttl=DETAIL_STORE_TTL):
+        self.size = size
+        self.ttl = ttl
+        self._items = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, url):
+        with self._lock:
+            hit = self._items.get(url)
+            if hit and time.monotonic() - hit[0] < self.ttl:
+                self._items.move_to_end(url)
+            else:
+                hit = None
+        METRICS.inc("ciefprt_cache_requests_total", cache="detail", result="hit" if hit else "miss")
+        return hit[1] if hit else None
+
+    def fresh(self, url):
+        """True if url is stored and not expired (no metrics)"""
+        with self._lock:
+            hit = self._items.get(url)
+            return bool(hit) and time.monotonic() - hit[0] < self.ttl
+
+    def put(self, url, info):
+        with self._lock:
+            self._items[url] = (time.monotonic(), info)
+            self._items.move_to_end(url)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+
+
+DETAIL_STORE = DetailStore()
+
+
+def load_detail(detail_url, trailer=True):
+    """
+    DetailInfo for a /m/ or /tv/ url: from DETAIL_STORE, else the media
+    JSON when the JSON backend is on and answering (the HTML page is read
+    too only if the reply lacks a field the detail screen shows; the
+    backdrop is then fetched on demand, see page_backdrop), the HTML page
+    otherwise; then (trailer=True) the trailer fallbacks.
+    """
+    info = DETAIL_STORE.get(detail_url)
+    if info is not None:
+        return complete_trailer(info, detail_url) if trailer else info
+    json_url = media_json_url(detail_url)
+    if json_url and DATA_SOURCES.use_json("detail"):
+        try:
+            data = get_json(json_url, ttl=DETAIL_TTL)
+            with TRACER.span("parse.detail_json"):
+                info = parse_media_json(data)
+            DATA_SOURCES.count("detail", "json")
+        except Exception as e:
+            DATA_SOURCES.count("detail", "json", "error")
+            DATA_SOURCES.json_failed("detail", e)
+
+    if info is None:
+        info = _detail_from_page(detail_url)
+    elif detail_needs_page(info):
+        # media JSON bez nekog od polja ekrana: dopuni prazna polja sa stranice
+        try:
+            fill_detail(info, _detail_from_page(detail_url))
+        except Exception as e:
+            dlog("DETAIL: page fill failed for %s: %s" % (detail_url, e), LOG_WARNING)
+
+    DETAIL_STORE.put(detail_url, info)
+    return complete_trailer(info, detail_url) if trailer else info
+
+
+def page_backdrop(detail_url, info):
+    """
+    Backdrop of a detail read from the media JSON (which has none): filled
+    into info from the HTML page on the first request; "" if the page has
+    none either.
+    """
+    if not info.get("backdrop_url"):
+        fill_detail(info, _detail_from_page(detail_url))
+    return info.get("backdrop_url") or ""
+
+
+def _detail_from_page(detail_url):
+    raw = get_cached_page(detail_url, ttl=DETAIL_TTL)
+    if raw is None:
+        raw, complete = fetch_detail_page(detail_url)
+        # skraceno tijelo (stream_detail) ne ide u kes
+        if complete:
+            set_cached_page(detail_url, raw)
+    info = parse_detail(raw.decode("utf-8", "ignore"), detail_url, trailer=False)
+    DATA_SOURCES.count("detail", "html")
+    return info
+
+
+def parse_detail(html, detail_url=None, trailer=True):
+    # parsiranje stranice (worker proces ili ovaj thread), bez mreze
+    info = parse_html("detail", html, local={"jsonld": lambda blocks: jsonld_doc(html, detail_url, blocks)})
+    return complete_trailer(info, detail_url) if trailer else info
+
+
+def complete_trailer(info, detail_url=None):
+    """YouTube / RT video API trailer when the page itself had none"""
+    title, year = info.page_title, info.page_year
+
+    # 4. YouTube trailer
+    if not info["trailer_url"] and config.plugins.ciefprt.youtube_search.value:
+        dlog("TRAILER: No trailer found, searching YouTube...")
+        try:
+            if title:
+                dlog(f"TRAILER: Searching YouTube for '{title}' ({year})...")
+                with TRACER.span("trailer.youtube"):
+                    youtube_url = search_youtube_trailer(title, year)
+                if youtube_url:
+                    info["trailer_url"] = youtube_url
+                    info["trailer_type"] = "youtube"
+                    dlog(f"TRAILER: Found on YouTube: {youtube_url}")
+                else:
+                    dlog("TRAILER: No YouTube trailer found")
+            else:
+                dlog("TRAILER: Could not extract title for YouTube search")
+        except Exception as e:
+            dlog(f"TRAILER YouTube search error: {e}")
+
+    # 5. API fallback (samo ako imamo detail_url)
+    if not info["trailer_url"] and detail_url:
+        dlog("TRAILER: No trailer found in HTML, trying API...")
+        try:
+            with TRACER.span("trailer.api"):
+                trailer_url = fetch_trailer_url(detail_url)
+            if trailer_url:
+                info["trailer_url"] = trailer_url
+                info["trailer_type"] = "hls"
+                dlog(f"TRAILER: Found via API: {trailer_url}")
+        except Exception as e:
+            dlog(f"TRAILER API error: {e}")
+
+    return info
+
+# ---------- EPG functions ----------
+def split_epg_name(event_name):
+    """EPG event name -> (title without "(year)" / " - episode", year or "")"""
+    year = re.search(r'\((\d{4})\)', event_name or "")
+    clean_title = re.sub(r'\s*\(\d{4}\)', '', event_name or "")
+    clean_title = re.sub(r'\s+-\s*.*$', '', clean_title)  # "Spider-Man" ostaje
+    return clean_title.strip(), year.group(1) if year else ""
+
+
+def get_current_epg_info(session):
+    """Get current EPG information for the playing channel"""
+    try:
+        from ServiceReference import ServiceReference
+        from enigma import eEPGCache
+
+        current_service = session.nav.getCurrentlyPlayingServiceReference()
+        if not current_service:
+            dlog("EPG: No current service")
+            return None
+
+        service_ref = ServiceReference(current_service)
+        service_name = service_ref.getServiceName()
+        dlog(f"EPG: Service name: {service_name}")
+
+        epgcache = eEPGCache.getInstance()
+        if not epgcache:
+            dlog("EPG: No EPG cache available")
+            return {"title": service_name, "channel": service_name}
+
+        try:
+            events = epgcache.lookupEvent(["IBDCT", (current_service.toString(), 0, -1, -1)])
+            dlog(f"EPG: Events found: {len(events) if events else 0}")
+        except Exception as e:
+            dlog(f"EPG: lookupEvent error: {e}")
+            events = []
+
+        if events:
+            for event in events:
+                try:
+                    # Podrška za evente sa 5 ili 6 elemenata
+                    if len(event) < 5:
+                        dlog(f"EPG: Event too short: {len(event)} elements")
+                        continue
+
+                    # event[4] je uvijek title (u većini Enigma2 verzija)
+                    event_name = event[4] if len(event) > 4 else ""
+                    event_desc = event[5] if len(event) > 5 else ""
+
+                    if event_name:
+                        clean_title, year = split_epg_name(event_name)
+
+                        # Preskoči ako je title prazan ili samo naziv kanala
+                        if clean_title and clean_title != service_name:
+                            dlog(f"EPG: Found event: {clean_title}")
+                            return {
+                                "title": clean_title,
+                                "year": year,
+                                "original_title": event_name,
+                                "description": event_desc or "",
+                                "channel": service_name
+                            }
+                except Exception as e:
+                    dlog(f"EPG: Event parsing error: {e}")
+                    continue
+
+        # Fallback - koristi samo naziv kanala
+        dlog("EPG: Using fallback - service name only")
+        return {"title": service_name, "channel": service_name}
+
+    except Exception as e:
+        dlog(f"EPG error: {e}")
+        return None
+
+
+def epg_info_for_event(session, **kwargs):
+    """
+    EPG dict for the event an EVENTINFO hook was called with (EPG list:
+    event / selectedevent=[event, service] / eventName, depending on the
+    image), else the programme now playing.
+    """
+    try:
+        event = kwargs.get("event")
+        selected = kwargs.get("selectedevent")
+        if event is None and selected:
+            event = selected[0]
+        name = kwargs.get("eventName") or (event.getEventName() if event else "")
+        if name:
+            title, year = split_epg_name(name)
+            channel = ""
+            service = kwargs.get("service") or (selected[1] if selected and len(selected) > 1 else None)
+            if service is not None and hasattr(service, "getServiceName"):
+                channel = service.getServiceName()
+            if title:
+                return {"title": title, "year": year, "original_title": name, "channel": channel}
+    except Exception as e:
+        dlog(f"EPG: event from hook: {e}")
+    return get_current_epg_info(session)
+
+
+def clean_epg_title(title):
+    """EPG event name -> search query (no punctuation RT search trips on, no "(year)")"""
+    clean = re.sub(r'[:;!?]', ' ', title or "")
+    clean = re.sub(r'\s*\(\d{4}\)\s*$', '', clean)
+    return re.sub(r'\s+', ' ', clean).strip()
+
+
+# ---------- EPG title map ----------
+# Zapamceni EPG naslov -> RT naslov (sa pouzdanoscu i rucnim pinovima),
+# da se ponovljeni program otvori bez ijednog zahtjeva za pretragu.
+EPG_MAP = EpgTitleMap(EPG_MAP_FILE)
+
+
+def save_epg_map():
+    if not EPG_MAP.dirty:
+        return
+
+    def _save():
+        try:
+            EPG_MAP.save()
+        except Exception as e:
+            dlog("EPG MAP: save failed: %s" % e, LOG_WARNING)
+
+    threading.Thread(target=_save, daemon=True).start()
+
+
+def resolve_epg_title(title, year="", channel="", network=True, save=True, strict=False):
+    """
+    RT entry for an EPG event: (item, confidence, source), source being
+    "map" (remembered or pinned), "index" (offline title index) or
+    "search"; (None, 0.0, "none") if nothing matched. Automatic matches
+    are remembered in EPG_MAP (written now unless save=False). network=False
+    returns only what is trusted without a search (no request at all);
+    strict=True raises SearchUnavailable when the search could not run.
+    """
+    hit = EPG_MAP.resolve(title, year, channel)
+    if hit and (hit[2] or hit[1] >= EPG_TRUST):
+        METRICS.inc("ciefprt_epg_resolve_total", source="map")
+        return hit[0], hit[1], "map"
+
+    clean = clean_epg_title(title)
+    item, conf, source = None, 0.0, "none"
+    found = index_lookup(clean, year)
+    if found:
+        item, conf = best_title_match(clean, year, [found])
+        source = "index"
+    if network and conf < EPG_TRUST:
+        hit, hit_conf = best_title_match(clean, year, search_all(clean, strict=strict))
+        if item is not None and hit is not None and hit.get("url") == item.get("url"):
+            # indeks i pretraga se slazu - jedini put do vece sigurnosti
+            conf = min(0.99, max(conf, hit_conf) + EPG_AGREE_BONUS)
+        elif hit is not None and hit_conf > conf:
+            item, conf, source = hit, hit_conf, "search"
+
+    METRICS.inc("ciefprt_epg_resolve_total", source=source)
+    if item is None:
+        return None, 0.0, "none"
+    conf = EPG_MAP.learn(title, item, conf, year)
+    if save:
+        save_epg_map()
+    if not network and conf < EPG_TRUST:
+        return None, 0.0, "none"
+    dlog("EPG MAP: '%s' -> %s (%s, %.2f)" % (title, item.get("url"), source, conf), LOG_DEBUG)
+    return item, conf, source
+
+
+# ---------- EPG bulk resolver ----------
+# U pozadini: EPG omiljenih buketa za sljedecih N sati -> naslovi filmova i
+# serija -> EPG_MAP + DETAIL_STORE, pa se plugin na tim emisijama otvara
+# bez cekanja. EPG se cita u main loopu u malim komadima (enigma API nije
+# za threadove), mreza ide u jednom threadu sa pauzama.
+FAV_BOUQUETS_REF = '1:7:1:0:0:0:0:0:0:0:FROM BOUQUET "bouquets.tv" ORDER BY bouquet'
+EPG_BULK_START_DELAY = 120       # s nakon starta enigme
+EPG_BULK_INTERVAL = 6 * 3600     # s izmedju prolaza
+EPG_BULK_SLICE = 15              # servisa po tick-u main loopa
+EPG_BULK_BATCH = 8               # naslova po turi
+EPG_BULK_GAP = 2.0               # s izmedju zahtjeva
+EPG_BULK_PAUSE = 30.0            # s izmedju tura
+EPG_BULK_MAX_TITLES = 300        # naslova po prolazu
+EPG_BULK_MIN_MINUTES = 20        # kraci dogadjaji nisu film ni serija
+# zanr rijec kao cijeli naslov ili prefiks ("News", "Sport: ...", "Dnevnik 2");
+# "Live and Let Die", "Talk to Her", "News of the World" prolaze
+EPG_BULK_SKIP_RE = re.compile(
+    r"\W*(?:news|vijesti|vesti|dnevnik|sport|weather|vrijeme|prognoza|teleshop|shop|live|uzivo|uživo|"
+    r"quiz|kviz|talk|magazin|magazine|info|journal|nachrichten|tagesschau|wetter)"
+    r"\s*(?:$|[:|/,(\-\u2013]|\d)", re.I)
+# DVB content nibble (level 1): 0x2 vijesti, 0x3 show / kviz, 0x4 sport
+EPG_BULK_SKIP_GENRES = (0x2, 0x3, 0x4)
+
+
+def tv_bouquets():
+    """(bouquet ref, name) of the TV bouquets (main thread)"""
+    from enigma import eServiceCenter, eServiceReference
+    bouquets = eServiceCenter.getInstance().list(eServiceReference(FAV_BOUQUETS_REF))
+    return (bouquets.getContent("SN", True) if bouquets else None) or []
+
+
+def bouquet_services(bref, seen=None):
+    """(service ref, name) of one bouquet's channels, markers (and refs in seen) skipped (main thread)"""
+    from enigma import eServiceCenter, eServiceReference
+    services = eServiceCenter.getInstance().list(eServiceReference(bref))
     out = []
-    seen_urls = set()
-
-    # --- Pronađi sve block-countdown divove ---
-    # Ovo je glavni kontejner za svaku stavku na editorial stranicama
-    block_re = re.compile(
-        r'<div[^>]+id="countdown-index-\d+"[^>]+class="[^"]*block-countdown[^"]*"[^>]*>(.*?)</div>\s*(?:<br>|</div>|$)',
-        re.I | re.S
-    )
-
-    for block_match in block_re.finditer(html):
-        block = block_match.group(1)
-
-        # --- Izdvoji link (href) ---
-        href_match = re.search(
-            r'<a[^>]+class="[^"]*poster-wrapper[^"]*"[^>]+href="([^"]+)"',
-            block, re.I
-        )
-        if not href_match:
-            continue
-        href = (href_match.group(1) or "").strip()
-        if not href:
+    for ref, name in (services.getContent("SN", True) if services else None) or []:
+        try:
+            if int(ref.split(":")[1]) & 0x40:  # marker
+                continue
+        except (IndexError, ValueError):
             continue
+        if seen is not None:
+            if ref in seen:
+                continue
+            seen.add(ref)
+        out.append((ref, name))
+    return out
+
+
+def favourite_services():
+    """(service ref, name) of every channel in the TV bouquets, markers and duplicates skipped (main thread)"""
+    seen = set()
+    out = []
+    for bref, bname in tv_bouquets():
+        out += bouquet_services(bref, seen)
+    return out
+
+
+def epg_genre_level(content):
+    """
+    DVB content nibble level 1 (0x1 film/drama .. 0xB) of an event, 0 if
+    unknown. content: lookupEvent's "W" field or getGenreDataList(), a
+    list of (level1, level2, ...) or of level1 << 4 | level2 per image.
+    """
+    try:
+        v = content[0]
+        v = int(v[0] if isinstance(v, (tuple, list)) else v)
+    except (IndexError, TypeError, ValueError):
+        return 0
+    return v >> 4 if v > 0xF else v
+
+
+def epg_skip_title(title, genre=0):
+    """News / sport / show event: by DVB genre when the EPG has one, else by title"""
+    if genre:
+        return genre in EPG_BULK_SKIP_GENRES
+    return EPG_BULK_SKIP_RE.match(title) is not None
+
+
+def epg_title_candidate(title, minutes, genre=0):
+    """EPG event that may be a film or series (long enough, not news/sport/shopping)"""
+    return minutes >= EPG_BULK_MIN_MINUTES and len(title) > 1 and not epg_skip_title(title, genre)
+
+
+def playing_event_genre(session):
+    """DVB genre level 1 of the event now playing, 0 if the image or EPG has none"""
+    try:
+        event = session.nav.getCurrentService().info().getEvent(0)
+        return epg_genre_level(event.getGenreDataList()) if event else 0
+    except Exception:
+        return 0
+
+
+class EpgBulkResolver(object):
+    """
+    Periodic pass over the favourite bouquets' EPG. Events are read on the
+    main loop EPG_BULK_SLICE channels per tick; the collected titles are
+    resolved (resolve_epg_title) and their details warmed (DETAIL_STORE)
+    in one background thread, EPG_BULK_BATCH titles per round with
+    EPG_BULK_GAP between requests and EPG_BULK_PAUSE between rounds.
+    """
+
+    def __init__(self):
+        self._timer = eTimer()
+        self._timer.callback.append(self._tick)
+        self._dispatcher = UIDispatcher()
+        self._services = None
+        self._titles = {}
+        self._fields = "TDW"  # naslov, trajanje, DVB zanr
+        self._running = False
+        self.last_run = None  # (vrijeme, naslova, razrijeseno)
+
+    def start(self, delay=EPG_BULK_START_DELAY):
+        if not self._running:
+            self._timer.start(int(delay * 1000), True)
+
+    def stop(self):
+        self._timer.stop()
+        self._services = None
+
+    def status(self):
+        if self._running:
+            return "running"
+        if not self.last_run:
+            return "not run yet"
+        t, n, ok = self.last_run
+        return "%s, %d/%d titles" % (time.strftime("%H:%M", time.localtime(t)), ok, n)
+
+    def _tick(self):
+        if not config.plugins.ciefprt.epg_bulk.value:
+            self.stop()
+            return
+        try:
+            if self._services is None:
+                self._running = True
+                self._services = favourite_services()
+                self._titles = {}
+                dlog("EPG BULK: %d channels" % len(self._services))
+            self._collect(self._services[:EPG_BULK_SLICE])
+            del self._services[:EPG_BULK_SLICE]
+        except Exception as e:
+            dlog("EPG BULK: EPG read failed: %s" % e, LOG_WARNING)
+            self._services = []
+
+        if self._services and len(self._titles) < EPG_BULK_MAX_TITLES:
+            self._timer.start(50, True)
+            return
+        self._services = None
+        titles = list(self._titles.values())[:EPG_BULK_MAX_TITLES]
+        threading.Thread(target=self._resolve, args=(titles,), daemon=True).start()
+
+    def _collect(self, services):
+        from enigma import eEPGCache
+        epgcache = eEPGCache.getInstance()
+        minutes = int(config.plugins.ciefprt.epg_bulk_hours.value) * 60
+        for ref, channel in services:
+            try:
+                events = epgcache.lookupEvent([self._fields, (ref, 0, -1, minutes)]) or []
+            except Exception:
+                if self._fields == "TD":
+                    continue
+                # image bez "W" (zanr) polja: samo naslov i trajanje
+                self._fields = "TD"
+                try:
+                    events = epgcache.lookupEvent(["TD", (ref, 0, -1, minutes)]) or []
+                except Exception:
+                    continue
+            for ev in events:
+                title, duration = ev[0], ev[1]
+                genre = epg_genre_level(ev[2]) if len(ev) > 2 else 0
+                if not title or not epg_title_candidate(title, (duration or 0) // 60, genre):
+                    continue
+                name, year = split_epg_name(title)
+                key = normalize_query(clean_epg_title(name))
+                if key and key not in self._titles:
+                    self._titles[key] = (name, year, channel)
+
+    def _resolve(self, titles):
+        ok = 0
+        try:
+            dlog("EPG BULK: resolving %d titles" % len(titles))
+            for i, (title, year, channel) in enumerate(titles):
+                if not config.plugins.ciefprt.epg_bulk.value:
+                    break
+                if i and i % EPG_BULK_BATCH == 0:
+                    time.sleep(EPG_BULK_PAUSE)
+                requests = 0
+                item, conf, source = resolve_epg_title(title, year, channel, network=False, save=False)
+                if item is None:
+                    item, conf, source = resolve_epg_title(title, year, channel, save=False)
+                    requests += 1
+                if item is None or conf < EPG_TRUST:
+                    METRICS.inc("ciefprt_epg_bulk_titles_total", result="unresolved")
+                else:
+                    ok += 1
+                    METRICS.inc("ciefprt_epg_bulk_titles_total", result="resolved")
+                    if not DETAIL_STORE.fresh(item["url"]):
+                        try:
+                            load_detail(item["url"], trailer=False)
+                        except Exception as e:
+                            dlog("EPG BULK: detail %s failed: %s" % (item["url"], e), LOG_DEBUG)
+                        requests += 1
+                if requests:
+                    time.sleep(EPG_BULK_GAP * requests)
+        except Exception:
+            dlog("EPG BULK: %s" % traceback.format_exc(), LOG_WARNING)
+        finally:
+            self.last_run = (time.time(), len(titles), ok)
+            dlog("EPG BULK: done, %d of %d titles resolved" % (ok, len(titles)))
+            save_epg_map()
+            self._dispatcher.post(self._finished)
 
-        # --- Izdvoji sliku ---
-        img_match = re.search(
-            r'<img[^>]+class="[^"]*article_poster[^"]*"[^>]+src="([^"]+)"',
-            block, re.I
-        )
-        img = (img_match.group(1) or "").strip() if img_match else ""
+    def _finished(self):
+        self._running = False
+        if config.plugins.ciefprt.epg_bulk.value:
+            self._timer.start(EPG_BULK_INTERVAL * 1000, True)
 
-        # --- Izdvoji naslov (meta-title) ---
-        title_match = re.search(
-            r'<a[^>]+class="[^"]*meta-title[^"]*"[^>]*>(.*?)</a>',
-            block, re.I | re.S
-        )
-        if not title_match:
-            continue
-        title = (title_match.group(1) or "").strip()
-        title = re.sub(r'<[^>]+>', '', title)
-        title = re.sub(r'\s+', ' ', title).strip()
 
-        if not title:
-            continue
+EPG_BULK = None
 
-        # --- Izdvoji godine ako postoje u naslovu ---
-        year = ""
-        year_match = re.search(r'\((\d{4})\)', title)
-        if year_match:
-            year = year_match.group(1)
-            title = re.sub(r'\s*\(\d{4}\)', '', title).strip()
 
-        # --- Normaliziraj URL ---
-        item_url = normalize_rt_url(href)
+def start_epg_bulk(delay=EPG_BULK_START_DELAY):
+    """Schedule the background EPG resolver (main thread)"""
+    global EPG_BULK
+    if EPG_BULK is None:
+        EPG_BULK = EpgBulkResolver()
+    EPG_BULK.start(delay)
 
-        # --- Spriječi duplikate ---
-        if item_url in seen_urls:
-            continue
-        seen_urls.add(item_url)
 
-        # --- Kreiraj rezultat ---
-        if year:
-            display_name = f"{title} ({year})"
-        else:
-            display_name = title
+# ---------- Zap prefetch ----------
+# Kad gledalac ostane na kanalu ZAP_DWELL sekundi, trenutni program se u
+# pozadini razrijesi i njegov detail + poster stignu u kes, pa se plugin
+# (EPG / plugin meni) otvara bez cekanja mreze. Tokom zapinga se ne radi
+# nista osim restarta jednog timera.
+ZAP_DWELL = 10          # s na kanalu prije prefetch-a
+ZAP_MIN_TITLE = 2
 
-        out.append({
-            "name": display_name,
-            "url": item_url,
-            "image": img
-        })
 
-    # --- Ako nismo našli ništa, probaj sa starom metodom (kao fallback) ---
-    if not out:
-        # Ovdje možeš staviti tvoj stari kod kao fallback
-        dlog(f"EDITORIAL: No items found with primary parser, trying fallback...")
-
-        # Pokušaj sa <article> elementima (stari način)
-        article_re = re.compile(
-            r'<article[^>]*data-rank[^>]*>.*?'
-            r'<a[^>]+href="([^"]+)"[^>]*>.*?'
-            r'<img[^>]+src="([^"]+)"[^>]*>.*?'
-            r'<h[23][^>]*>(.*?)</h[23]>',
-            re.I | re.S
-        )
+class ZapPrefetcher(object):
+    """
+    session.nav event listener. evStart (zap) restarts the dwell timer,
+    evUpdatedEventInfo (next programme on the same channel) only arms it
+    if idle, so frequent EIT updates can't postpone it forever. One
+    prefetch at a time; the same channel + title is not fetched twice.
+    """
 
-        for m in article_re.finditer(html):
-            href = (m.group(1) or "").strip()
-            img = (m.group(2) or "").strip()
-            title = (m.group(3) or "").strip()
-            title = re.sub(r'<[^>]+>', '', title)
-            title = re.sub(r'\s+', ' ', title).strip()
-
-            if href and title:
-                year = ""
-                year_match = re.search(r'\((\d{4})\)', title)
-                if year_match:
-                    year = year_match.group(1)
-                    title = re.sub(r'\s*\(\d{4}\)', '', title).strip()
-
-                item_url = normalize_rt_url(href)
-
-                if item_url not in seen_urls:
-                    seen_urls.add(item_url)
-                    if year:
-                        display_name = f"{title} ({year})"
-                    else:
-                        display_name = title
+    def __init__(self, session):
+        self.session = session
+        self._timer = eTimer()
+        self._timer.callback.append(self._dwell)
+        self._busy = False
+        self._last = None
+        session.nav.event.append(self._nav_event)
+
+    def _nav_event(self, event):
+        if not config.plugins.ciefprt.zap_prefetch.value:
+            return
+        if event == iPlayableService.evStart:
+            self._timer.start(ZAP_DWELL * 1000, True)
+        elif event == iPlayableService.evUpdatedEventInfo and not self._timer.isActive():
+            self._timer.start(ZAP_DWELL * 1000, True)
 
-                    out.append({
-                        "name": display_name,
-                        "url": item_url,
-                        "image": img
-                    })
+    def _dwell(self):
+        if self._busy or not config.plugins.ciefprt.zap_prefetch.value:
+            return
+        epg = get_current_epg_info(self.session)
+        if not epg:
+            return
+        title, channel = epg.get("title") or "", epg.get("channel") or ""
+        # bez EPG-a get_current_epg_info vraca naziv kanala
+        if len(title) < ZAP_MIN_TITLE or title == channel or epg_skip_title(title, playing_event_genre(self.session)):
+            return
+        key = (channel, title)
+        if key == self._last:
+            return
+        self._last = key
+        self._busy = True
+        threading.Thread(target=self._prefetch, args=(epg,), daemon=True).start()
 
-    dlog(f"EDITORIAL: Found {len(out)} items from {url}")
-    return out
+    def _prefetch(self, epg):
+        title = epg["title"]
+        try:
+            item, conf, source = resolve_epg_title(title, epg.get("year", ""), epg.get("channel", ""))
+            if item is None or conf < EPG_TRUST:
+                METRICS.inc("ciefprt_zap_prefetch_total", result="unresolved")
+                return
+            url = item["url"]
+            cached = source == "map" and DETAIL_STORE.fresh(url)
+            info = load_detail(url, trailer=False)
+            img = item.get("image") or info.get("poster_url")
+            if img:
+                fetch_poster(img)
+            METRICS.inc("ciefprt_zap_prefetch_total", result="cached" if cached else "resolved")
+            dlog("ZAP: '%s' -> %s (%s)" % (title, url, source), LOG_DEBUG)
+        except Exception as e:
+            METRICS.inc("ciefprt_zap_prefetch_total", result="error")
+            dlog("ZAP: prefetch '%s' failed: %s" % (title, e), LOG_WARNING)
+            self._last = None  # sljedeci put ponovo
+        finally:
+            self._busy = False
 
-def parse_browse(url):
-    dlog(f"BROWSE: Parsing URL: {url}")
 
-    # --- EDITORIAL fallback ---
-    if "editorial.rottentomatoes.com" in (url or ""):
-        dlog("BROWSE: Using editorial parser")
-        return parse_editorial_guide(url)
+ZAP_PREFETCH = None
 
-    raw = get_cached_page(url) or http_get(url)
-    set_cached_page(url, raw)
-    html = raw.decode("utf-8", "ignore")
 
-    items = extract_jsonld_itemlist(html)
-    out = []
+def start_zap_prefetch(session):
+    """Install the zap listener once (main thread)"""
+    global ZAP_PREFETCH
+    if ZAP_PREFETCH is None:
+        ZAP_PREFETCH = ZapPrefetcher(session)
 
-    for it in items:
-        if not isinstance(it, dict):
-            continue
-        name = (it.get("name") or "").strip()
-        item_url = normalize_rt_url(it.get("url"))
-        img = it.get("image")
 
-        if name and item_url:
-            out.append({
-                "name": name,
-                "url": item_url,
-                "image": img
-            })
+# ---------- Now on TV ----------
+# Trenutni program svih kanala jednog buketa -> RT ocjene, paralelno kroz
+# mali pool. Isti film na vise kanala (HD / +1) ide jednom (single flight),
+# a rezultat se pamti NOW_TV_TTL pa je ponovno otvaranje skoro besplatno.
+NOW_TV_WORKERS = 4
+NOW_TV_TTL = 600        # s
+NOW_TV_KEEP = 500       # zapamcenih naslova
 
-    return out
 
-# ---------- Detail parser (media-scorecard-json + metadata slots) ----------
-def extract_jsonld_movie_tv(html_text):
-    """Try to extract Movie/TVSeries JSON-LD (actors, director, creator)."""
-    blocks = re.findall(
-        r'<script[^>]+type="application/ld\+json"[^>]*>(.*?)</script>',
-        html_text, flags=re.S | re.I
-    )
+class SingleFlight(object):
+    """
+    Calls with the same key share one execution: the first caller runs
+    fn, concurrent callers wait for its result, later callers get the
+    stored result for ttl seconds. Exceptions and None are not stored
+    (return False to remember a negative answer); an exception of fn is
+    raised in the concurrent callers too.
+    """
 
-    for b in blocks:
-        b = (b or "").strip()
+    def __init__(self, ttl, size, cache="singleflight"):
+        self.ttl = ttl
+        self.size = size
+        self.cache = cache
+        self._lock = threading.Lock()
+        self._calls = {}
+        self._done = collections.OrderedDict()
+
+    def do(self, key, fn):
+        with self._lock:
+            hit = self._done.get(key)
+            if hit and time.monotonic() - hit[0] < self.ttl:
+                METRICS.inc("ciefprt_cache_requests_total", cache=self.cache, result="hit")
+                return hit[1]
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = [threading.Event(), None]  # [gotovo, izuzetak]
+        if not leader:
+            METRICS.inc("ciefprt_cache_requests_total", cache=self.cache, result="coalesced")
+            call[0].wait()
+            if call[1] is not None:
+                raise call[1]
+            with self._lock:
+                hit = self._done.get(key)
+            return hit[1] if hit else None
+
+        METRICS.inc("ciefprt_cache_requests_total", cache=self.cache, result="miss")
+        result = None
         try:
-            data = json.loads(b)
-        except:
+            result = fn()
+        except Exception as e:
+            call[1] = e
+            raise
+        finally:
+            with self._lock:
+                if result is not None:
+                    self._done[key] = (time.monotonic(), result)
+                    self._done.move_to_end(key)
+                    while len(self._done) > self.size:
+                        self._done.popitem(last=False)
+                del self._calls[key]
+            call[0].set()
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._done.clear()
+
+
+NOW_TV_FLIGHT = SingleFlight(NOW_TV_TTL, NOW_TV_KEEP, cache="now_tv")
+
+
+def now_events(services):
+    """(ref, channel, title, year) of the event now running on each service (main thread)"""
+    from enigma import eEPGCache
+    epgcache = eEPGCache.getInstance()
+    names = dict(services)
+    try:
+        events = epgcache.lookupEvent(["RTD"] + [(ref, 0, -1) for ref, name in services]) or []
+    except Exception as e:
+        dlog("NOW TV: EPG lookup failed: %s" % e, LOG_WARNING)
+        return []
+    out = []
+    for ref, title, duration in events:
+        if not title or not epg_title_candidate(title, (duration or 0) // 60):
             continue
+        name, year = split_epg_name(title)
+        if name:
+            out.append((ref, names.get(ref, ""), name, year))
+    return out
 
-        objs = data if isinstance(data, list) else [data]
-        for obj in objs:
-            if not isinstance(obj, dict):
-                continue
-            t = obj.get("@type")
-            if t not in ("Movie", "TVSeries", "TVSeason", "TVEpisode"):
-                continue
-            return obj
-    return None
 
+def rate_epg_title(title, year="", channel=""):
+    """
+    (item, DetailInfo) for an EPG title, shared by concurrent callers;
+    None if not found. Raises when the lookup failed (offline, search or
+    detail error), so callers can tell that from "not on RT".
+    """
+    def _rate():
+        item, conf, source = resolve_epg_title(title, year, channel, save=False, strict=True)
+        if item is None or conf < EPG_TRUST:
+            return False  # i "nije nadjeno" se pamti NOW_TV_TTL
+        return item, load_detail(item["url"], trailer=False)
 
-def extract_title_from_html(html):
-    """Extract title and year from RT page HTML"""
-    title = ""
-    year = ""
-
-    # Pokušaj izvući iz title taga
-    title_match = re.search(r'<title>(.*?)</title>', html, re.I)
-    if title_match:
-        title = title_match.group(1).strip()
-        # Očisti " - Rotten Tomatoes" i slično
-        title = re.sub(r'\s*[-|]\s*Rotten Tomatoes.*$', '', title, flags=re.I)
-        title = re.sub(r'\s*[-|]\s*TV.*$', '', title, flags=re.I)
-
-    # Ako nema title, pokušaj iz og:title
-    if not title:
-        title_match = re.search(r'<meta[^>]+property="og:title"[^>]+content="([^"]+)"', html, re.I)
-        if title_match:
-            title = title_match.group(1).strip()
-            title = re.sub(r'\s*[-|]\s*Rotten Tomatoes.*$', '', title, flags=re.I)
-
-    # Izvuci godinu
-    year_match = re.search(r'\((\d{4})\)', html)
-    if year_match:
-        year = year_match.group(1)
-    else:
-        # Pokušaj iz title-a
-        year_match = re.search(r'\((\d{4})\)', title)
-        if year_match:
-            year = year_match.group(1)
-            title = re.sub(r'\s*\(\d{4}\)\s*$', '', title)
-
-    # Očisti title
-    title = title.strip()
-    title = re.sub(r'\s+', ' ', title)
-
-    return title, year
-
-def parse_detail(html, detail_url=None):
-    info = {
-        "mpaa": "",
-        "status": "",
-        "runtime": "",
-        "genres": "",
-        "synopsis": "",
-        "director": "",
-        "cast": "",
-        "director_list": [],
-        "cast_list": [],
-        "poster_url": "",
-        "backdrop_url": "",
-        "tomatometer": "",
-        "critic_count": "",
-        "popcorn": "",
-        "audience_count": "",
-        "trailer_url": "",
-        "trailer_type": "",
-    }
-
-    # poster fallback (og:image)
-    m = re.search(r'<meta[^>]+property="og:image"[^>]+content="([^"]+)"', html, re.I)
-    if m:
-        info["poster_url"] = (m.group(1) or "").strip()
-
-    # Backdrop / Theme (rt-img slot="iconic")
-    m = re.search(r'<rt-img[^>]+slot="iconic"[^>]+src="([^"]+)"', html, re.I)
-    if m:
-        src = (m.group(1) or "").strip()
-        parts = [p.strip() for p in src.split(",") if p.strip()]
-        if parts:
-            info["backdrop_url"] = parts[-1]
-
-    # scores + description
-    m = re.search(
-        r'<script[^>]+id="media-scorecard-json"[^>]*>\s*({.*?})\s*</script>',
-        html, re.S | re.I
-    )
-    if m:
-        try:
-            data = json.loads(m.group(1))
-            critics = data.get("criticsScore", {}) or {}
-            audience = data.get("audienceScore", {}) or {}
-
-            info["tomatometer"] = str(critics.get("scorePercent", "") or "")
-            info["critic_count"] = str(critics.get("reviewCount", "") or "")
-
-            info["popcorn"] = str(audience.get("scorePercent", "") or "")
-            info["audience_count"] = str(audience.get("bandedRatingCount", "") or audience.get("ratingCount", "") or "")
-
-            if data.get("description"):
-                info["synopsis"] = (data.get("description") or "").strip()
-        except:
-            pass
+    return NOW_TV_FLIGHT.do((normalize_query(clean_epg_title(title)), year), _rate) or None
 
-    # metadata-prop
-    props = re.findall(
-        r'<rt-text[^>]+slot="metadata-prop"[^>]*>\s*([^<]+)\s*</rt-text>',
-        html, flags=re.I
-    )
-    props = [p.strip() for p in props if p and p.strip()]
-
-    # genres
-    genres = re.findall(
-        r'<rt-text[^>]+slot="metadata-genre"[^>]*>\s*([^<]+)\s*</rt-text>',
-        html, flags=re.I
-    )
-    genres = [g.strip() for g in genres if g and g.strip()]
-
-    # map props -> fields
-    for p in props:
-        if re.match(r'^[A-Z0-9][A-Z0-9\-]{0,6}$', p) and not info["mpaa"]:
-            info["mpaa"] = p
-        elif ("h" in p and "m" in p) or re.match(r"^\d+\s*m$", p, re.I):
-            info["runtime"] = p
-        elif "playing" in p.lower() or "stream" in p.lower() or "premiere" in p.lower():
-            info["status"] = p
-    if genres:
-        info["genres"] = "/".join(genres)
-
-    # --- Cast & Crew (JSON-LD) ---
-    j = extract_jsonld_movie_tv(html)
-    if j:
-        directors = j.get("director")
-        dir_names = []
-        if isinstance(directors, dict) and directors.get("name"):
-            dir_names = [directors.get("name")]
-        elif isinstance(directors, list):
-            dir_names = [d.get("name", "") for d in directors if isinstance(d, dict)]
-        dir_names = [n for n in dir_names if n]
-        info["director_list"] = dir_names
-        if dir_names:
-            info["director"] = ", ".join(dir_names[:2])
-
-        actors = j.get("actor") or j.get("actors")
-        cast_names = []
-        if isinstance(actors, dict) and actors.get("name"):
-            cast_names = [actors.get("name")]
-        elif isinstance(actors, list):
-            for a in actors:
-                if isinstance(a, dict) and a.get("name"):
-                    cast_names.append(a["name"])
-        cast_names = [x for x in cast_names if x]
-        info["cast_list"] = cast_names
-        if cast_names:
-            info["cast"] = ", ".join(cast_names[:8])
-
-    # --- Ekstrakcija trejlera ---
-    # 1. Video element sa data-sources
-    video_match = re.search(
-        r'<video[^>]+data-sources="([^"]+)"',
-        html, re.I
-    )
-    if video_match:
-        try:
-            sources = json.loads(video_match.group(1))
-            for src in sources:
-                if src.get("type") == "application/x-mpegURL":
-                    info["trailer_url"] = src.get("src", "")
-                    info["trailer_type"] = "hls"
-                    break
-        except:
-            pass
 
-    # 2. Video tag sa src
-    if not info["trailer_url"]:
-        video_match = re.search(
-            r'<video[^>]+src="([^"]+)"[^>]*>',
-            html, re.I
-        )
-        if video_match:
-            url = video_match.group(1)
-            if ".m3u8" in url or ".ts" in url:
-                info["trailer_url"] = url
-                info["trailer_type"] = "hls"
+class RateJob(object):
+    """
+    Rates (key, channel, title, year) events (now_events(), recordings)
+    through a few worker threads. on_result(event, (item, info) or None,
+    failed) is called from the workers for every event (failed: the
+    lookup raised, None is then not "not found"), on_done() once at the
+    end; cancel() stops the workers before their next event. With gap,
+    a worker pauses that long after every lookup that went to the
+    network (remembered titles go straight through).
+    """
 
-    # 3. Bilo koji .m3u8 ili .ts link
-    if not info["trailer_url"]:
-        stream_match = re.search(
-            r'(https?://[^\s"\']+\.(?:m3u8|ts)[^\s"\']*)',
-            html, re.I
-        )
-        if stream_match:
-            info["trailer_url"] = stream_match.group(1)
-            info["trailer_type"] = "hls"
+    NETWORK_MIN = 0.05  # s - brze od ovoga je bilo iz kesa
+
+    def __init__(self, events, on_result, on_done, workers=NOW_TV_WORKERS, gap=0.0, name="now_tv"):
+        self._queue = queue.Queue()
+        for ev in events:
+            self._queue.put(ev)
+        self._on_result = on_result
+        self._on_done = on_done
+        self._cancel = threading.Event()
+        self._left = min(workers, len(events))
+        self._lock = threading.Lock()
+        self.gap = gap
+        self.name = name
+        self._action = TRACER.current()
+
+    def start(self):
+        if not self._left:
+            self._on_done()
+            return
+        for i in range(self._left):
+            start_thread(self._action, self._worker)
 
-    # 4. YouTube trailer
-    if not info["trailer_url"] and config.plugins.ciefprt.youtube_search.value:
-        dlog("TRAILER: No trailer found, searching YouTube...")
-        try:
-            title, year = extract_title_from_html(html)
-            if title:
-                dlog(f"TRAILER: Searching YouTube for '{title}' ({year})...")
-                youtube_url = search_youtube_trailer(title, year)
-                if youtube_url:
-                    info["trailer_url"] = youtube_url
-                    info["trailer_type"] = "youtube"
-                    dlog(f"TRAILER: Found on YouTube: {youtube_url}")
-                else:
-                    dlog("TRAILER: No YouTube trailer found")
-            else:
-                dlog("TRAILER: Could not extract title for YouTube search")
-        except Exception as e:
-            dlog(f"TRAILER YouTube search error: {e}")
+    def cancel(self):
+        self._cancel.set()
 
-    # 5. API fallback (samo ako imamo detail_url)
-    if not info["trailer_url"] and detail_url:
-        dlog("TRAILER: No trailer found in HTML, trying API...")
+    def _worker(self):
+        METRICS.add_gauge("ciefprt_worker_threads", 1)
         try:
-            trailer_url = fetch_trailer_url(detail_url)
-            if trailer_url:
-                info["trailer_url"] = trailer_url
-                info["trailer_type"] = "hls"
-                dlog(f"TRAILER: Found via API: {trailer_url}")
-        except Exception as e:
-            dlog(f"TRAILER API error: {e}")
+            while not self._cancel.is_set():
+                try:
+                    ev = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                key, channel, title, year = ev
+                t0 = time.monotonic()
+                try:
+                    rated, failed = rate_epg_title(title, year, channel), False
+                    METRICS.inc("ciefprt_rate_titles_total", job=self.name, result="rated" if rated else "unrated")
+                except Exception as e:
+                    rated, failed = None, True
+                    METRICS.inc("ciefprt_rate_titles_total", job=self.name, result="error")
+                    dlog("RATE %s: '%s' failed: %s" % (self.name, title, e), LOG_DEBUG)
+                if self._cancel.is_set():
+                    break
+                try:
+                    self._on_result(ev, rated, failed)
+                except Exception:
+                    dlog("RATE %s: %s" % (self.name, traceback.format_exc()), LOG_WARNING)
+                if self.gap and time.monotonic() - t0 > self.NETWORK_MIN:
+                    self._cancel.wait(self.gap)
+        finally:
+            METRICS.add_gauge("ciefprt_worker_threads", -1)
+            with self._lock:
+                self._left -= 1
+                last = self._left == 0
+            if last:
+                save_epg_map()
+                if not self._cancel.is_set():
+                    self._on_done()
+
+
+# ---------- Recordings ----------
+# Snimci (.ts sa .meta/.eit) -> RT ocjene, kroz dva spora workera da
+# reprodukcija i snimanje ne osjete nista. REC_INDEX pamti svaku ocjenu,
+# pa se prekinuto ocjenjivanje nastavlja.
+REC_WORKERS = 2
+REC_GAP = 1.5           # s pauze workera nakon mreznog zahtjeva
+REC_SAVE_EVERY = 25     # ocjena izmedju upisa indeksa
+REC_INDEX = RecordingIndex(REC_INDEX_FILE)
+
+
+def recording_dirs():
+    """Recording folders from the enigma2 settings, /media/hdd/movie as fallback"""
+    dirs = []
+    try:
+        dirs.append(config.usage.default_path.value)
+    except Exception:
+        pass
+    try:
+        dirs += list(config.movielist.videodirs.value)
+    except Exception:
+        pass
+    dirs.append("/media/hdd/movie/")
+    out = []
+    for d in dirs:
+        d = os.path.realpath(d) if d else ""
+        if d and d not in out and os.path.isdir(d):
+            out.append(d)
+    return out
 
-    return info
 
-# ---------- EPG functions ----------
-def get_current_epg_info(session):
-    """Get current EPG information for the playing channel"""
+def save_recording_index():
     try:
-        from ServiceReference import ServiceReference
-        from enigma import eEPGCache
+        REC_INDEX.save()
+    except Exception as e:
+        dlog("RECORDINGS: index save failed: %s" % e, LOG_WARNING)
+
+
+def pending_recordings(dirs):
+    """Scan dirs (worker thread): drop gone recordings, return [(path, channel, title, year)] to rate and their mtimes"""
+    found = list(scan_recordings(dirs))
+    REC_INDEX.prune(found)
+    events = []
+    mtimes = {}
+    for path, mtime in REC_INDEX.pending(found):
+        name, channel = recording_title(path)
+        title, year = split_epg_name(name)
+        if not title:
+            continue
+        events.append((path, channel, title, year))
+        mtimes[path] = mtime
+    dlog("RECORDINGS: %d recordings, %d to rate" % (len(found), len(events)))
+    return events, mtimes
 
-        current_service = session.nav.getCurrentlyPlayingServiceReference()
-        if not current_service:
-            dlog("EPG: No current service")
-            return None
 
-        service_ref = ServiceReference(current_service)
-        service_name = service_ref.getServiceName()
-        dlog(f"EPG: Service name: {service_name}")
+# ---------- UI dispatcher ----------
+class UIDispatcher(object):
+    """
+    Thread-safe UI queue.
+    Worker threadovi zovu post(fn), a enigma main loop izvrsava fn cim
+    wakeup pipe postane citljiv (eSocketNotifier). Nema polling timera -
+    dok je red prazan, main loop se ne budi.
+    Mora se kreirati u main threadu (u __init__ screena).
+    """
 
-        epgcache = eEPGCache.getInstance()
-        if not epgcache:
-            dlog("EPG: No EPG cache available")
-            return {"title": service_name, "channel": service_name}
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._queue = []
+        self._pending = False
+        self._closed = False
+        self._rfd, self._wfd = os.pipe()
+        for fd in (self._rfd, self._wfd):
+            flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+            fcntl.fcntl(fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
+        self._notifier = eSocketNotifier(self._rfd, POLLIN)
+        self._notifier.callback.append(self._on_wakeup)
+
+    def post(self, fn):
+        """Queue fn for the main loop (safe from any thread)"""
+        with self._lock:
+            if self._closed:
+                return
+            # callback ide u akciju (trace + profil) threada koji ga salje
+            self._queue.append((fn, TRACER.current()))
+            METRICS.add_gauge("ciefprt_ui_queue_depth", 1)
+            # pipe budimo samo jednom po "turi", ostalo pokupi isti drain
+            if self._pending:
+                return
+            self._pending = True
+            # pod lockom: close() ne moze zatvoriti (i osloboditi) fd izmedju
+            # provjere _closed i upisa; pipe je non-blocking
+            try:
+                os.write(self._wfd, b"x")
+            except OSError:
+                pass
+
+    def clear(self):
+        with self._lock:
+            METRICS.add_gauge("ciefprt_ui_queue_depth", -len(self._queue))
+            self._queue = []
 
+    def _on_wakeup(self, what=None):
         try:
-            events = epgcache.lookupEvent(["IBDCT", (current_service.toString(), 0, -1, -1)])
-            dlog(f"EPG: Events found: {len(events) if events else 0}")
-        except Exception as e:
-            dlog(f"EPG: lookupEvent error: {e}")
-            events = []
+            os.read(self._rfd, 512)
+        except OSError:
+            pass
 
-        if events:
-            for event in events:
-                try:
-                    # Podrška za evente sa 5 ili 6 elemenata
-                    if len(event) < 5:
-                        dlog(f"EPG: Event too short: {len(event)} elements")
-                        continue
+        with self._lock:
+            q = self._queue
+            self._queue = []
+            self._pending = False
+        METRICS.add_gauge("ciefprt_ui_queue_depth", -len(q))
 
-                    # event[4] je uvijek title (u većini Enigma2 verzija)
-                    event_name = event[4] if len(event) > 4 else ""
-                    event_desc = event[5] if len(event) > 5 else ""
+        for fn, action in q:
+            if self._closed:
+                break
+            prev = TRACER.bind(action)
+            try:
+                PROFILER.run(fn)
+            except:
+                dlog("UI: callback error\n%s" % traceback.format_exc(), LOG_ERROR)
+            finally:
+                TRACER.bind(prev)
 
-                    if event_name:
-                        clean_title = re.sub(r'\s*\(\d{4}\)', '', event_name)
-                        clean_title = re.sub(r'\s*-\s*.*$', '', clean_title)
-                        clean_title = clean_title.strip()
+    def close(self):
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            METRICS.add_gauge("ciefprt_ui_queue_depth", -len(self._queue))
+            self._queue = []
+        try:
+            self._notifier.stop()
+            self._notifier.callback.remove(self._on_wakeup)
+        except:
+            pass
+        self._notifier = None
+        for fd in (self._rfd, self._wfd):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
 
-                        # Preskoči ako je title prazan ili samo naziv kanala
-                        if clean_title and clean_title != service_name:
-                            dlog(f"EPG: Found event: {clean_title}")
-                            return {
-                                "title": clean_title,
-                                "original_title": event_name,
-                                "description": event_desc or "",
-                                "channel": service_name
-                            }
-                except Exception as e:
-                    dlog(f"EPG: Event parsing error: {e}")
-                    continue
 
-        # Fallback - koristi samo naziv kanala
-        dlog("EPG: Using fallback - service name only")
-        return {"title": service_name, "channel": service_name}
+JITTER_INTERVAL = 50  # ms
+
+
+class LoopJitterProbe(object):
+    """
+    Main-loop jitter: an eTimer ticks every JITTER_INTERVAL ms and the
+    lateness of each tick is recorded as stage loop.lag.<mode>, where mode
+    is what parsing ran in that interval (idle / worker / thread). The
+    stats screen then compares parsing with and without the worker.
+    """
+
+    def __init__(self):
+        self._last = None
+        self._timer = eTimer()
+        self._timer.callback.append(self._tick)
+
+    def start(self):
+        if self._last is None:
+            self._last = time.monotonic()
+            self._timer.start(JITTER_INTERVAL, False)
+
+    def stop(self):
+        self._timer.stop()
+        self._last = None
+
+    def _tick(self):
+        now = time.monotonic()
+        if self._last is None:
+            return
+        lag = max(0.0, now - self._last - JITTER_INTERVAL / 1000.0)
+        self._last = now
+        TRACER.sample("loop.lag." + PARSE_ACTIVITY.poll(), lag)
 
-    except Exception as e:
-        dlog(f"EPG error: {e}")
-        return None
 
 # ---------- UI ----------
 class CiefpRTMain(Screen):
@@ -1258,7 +3219,7 @@ class CiefpRTMain(Screen):
     </screen>
     """
 
-    def __init__(self, session):
+    def __init__(self, session, item=None, epg=None):
         Screen.__init__(self, session)
         ensure_dirs()
 
@@ -1277,23 +3238,28 @@ class CiefpRTMain(Screen):
 
         self.current_item = None
         self.current_detail = {}
+        self._action = None
+        self._decode_t0 = None
         self._closing = False
         self._exiting = False
         self._trailer_data = None  # NOVO
+        self._epg_event = None     # zadnji EPG dogadjaj (za pin)
         self.onClose.append(self._on_main_close)
 
-        # UI dispatcher
-        self._uiq = []
-        self._uit = eTimer()
-        self._uit.callback.append(self._drain_uiq)
-        self._uit.start(200, False)
+        # UI dispatcher (event-driven, bez polling timera)
+        self._dispatcher = UIDispatcher()
+
+        self._jitter = LoopJitterProbe()
+        if config.plugins.ciefprt.jitter_probe.value:
+            self._jitter.start()
 
         self.picload = ePicLoad()
         self.picload.PictureData.get().append(self._on_pic_ready)
 
         self["actions"] = ActionMap(
-            ["OkCancelActions", "ColorActions", "MenuActions"],
+            ["OkCancelActions", "ColorActions", "MenuActions", "EPGSelectActions"],
             {
+                "info": lambda: self._check_epg(force=True),  # trenutni EPG dogadjaj
                 "cancel": self.exit,
                 "red": self.exit,
                 "green": self.open_movies_menu,
@@ -1309,16 +3275,25 @@ class CiefpRTMain(Screen):
         # timers (držimo reference da ne budu GC)
         self._epgTimer = eTimer()
         self._epgTimer.callback.append(self._check_epg)
-        self._epgTimer.start(1000, True)  # Provjeri nakon 1 sekunde
+        if item is None:
+            self._epgTimer.start(1000, True)  # Provjeri nakon 1 sekunde
 
         self._phTimer = eTimer()
         self._phTimer.callback.append(self._show_placeholder)
 
         # čekaj da layout završi pa tek onda placeholder
         self.onLayoutFinish.append(self._show_placeholder)
-        # U __init__ metodi, na samom kraju:
-        self.onLayoutFinish.append(self._show_startup_help)
-        self.onLayoutFinish.append(self._check_epg)
+        if item is not None:
+            # predaja iz EPG overlay-a: naslov je vec razrijesen, bez help-a i EPG pretrage
+            self._epg_event = epg
+            self.onLayoutFinish.append(lambda: self._load_item_details(item))
+        elif epg is not None:
+            # EPG overlay bez naslova: trazi bas taj dogadjaj, ne trenutni program
+            self.onLayoutFinish.append(lambda: self._check_epg(force=True, epg=epg))
+        else:
+            # U __init__ metodi, na samom kraju:
+            self.onLayoutFinish.append(self._show_startup_help)
+            self.onLayoutFinish.append(self._check_epg)
 
     def _show_startup_help(self):
         """Show startup help screen"""
@@ -1389,30 +3364,35 @@ class CiefpRTMain(Screen):
     # --- UI queue helpers ---
     def ui(self, fn):
         """UI thread dispatcher"""
-        if not hasattr(self, '_uiq'):
-            self._uiq = []
-        if hasattr(self, '_closing') and self._closing:
+        if getattr(self, '_closing', False) or getattr(self, '_exiting', False):
             return
-        if hasattr(self, '_exiting') and self._exiting:
+        action = TRACER.current()
+        if action is None:
+            self._dispatcher.post(lambda: PROFILER.run(fn))
             return
-        self._uiq.append(fn)
 
-    def _drain_uiq(self):
-        if self._closing or self._exiting:
-            return
-            
-        q = self._uiq
-        self._uiq = []
-        for fn in q:
+        def traced():
+            prev = TRACER.bind(action)
             try:
-                if not self._closing and not self._exiting:
-                    fn()
-            except:
-                pass
+                with TRACER.span("ui.apply"):
+                    PROFILER.run(fn)
+            finally:
+                TRACER.bind(prev)
+
+        self._dispatcher.post(traced)
+
+    def _begin_action(self, name, label=""):
+        """Start a traced user action; worker threads started after this join it"""
+        self._action = begin_action(name, label)
+        return self._action
 
     def _on_pic_ready(self, picInfo=""):
         if self._closing or self._exiting:
             return
+        if self._decode_t0:
+            t0, action = self._decode_t0
+            self._decode_t0 = None
+            TRACER.record("poster.decode", time.monotonic() - t0, action)
         try:
             ptr = self.picload.getData()
             if ptr and self["poster"].instance:
@@ -1435,15 +3415,8 @@ class CiefpRTMain(Screen):
         dlog("EXIT: Starting exit sequence")
         self._exiting = True
         
-        try:
-            if self._uit:
-                self._uit.stop()
-                dlog("EXIT: Timer stopped")
-        except:
-            pass
-        
-        self._uiq = []
-        dlog("EXIT: UI queue cleared")
+        self._dispatcher.close()
+        dlog("EXIT: UI dispatcher closed")
         
         self._closing = True
         
@@ -1463,6 +3436,8 @@ class CiefpRTMain(Screen):
             pass
         
         dlog("EXIT: Calling Screen.close()")
+        PROFILER.stop()
+        LOGGER.flush()
         self.close()
 
     # --- Thread wrapper ---
@@ -1471,18 +3446,21 @@ class CiefpRTMain(Screen):
             dlog(f"THREAD: Not starting {target_func.__name__}, screen is closing")
             return
         
-        dlog(f"THREAD: Starting {target_func.__name__}")
+        dlog(f"THREAD: Starting {target_func.__name__}", LOG_DEBUG)
+        TRACER.bind(self._action)
+        METRICS.add_gauge("ciefprt_worker_threads", 1)
         try:
             if self._closing or self._exiting:
                 dlog(f"THREAD: Aborting {target_func.__name__} before start")
                 return
                 
-            target_func(*args, **kwargs)
-            dlog(f"THREAD: Completed {target_func.__name__}")
+            PROFILER.run(target_func, *args, **kwargs)
+            dlog(f"THREAD: Completed {target_func.__name__}", LOG_DEBUG)
         except Exception as e:
-            dlog(f"THREAD: Error in {target_func.__name__}: {e}\n{traceback.format_exc()}")
+            dlog(f"THREAD: Error in {target_func.__name__}: {e}\n{traceback.format_exc()}", LOG_ERROR)
         finally:
-            dlog(f"THREAD: Finished {target_func.__name__}")
+            METRICS.add_gauge("ciefprt_worker_threads", -1)
+            dlog(f"THREAD: Finished {target_func.__name__}", LOG_DEBUG)
 
     def _hide_help(self):
         if self.showing_help:
@@ -1505,8 +3483,11 @@ class CiefpRTMain(Screen):
         if config.plugins.ciefprt.auto_epg.value:
             self._epgTimer.start(1000, True)
 
-    def _check_epg(self):
-        """Check EPG and auto-search current program"""
+    def _check_epg(self, force=False, epg=None):
+        """
+        Check EPG and auto-search current program (force: INFO key, even with
+        Auto EPG off); epg: search this event (EPG overlay) instead.
+        """
         dlog("EPG: _check_epg called")  # NOVO - debug
 
         if self._closing or self._exiting:
@@ -1514,16 +3495,28 @@ class CiefpRTMain(Screen):
             return
 
         # Provjeri da li je Auto EPG uključen
-        if not config.plugins.ciefprt.auto_epg.value:
+        if not force and not config.plugins.ciefprt.auto_epg.value:
             dlog("EPG: Auto EPG is disabled in settings")
             self["status"].setText("Auto EPG disabled")
             return
 
-        epg_info = get_current_epg_info(self.session)
+        epg_info = epg or get_current_epg_info(self.session)
         dlog(f"EPG: Got info: {epg_info}")  # NOVO - debug
 
         if epg_info and epg_info.get("title"):
             title = epg_info["title"]
+            self._epg_event = epg_info
+            self._begin_action("epg lookup", title)
+
+            # Zapamcen / indeksiran naslov - bez mreze
+            item, conf, source = resolve_epg_title(title, epg_info.get("year", ""), epg_info.get("channel", ""),
+                                                   network=False)
+            if item:
+                dlog(f"EPG: '{title}' resolved from {source} ({conf:.2f})")
+                self._load_item_details(item)
+                self["status"].setText(f"EPG: {item.get('name', '')}")
+                return
+
             dlog(f"EPG: Searching for '{title}'")  # NOVO - debug
             self["status"].setText(f"Searching for: {title}")
             self["title"].setText(title)
@@ -1532,14 +3525,14 @@ class CiefpRTMain(Screen):
             # Start search in background
             threading.Thread(
                 target=self._thread_wrapper,
-                args=(self._search_epg_thread, title),
+                args=(self._search_epg_thread, title, epg_info),
                 daemon=True
             ).start()
         else:
             dlog("EPG: No EPG info found")  # NOVO - debug
             self["status"].setText("Ready - No EPG info found")
 
-    def _search_epg_thread(self, query):
+    def _search_epg_thread(self, query, epg=None):
         """Search for EPG program"""
         try:
             # Provjeri da li screen još postoji
@@ -1549,19 +3542,19 @@ class CiefpRTMain(Screen):
                 return
 
             dlog(f"EPG SEARCH: {query}")
+            epg = epg or {}
 
             # Očisti naziv
-            clean_query = re.sub(r'[:;!?]', ' ', query)
-            clean_query = re.sub(r'\s*\(\d{4}\)\s*$', '', clean_query)
-            clean_query = re.sub(r'\s+', ' ', clean_query).strip()
-
+            clean_query = clean_epg_title(query)
             dlog(f"EPG: Cleaned query: {clean_query}")
 
-            # Prvo probaj sa search_rt (koji koristi API pa fallback)
-            results = search_rt(clean_query, search_type="movie")
-
-            if not results:
-                results = search_rt(clean_query, search_type="tv")
+            # EPG mapa, offline indeks, pa jedan autocomplete poziv (najbolji naslov, ne samo prvi)
+            year = epg.get("year") or ""
+            if not year:
+                m = re.search(r'\((\d{4})\)\s*$', query)
+                year = m.group(1) if m else ""
+            item, conf, source = resolve_epg_title(query, year, epg.get("channel", ""))
+            results = [item] if item else []
 
             def process_results():
                 if self._closing or self._exiting:
@@ -1655,6 +3648,8 @@ class CiefpRTMain(Screen):
             ("76 Disney Animated Movies", "https://editorial.rottentomatoes.com/guide/all-disney-animated-theatrical-movies-ranked-by-tomatometer/"),
             ("100 Best Movies of 1995", "https://editorial.rottentomatoes.com/guide/best-movies-1995/"),
             ("Search Movies", "search_movies"),
+            ("Now on TV (ranked)", "now_on_tv"),
+            ("My recordings (rated)", "recordings"),
         ]
         self.session.openWithCallback(self._browse_choice, ChoiceBox, title="Movies", list=menu)
 
@@ -1702,6 +3697,7 @@ class CiefpRTMain(Screen):
             ("Best Hulu Shows", "https://editorial.rottentomatoes.com/guide/best-hulu-shows-and-movies-to-binge-watch-now/"),
             ("34 Marvel TV Shows Ranked", "https://editorial.rottentomatoes.com/guide/marvel-tv-by-tomatometer/"),
             ("Search Series", "search_series"),
+            ("Now on TV (ranked)", "now_on_tv"),
         ]
         self.session.openWithCallback(self._browse_choice, ChoiceBox, title="TV Series", list=menu)
 
@@ -1731,6 +3727,34 @@ class CiefpRTMain(Screen):
             (f"Clear Cache{cache_info}", "clear"),
             ("Show debug log (last 80 lines)", "showlog"),
             ("Clear debug log", "clearlog"),
+            ("Log level (current: %s)" % config.plugins.ciefprt.log_level.value, "log_level"),
+            ("Performance stats", "perfstats"),
+            ("Reset performance stats", "perfreset"),
+            ("Metrics export (current: %s)" % ("ON" if config.plugins.ciefprt.metrics_export.value else "OFF"),
+             "metrics_export"),
+            ("Metrics file (%s)" % config.plugins.ciefprt.metrics_path.value, "metrics_path"),
+            ("Parse worker (current: %s)" % config.plugins.ciefprt.parse_worker.getText(), "parse_worker"),
+            ("Main-loop jitter probe (current: %s)" % ("ON" if config.plugins.ciefprt.jitter_probe.value else "OFF"),
+             "jitter_probe"),
+            ("Data source (current: %s)" % config.plugins.ciefprt.data_source.getText(), "data_source"),
+            ("Stop detail download early (current: %s)" % ("ON" if config.plugins.ciefprt.stream_detail.value else "OFF"),
+             "stream_detail"),
+            ("Search as you type (current: %s)" % ("ON" if config.plugins.ciefprt.live_search.value else "OFF"),
+             "live_search"),
+            ("Offline title index (current: %s, %d titles)" % (
+                "ON" if config.plugins.ciefprt.title_index.value else "OFF", len(TITLE_INDEX)), "title_index"),
+            ("EPG background resolver (current: %s%s)" % (
+                "ON" if config.plugins.ciefprt.epg_bulk.value else "OFF",
+                ", last: %s" % EPG_BULK.status() if EPG_BULK else ""), "epg_bulk"),
+            ("EPG resolver window (current: %s)" % config.plugins.ciefprt.epg_bulk_hours.getText(), "epg_bulk_hours"),
+            ("Prefetch after zapping (current: %s)" % ("ON" if config.plugins.ciefprt.zap_prefetch.value else "OFF"),
+             "zap_prefetch"),
+        ]
+        if PROFILER.active():
+            menu.append(("Stop profiling & save (%d actions captured)" % PROFILER.captured(), "profile_stop"))
+        else:
+            menu.append(("Profile next user actions (cProfile)", "profile"))
+        menu += [
             ("Auto EPG Search (current: %s)" % ("ON" if config.plugins.ciefprt.auto_epg.value else "OFF"), "auto_epg"),
             ("Items load limit (current: %s)" % config.plugins.ciefprt.max_items.value, "max_items"),
             ("YouTube Search (current: %s)" % ("ON" if config.plugins.ciefprt.youtube_search.value else "OFF"),
@@ -1754,6 +3778,136 @@ class CiefpRTMain(Screen):
         elif key == "clearlog":
             clear_debug_log()
             self["status"].setText("Debug log cleared")
+        elif key == "perfstats":
+            self.session.open(MessageBox, TRACER.report(), MessageBox.TYPE_INFO)
+        elif key == "perfreset":
+            TRACER.reset()
+            self["status"].setText("Performance stats reset")
+        elif key == "profile":
+            opts = [("Next 1 action", 1), ("Next 3 actions", 3), ("Next 5 actions", 5), ("Next 10 actions", 10)]
+
+            def _arm(sel):
+                if not sel or self._closing or self._exiting:
+                    return
+                PROFILER.arm(sel[1])
+                self["status"].setText(f"Profiling: {sel[0].lower()}")
+
+            self.session.openWithCallback(_arm, ChoiceBox, title="cProfile capture", list=opts)
+        elif key == "profile_stop":
+            path = PROFILER.stop()
+            if path:
+                self.session.open(MessageBox, "Profile saved:\n%s\n%s" % (path, path[:-len(".pstats")] + ".txt"),
+                                  MessageBox.TYPE_INFO, timeout=10)
+            else:
+                self["status"].setText("Profiling stopped (nothing captured)")
+        elif key == "metrics_export":
+            config.plugins.ciefprt.metrics_export.value = not config.plugins.ciefprt.metrics_export.value
+            config.plugins.ciefprt.metrics_export.save()
+            METRICS_EXPORTER.wake()
+            METRICS_EXPORTER.ensure_running()
+            status = "ON" if config.plugins.ciefprt.metrics_export.value else "OFF"
+            self["status"].setText(f"Metrics export: {status}")
+        elif key == "metrics_path":
+            def _set_path(path):
+                if not path or self._closing or self._exiting:
+                    return
+                config.plugins.ciefprt.metrics_path.value = path.strip()
+                config.plugins.ciefprt.metrics_path.save()
+                self["status"].setText(f"Metrics file: {path.strip()}")
+
+            self.session.openWithCallback(_set_path, VirtualKeyBoard, title="Metrics file path",
+                                          text=config.plugins.ciefprt.metrics_path.value)
+        elif key == "parse_worker":
+            modes = [("Off (parse in thread)", "off"), ("Auto", "auto"), ("1 process", "1"), ("2 processes", "2")]
+
+            def _set_mode(sel):
+                if not sel or self._closing or self._exiting:
+                    return
+                config.plugins.ciefprt.parse_worker.value = sel[1]
+                config.plugins.ciefprt.parse_worker.save()
+                PARSE_POOL.close()
+                self["status"].setText(f"Parse worker: {sel[0]}")
+
+            self.session.openWithCallback(_set_mode, ChoiceBox, title="HTML parsing", list=modes)
+        elif key == "data_source":
+            sources = [("JSON, HTML fallback", "auto"), ("HTML pages (details, lists)", "html")]
+
+            def _set_source(sel):
+                if not sel or self._closing or self._exiting:
+                    return
+                config.plugins.ciefprt.data_source.value = sel[1]
+                config.plugins.ciefprt.data_source.save()
+                DATA_SOURCES.reset()
+                self["status"].setText(f"Data source: {sel[0]}")
+
+            self.session.openWithCallback(_set_source, ChoiceBox, title="Data source", list=sources)
+        elif key == "stream_detail":
+            config.plugins.ciefprt.stream_detail.value = not config.plugins.ciefprt.stream_detail.value
+            config.plugins.ciefprt.stream_detail.save()
+            status = "ON" if config.plugins.ciefprt.stream_detail.value else "OFF"
+            self["status"].setText(f"Stop detail download early: {status}")
+        elif key == "live_search":
+            config.plugins.ciefprt.live_search.value = not config.plugins.ciefprt.live_search.value
+            config.plugins.ciefprt.live_search.save()
+            status = "ON" if config.plugins.ciefprt.live_search.value else "OFF"
+            self["status"].setText(f"Search as you type: {status}")
+        elif key == "epg_bulk":
+            config.plugins.ciefprt.epg_bulk.value = not config.plugins.ciefprt.epg_bulk.value
+            config.plugins.ciefprt.epg_bulk.save()
+            if config.plugins.ciefprt.epg_bulk.value:
+                start_title_index()
+                start_epg_bulk(5)
+            elif EPG_BULK:
+                EPG_BULK.stop()
+            status = "ON" if config.plugins.ciefprt.epg_bulk.value else "OFF"
+            self["status"].setText(f"EPG background resolver: {status}")
+        elif key == "zap_prefetch":
+            config.plugins.ciefprt.zap_prefetch.value = not config.plugins.ciefprt.zap_prefetch.value
+            config.plugins.ciefprt.zap_prefetch.save()
+            if config.plugins.ciefprt.zap_prefetch.value:
+                start_title_index()
+                start_zap_prefetch(self.session)
+            status = "ON" if config.plugins.ciefprt.zap_prefetch.value else "OFF"
+            self["status"].setText(f"Prefetch after zapping: {status}")
+        elif key == "epg_bulk_hours":
+            hours = [("6 hours", "6"), ("12 hours", "12"), ("24 hours", "24")]
+
+            def _set_hours(sel):
+                if not sel or self._closing or self._exiting:
+                    return
+                config.plugins.ciefprt.epg_bulk_hours.value = sel[1]
+                config.plugins.ciefprt.epg_bulk_hours.save()
+                self["status"].setText(f"EPG resolver window: {sel[0]}")
+
+            self.session.openWithCallback(_set_hours, ChoiceBox, title="EPG resolver window", list=hours)
+        elif key == "title_index":
+            config.plugins.ciefprt.title_index.value = not config.plugins.ciefprt.title_index.value
+            config.plugins.ciefprt.title_index.save()
+            if config.plugins.ciefprt.title_index.value:
+                start_title_index()
+            status = "ON" if config.plugins.ciefprt.title_index.value else "OFF"
+            self["status"].setText(f"Offline title index: {status}")
+        elif key == "jitter_probe":
+            config.plugins.ciefprt.jitter_probe.value = not config.plugins.ciefprt.jitter_probe.value
+            config.plugins.ciefprt.jitter_probe.save()
+            if config.plugins.ciefprt.jitter_probe.value:
+                self._jitter.start()
+            else:
+                self._jitter.stop()
+            status = "ON" if config.plugins.ciefprt.jitter_probe.value else "OFF"
+            self["status"].setText(f"Jitter probe: {status} (see Performance stats)")
+        elif key == "log_level":
+            levels = [("Debug", "debug"), ("Info", "info"), ("Warning", "warning"), ("Error", "error")]
+
+            def _set_level(sel):
+                if not sel or self._closing or self._exiting:
+                    return
+                config.plugins.ciefprt.log_level.value = sel[1]
+                config.plugins.ciefprt.log_level.save()
+                LOGGER.set_level(sel[1])
+                self["status"].setText(f"Log level: {sel[0]}")
+
+            self.session.openWithCallback(_set_level, ChoiceBox, title="Select log level", list=levels)
         elif key == "auto_epg":
             config.plugins.ciefprt.auto_epg.value = not config.plugins.ciefprt.auto_epg.value
             config.plugins.ciefprt.auto_epg.save()
@@ -1816,12 +3970,46 @@ class CiefpRTMain(Screen):
             self.session.open(MessageBox, about_text, MessageBox.TYPE_INFO, timeout=15)
 
     # --- Search functions ---
+    def _open_now_on_tv(self):
+        """Bouquet choice, then the ranked Now on TV screen"""
+        try:
+            bouquets = tv_bouquets()
+        except Exception as e:
+            dlog("NOW TV: bouquets: %s" % e, LOG_WARNING)
+            bouquets = []
+        if not bouquets:
+            self["status"].setText("No TV bouquets found")
+            return
+
+        def now_callback(item):
+            if item and not self._closing and not self._exiting:
+                self._load_item_details(item)
+
+        def bouquet_chosen(choice):
+            if choice and not self._closing and not self._exiting:
+                self.session.openWithCallback(now_callback, CiefpRTNowOnTv, choice[1], choice[0])
+
+        if len(bouquets) == 1:
+            bouquet_chosen((bouquets[0][1], bouquets[0][0]))
+            return
+        self.session.openWithCallback(bouquet_chosen, ChoiceBox, title="Now on TV - bouquet",
+                                      list=[(name, ref) for ref, name in bouquets])
+
     def _open_search_dialog(self, search_type="movie"):
         """Open keyboard for search input"""
+        if config.plugins.ciefprt.live_search.value:
+            def live_callback(item):
+                if item and not self._closing and not self._exiting:
+                    self._load_item_details(item)
+
+            self.session.openWithCallback(live_callback, CiefpRTSearch, search_type)
+            return
+
         title = "Search Movies" if search_type == "movie" else "Search Series"
         
         def search_callback(result):
             if result and not self._closing and not self._exiting:
+                self._begin_action("search", result)
                 self["status"].setText(f"Searching: {result}")
                 self["title"].setText(result)
                 self["meta"].setText("Searching...")
@@ -1901,8 +4089,17 @@ class CiefpRTMain(Screen):
             self._open_search_dialog("movie")
         elif choice[1] == "search_series":
             self._open_search_dialog("tv")
+        elif choice[1] == "now_on_tv":
+            self._open_now_on_tv()
+        elif choice[1] == "recordings":
+            def rec_callback(item):
+                if item and not self._closing and not self._exiting:
+                    self._load_item_details(item)
+
+            self.session.openWithCallback(rec_callback, CiefpRTRecordings)
         else:
             url = choice[1]
+            self._begin_action("load list", choice[0])
             self["status"].setText("Loading list...")
             threading.Thread(
                 target=self._thread_wrapper,
@@ -1923,23 +4120,10 @@ class CiefpRTMain(Screen):
             except Exception:
                 max_limit = 150
 
-            # --- BASE /browse/... -> load more paging (HTML ?page=N) ---
+            # --- BASE /browse/... -> load more paging (samo nove stavke) ---
             if url.startswith(BASE + "/browse/"):
-                items = []
-                page = 1
-                has_more = True  # gasi se kad nema novih stavki
-
-                # Učitaj prvu stranu
-                first = parse_browse_api_page(url, page=1, limit=None) or []
-                if first:
-                    items = first
-                else:
-                    # fallback ako parse_browse_api_page iz nekog razloga ne vrati ništa
-                    items = parse_browse(url) or []
-
-                # hard cap odmah
-                if len(items) > max_limit:
-                    items = items[:max_limit]
+                pager = BrowsePager(url)
+                items = pager.next_page()[:max_limit]
 
                 def show_choice():
                     if self._closing or self._exiting:
@@ -1953,12 +4137,14 @@ class CiefpRTMain(Screen):
 
                     # Load more na dnu samo ako:
                     # - još ima prostora do max_limit
-                    # - i has_more je True
-                    if has_more and len(items) < max_limit:
+                    # - i pager ima još strana
+                    if pager.has_more and len(items) < max_limit:
                         choice_list.append((LOAD_MORE_LABEL, {"__load_more__": True}))
+                        # sljedeca strana se ucitava dok korisnik gleda ovu
+                        pager.prefetch()
 
                     def item_chosen(choice):
-                        nonlocal page, has_more, items
+                        nonlocal items
                         if not choice or self._closing or self._exiting:
                             return
 
@@ -1966,48 +4152,18 @@ class CiefpRTMain(Screen):
 
                         # Klik na "Load more..."
                         if isinstance(payload, dict) and payload.get("__load_more__"):
+                            self._begin_action("load more", "page %d" % (pager.pages + 1))
+
                             def load_more_thread():
-                                nonlocal page, has_more, items
+                                nonlocal items
                                 try:
-                                    page += 1
                                     self.ui(lambda: self["status"].setText("Loading more..."))
 
-                                    new_items = parse_browse_api_page(url, page=page, limit=None) or []
-                                    dlog("LOAD MORE: page=%s, got=%s" % (page, len(new_items)))
-
-                                    # Ako nema ništa -> nema više
-                                    if not new_items:
-                                        has_more = False
-                                        self.ui(show_choice)
-                                        return
-
-                                    # RT često vraća kumulativnu listu:
-                                    # page=2 sadrži i page=1 + nove stavke.
-                                    # Zato: ako je lista porasla -> REPLACE, ako nije -> STOP.
-                                    if len(new_items) > len(items):
-                                        items = new_items
-                                    else:
-                                        dlog("LOAD MORE: no new items -> stopping")
-                                        has_more = False
-                                        self.ui(show_choice)
-                                        return
-
-                                    # Dedup po URL (sigurnost)
-                                    seen = set()
-                                    deduped = []
-                                    for it in items:
-                                        u = (it.get("url") or "").strip()
-                                        if not u or u in seen:
-                                            continue
-                                        seen.add(u)
-                                        deduped.append(it)
-                                    items = deduped
+                                    new_items = pager.next_page()
+                                    dlog("LOAD MORE: page=%s (%s), got=%s new" % (pager.pages, pager.source, len(new_items)))
 
                                     # hard cap (settings)
-                                    if len(items) > max_limit:
-                                        items = items[:max_limit]
-                                        has_more = False  # ako smo dostigli limit, nema smisla nuditi još
-
+                                    items = (items + new_items)[:max_limit]
                                     self.ui(show_choice)
 
                                 except Exception as e:
@@ -2032,7 +4188,12 @@ class CiefpRTMain(Screen):
                 self.ui(show_choice)
                 return
 
-            # --- sve ostalo (editorial / search / šta god) ---
+            # --- editorial: prikazi prve stavke odmah, ostatak dopuni ---
+            if "editorial.rottentomatoes.com" in url:
+                self._stream_editorial(url, max_limit)
+                return
+
+            # --- sve ostalo (search / šta god) ---
             items = parse_browse(url) or []
 
             if len(items) > max_limit:
@@ -2059,9 +4220,68 @@ class CiefpRTMain(Screen):
 
             self.ui(show_choice)
 
-        except Exception as e:
-            dlog("BROWSE thread error: %s" % e)
-            self.ui(lambda: self["status"].setText("Browse failed"))
+        except Exception as e:
+            dlog("BROWSE thread error: %s" % e)
+            self.ui(lambda: self["status"].setText("Browse failed"))
+
+    def _stream_editorial(self, url, max_limit):
+        """
+        Runs in the browse thread. Opens the ChoiceBox as soon as the first
+        EDITORIAL_FIRST_BATCH entries are parsed and appends the rest to the
+        open list when the page is done.
+        """
+        state = {"dlg": None, "shown": 0}
+
+        def item_chosen(choice):
+            state["dlg"] = None
+            if not choice or self._closing or self._exiting:
+                return
+            self._load_item_details(choice[1])
+
+        def show(batch, done):
+            if self._closing or self._exiting:
+                return
+            if not batch:
+                self["status"].setText("No items found")
+                return
+            title = "Select (%d items)" % len(batch) if done else "Select (%d items, loading...)" % len(batch)
+            choice_list = [(it.get("name", "???"), it) for it in batch]
+            state["dlg"] = self.session.openWithCallback(item_chosen, ChoiceBox, title=title, list=choice_list)
+            state["shown"] = len(batch)
+            self["status"].setText("Loaded %d items" % len(batch) if done else "Loading list... %d items" % len(batch))
+
+        def append(items):
+            if self._closing or self._exiting:
+                return
+            dlg = state["dlg"]
+            self["status"].setText("Loaded %d items" % len(items))
+            if dlg is None:
+                # korisnik je vec izabrao / zatvorio listu
+                return
+            try:
+                for it in items[state["shown"]:]:
+                    dlg.list.append(ChoiceEntryComponent(key="", text=(it.get("name", "???"), it)))
+                dlg["list"].setList(dlg.list)
+                dlg.setTitle("Select (%d items)" % len(items))
+                state["shown"] = len(items)
+            except Exception as e:
+                dlog("EDITORIAL: list update failed: %s" % e, LOG_WARNING)
+
+        items = []
+        for it in iter_editorial_guide(url, limit=max_limit):
+            if self._closing or self._exiting:
+                return
+            items.append(it)
+            if len(items) == EDITORIAL_FIRST_BATCH:
+                batch = list(items)
+                self.ui(lambda: show(batch, False))
+        if len(items) >= max_limit:
+            dlog("BROWSE: Limited to %d items" % max_limit)
+
+        if len(items) < EDITORIAL_FIRST_BATCH:
+            self.ui(lambda: show(items, True))
+        else:
+            self.ui(lambda: append(items))
 
     # --- Load selected item ---
     def _load_item_details(self, item):
@@ -2074,6 +4294,7 @@ class CiefpRTMain(Screen):
             self.showing_help = False
 
         self.current_item = item
+        self._begin_action("open detail", item.get("name", ""))
         self["title"].setText(item.get("name", ""))
         self["meta"].setText("Loading details...")
         self["score_tomo"].setText("")
@@ -2111,15 +4332,16 @@ class CiefpRTMain(Screen):
                 
             dlog(f"POSTER: Downloading {img_url}")
             ensure_dirs()
-            fn = os.path.join(CACHE_POSTERS, cache_key(img_url) + ".img")
+            fn = poster_path(img_url)
             
             # Check if we have cached version
-            if not os.path.exists(fn):
+            if not poster_cache_hit(fn):
                 if self._closing or self._exiting:
                     return
-                data = http_get(img_url, timeout=8)
-                with open(fn, "wb") as f:
-                    f.write(data)
+                with TRACER.span("poster.download"):
+                    data = http_get(img_url, timeout=8)
+                    with open(fn, "wb") as f:
+                        f.write(data)
                 dlog(f"POSTER: Downloaded and cached {len(data)} bytes")
 
             def decode():
@@ -2129,6 +4351,7 @@ class CiefpRTMain(Screen):
                     w = self["poster"].instance.size().width()
                     h = self["poster"].instance.size().height()
                     self.picload.setPara((w, h, 1, 1, 0, 1, "#00000000"))
+                    self._decode_t0 = (time.monotonic(), TRACER.current())
                     self.picload.startDecode(fn)
                     dlog("POSTER: Decoding started")
                 except Exception as e:
@@ -2153,10 +4376,8 @@ class CiefpRTMain(Screen):
                 return
 
             dlog("DETAIL: %s" % detail_url)
-            raw = get_cached_page(detail_url, ttl=900) or http_get(detail_url, timeout=8)
-            set_cached_page(detail_url, raw)
-            html = raw.decode("utf-8", "ignore")
-            d = parse_detail(html, detail_url)
+            # ocjene odmah, trejler (YouTube / API) naknadno
+            d = load_detail(detail_url, trailer=False)
 
             def apply():
                 if self._closing or self._exiting:
@@ -2211,6 +4432,17 @@ class CiefpRTMain(Screen):
             # IMPORTANT: schedule UI update here (not inside apply)
             self.ui(apply)
 
+            if not d.get("trailer_url"):
+                complete_trailer(d, detail_url)
+
+                def trailer_found():
+                    if self._closing or self._exiting or self.current_detail is not d:
+                        return
+                    self["status"].setText("▶ Trailer available - Press OK for menu")
+
+                if d.get("trailer_url"):
+                    self.ui(trailer_found)
+
         except Exception:
             dlog("DETAIL: EXCEPTION\n%s" % traceback.format_exc())
             if not self._closing and not self._exiting:
@@ -2233,12 +4465,19 @@ class CiefpRTMain(Screen):
         if trailer_url:
             menu.append(("▶ Watch Trailer", "trailer"))
 
-        if d.get("backdrop_url"):
+        # uz media JSON backdrop jos nije ucitan: stranica tek na zahtjev
+        if d.get("backdrop_url") or (d and media_json_url(self.current_item.get("url", ""))):
             menu.append(("Show Backdrop", "backdrop"))
 
         if (d.get("director_list") or d.get("cast_list")):
             menu.append(("Cast & Crew", "castcrew"))
 
+        epg_title = (self._epg_event or {}).get("title")
+        if epg_title:
+            menu.append(("Use this title for EPG '%s'" % epg_title, "epg_pin"))
+            if EPG_MAP.resolve(epg_title, self._epg_event.get("year", ""), self._epg_event.get("channel", "")):
+                menu.append(("Forget EPG match for '%s'" % epg_title, "epg_forget"))
+
         menu.append(("Back to list", "back"))
 
         self.session.openWithCallback(
@@ -2248,27 +4487,52 @@ class CiefpRTMain(Screen):
             list=menu
         )
 
+    def _pin_epg_title(self):
+        """Pin current_item as the RT title for the current EPG event (all channels or this one)"""
+        ev = self._epg_event or {}
+        item = self.current_item
+        if not ev.get("title") or not item:
+            return
+        channel = ev.get("channel", "")
+        scopes = [("On all channels", "")]
+        if channel:
+            scopes.append(("Only on %s" % channel, channel))
+
+        def _pin(sel):
+            if not sel or self._closing or self._exiting:
+                return
+            EPG_MAP.pin(ev["title"], item, ev.get("year", ""), sel[1])
+            save_epg_map()
+            self["status"].setText("EPG '%s' -> %s" % (ev["title"], item.get("name", "")))
+
+        self.session.openWithCallback(_pin, ChoiceBox, title="Use for EPG '%s'" % ev["title"], list=scopes)
+
     def _show_backdrop(self):
         d = getattr(self, "current_detail", {}) or {}
-        url = d.get("backdrop_url") or ""
-        if not url or self._closing or self._exiting:
+        if not d or not self.current_item or self._closing or self._exiting:
             return
 
+        self._begin_action("open backdrop", self.current_item.get("name", ""))
         threading.Thread(
             target=self._thread_wrapper,
-            args=(self._download_and_open_backdrop, url),
+            args=(self._download_and_open_backdrop, d, self.current_item.get("url", "")),
             daemon=True
         ).start()
 
-    def _download_and_open_backdrop(self, url):
+    def _download_and_open_backdrop(self, d, detail_url):
         try:
             if self._closing or self._exiting:
                 return
 
+            url = page_backdrop(detail_url, d)
+            if not url:
+                self.ui(lambda: self["status"].setText("No backdrop for this title"))
+                return
+
             ensure_dirs()
-            fn = os.path.join(CACHE_POSTERS, cache_key(url) + ".bd.jpg")
+            fn = poster_path(url, ".bd.jpg")
 
-            if not os.path.exists(fn):
+            if not poster_cache_hit(fn):
                 data = http_get(url, timeout=10)
                 with open(fn, "wb") as f:
                     f.write(data)
@@ -2313,6 +4577,7 @@ class CiefpRTMain(Screen):
 
     def _open_celebrity(self, name):
         url = BASE + "/celebrity/" + self._to_celebrity_slug(name)
+        self._begin_action("open celebrity", name)
         self.session.open(CiefpRTCelebrity, url, name),
 
     def _item_choice(self, choice):
@@ -2343,6 +4608,15 @@ class CiefpRTMain(Screen):
         elif action == "castcrew":
             self._open_cast_crew()
 
+        elif action == "epg_pin":
+            self._pin_epg_title()
+
+        elif action == "epg_forget":
+            title = self._epg_event.get("title", "")
+            n = EPG_MAP.forget(title)
+            save_epg_map()
+            self["status"].setText("EPG match for '%s' forgotten (%d)" % (title, n))
+
         elif action == "back":
             self.current_item = None
             self.current_detail = {}
@@ -2378,6 +4652,10 @@ class CiefpRTMain(Screen):
 
     def _on_main_close(self):
         """Called when main screen is closed - open player if trailer data exists"""
+        self._dispatcher.close()
+        self._jitter.stop()
+        PARSE_POOL.close()
+
         if hasattr(self, '_trailer_data') and self._trailer_data:
             trailer_url, trailer_type, name = self._trailer_data
             dlog(f"MAIN: Opening player for {name}")
@@ -2408,232 +4686,9 @@ class CiefpRTMain(Screen):
         # Ovdje možete dodati bilo kakvu akciju nakon zatvaranja playera
 
 
-def _extract_jsonld_person(html_text):
-    blocks = re.findall(
-        r'<script[^>]+type="application/ld\+json"[^>]*>(.*?)</script>',
-        html_text, flags=re.S | re.I
-    )
-    for b in blocks:
-        b = (b or "").strip()
-        try:
-            data = json.loads(b)
-        except:
-            continue
-        objs = data if isinstance(data, list) else [data]
-        for obj in objs:
-            if isinstance(obj, dict) and obj.get("@type") == "Person":
-                return obj
-    return None
-
-def parse_celebrity(html):
-    """
-    Parse RottenTomatoes celebrity page (best-effort).
-    - Name (h1 or og:title)
-    - Portrait image from rt-img celebrity-bio hero
-    - Highest/Lowest rated from data-qa blocks
-    - Birthday/Birthplace from data-qa blocks (fallback JSON-LD Person if postoji)
-    - Bio summary from data-qa summary (fallback meta description)
-    """
-
-    out = {
-        "name": "",
-        "image": "",
-        "highest": "",
-        "lowest": "",
-        "birthday": "",
-        "birthplace": "",
-        "bio": ""
-    }
-
-    # ---------------- helpers ----------------
-    def _strip_tags(s):
-        s = re.sub(r"<script\b[^>]*>.*?</script>", " ", s, flags=re.S | re.I)
-        s = re.sub(r"<style\b[^>]*>.*?</style>", " ", s, flags=re.S | re.I)
-        s = re.sub(r"<[^>]+>", " ", s)
-        try:
-            s = _html.unescape(s)
-        except:
-            pass
-        s = re.sub(r"\s+", " ", s).strip()
-        return s
-
-    def _extract_jsonld_person(html_text):
-        blocks = re.findall(
-            r'<script[^>]+type="application/ld\+json"[^>]*>(.*?)</script>',
-            html_text, flags=re.S | re.I
-        )
-        for b in blocks:
-            b = (b or "").strip()
-            try:
-                data = json.loads(b)
-            except:
-                continue
-            objs = data if isinstance(data, list) else [data]
-            for obj in objs:
-                if isinstance(obj, dict) and obj.get("@type") == "Person":
-                    return obj
-        return None
-
-    def _extract_qa_block(html_text, qa_value):
-        m = re.search(
-            r'<[^>]+data-qa="%s"[^>]*>(.*?)</[^>]+>' % re.escape(qa_value),
-            html_text, re.I | re.S
-        )
-        if not m:
-            return ""
-        return m.group(1) or ""
-
-    def _extract_hi_lo(html_text, qa_value):
-        # target is <p class="celebrity-bio__item" data-qa="celebrity-bio-highest-rated">...</p>
-        m = re.search(
-            r'<p[^>]+data-qa="%s"[^>]*>(.*?)</p>' % re.escape(qa_value),
-            html_text, re.I | re.S
-        )
-        if not m:
-            return ""
-
-        block = m.group(1) or ""
-
-        pm = re.search(r'(\d{1,3})\s*%', block)
-        pct = (pm.group(1) + "%") if pm else ""
+def parse_celebrity(html, url=None):
+    return parse_html("celebrity", html, local={"jsonld": lambda: jsonld_doc(html, url)})
 
-        tm = re.search(r'<rt-link[^>]*>(.*?)</rt-link>', block, re.I | re.S)
-        title = _strip_tags(tm.group(1)) if tm else ""
-        title = re.sub(r"\s+", " ", title).strip()
-
-        if pct and title:
-            return "%s %s" % (pct, title)
-        return title or pct
-
-    def _extract_simple_item(html_text, qa_value):
-        # npr: <p ... data-qa="celebrity-bio-bday"> ... Oct 8, 1949 </p>
-        m = re.search(
-            r'<p[^>]+data-qa="%s"[^>]*>(.*?)</p>' % re.escape(qa_value),
-            html_text, re.I | re.S
-        )
-        if not m:
-            return ""
-        block = m.group(1) or ""
-        # izbaci label deo (Birthday: / Birthplace:)
-        block = re.sub(r'<rt-text[^>]*>.*?</rt-text>', ' ', block, flags=re.I | re.S)
-        val = _strip_tags(block)
-        return val
-
-    # ---------------- JSON-LD Person (opciono) ----------------
-    p = _extract_jsonld_person(html)
-    if p:
-        if not out["name"]:
-            out["name"] = (p.get("name") or "").strip()
-
-        # image može biti str/list/dict
-        img = p.get("image")
-        img_url = ""
-        if isinstance(img, str):
-            img_url = img.strip()
-        elif isinstance(img, list):
-            for it in img:
-                if isinstance(it, str) and it.strip():
-                    img_url = it.strip()
-                    break
-                if isinstance(it, dict):
-                    u = it.get("url") or it.get("@id")
-                    if isinstance(u, str) and u.strip():
-                        img_url = u.strip()
-                        break
-        elif isinstance(img, dict):
-            u = img.get("url") or img.get("@id")
-            if isinstance(u, str) and u.strip():
-                img_url = u.strip()
-        if img_url and not out["image"]:
-            out["image"] = img_url
-
-        if not out["birthday"]:
-            out["birthday"] = (p.get("birthDate") or "").strip()
-
-        if not out["birthplace"]:
-            bp = p.get("birthPlace")
-            if isinstance(bp, dict):
-                out["birthplace"] = (bp.get("name") or "").strip()
-            elif isinstance(bp, str):
-                out["birthplace"] = bp.strip()
-
-        if not out["bio"]:
-            desc = p.get("description")
-            if isinstance(desc, str):
-                out["bio"] = desc.strip()
-
-    # ---------------- Name fallbacks ----------------
-    if not out["name"]:
-        m = re.search(r'<h1[^>]*data-qa="celebrity-bio-header"[^>]*>(.*?)</h1>', html, re.I | re.S)
-        if m:
-            out["name"] = _strip_tags(m.group(1))
-
-    if not out["name"]:
-        m = re.search(r'<meta[^>]+property="og:title"[^>]+content="([^"]+)"', html, re.I)
-        if m:
-            t = (m.group(1) or "").strip()
-            out["name"] = t.split("|")[0].strip()
-
-    # ---------------- Portrait image (rt-img hero) ----------------
-    # Primarno: <rt-img class="celebrity-bio__hero-img" src="...">
-    if not out["image"]:
-        m = re.search(r'<rt-img[^>]+class="[^"]*celebrity-bio__hero-img[^"]*"[^>]+src="([^"]+)"', html, re.I)
-        if not m:
-            m = re.search(r'<rt-img[^>]+class="[^"]*celebrity-bio__hero-mobile[^"]*"[^>]+src="([^"]+)"', html, re.I)
-        if m:
-            out["image"] = (m.group(1) or "").strip()
-
-    # Fallback: unutrašnji <img src="...">
-    if not out["image"]:
-        m = re.search(r'celebrity-bio__hero-img[^>]*>.*?<img[^>]+src="([^"]+)"', html, re.I | re.S)
-        if not m:
-            m = re.search(r'celebrity-bio__hero-mobile[^>]*>.*?<img[^>]+src="([^"]+)"', html, re.I | re.S)
-        if m:
-            out["image"] = (m.group(1) or "").strip()
-
-    # OG image fallback (ako sve gore omane)
-    if not out["image"]:
-        m = re.search(r'<meta[^>]+property="og:image"[^>]+content="([^"]+)"', html, re.I)
-        if m:
-            out["image"] = (m.group(1) or "").strip()
-
-    # ---------------- Highest/Lowest rated (data-qa) ----------------
-    out["highest"] = out["highest"] or _extract_hi_lo(html, "celebrity-bio-highest-rated")
-    out["lowest"]  = out["lowest"]  or _extract_hi_lo(html, "celebrity-bio-lowest-rated")
-
-    # ---------------- Birthday / Birthplace (data-qa) ----------------
-    # Ovi blokovi su pouzdaniji od JSON-LD jer daju format "Oct 8, 1949"
-    bday = _extract_simple_item(html, "celebrity-bio-bday")
-    if bday:
-        out["birthday"] = bday
-
-    bplace = _extract_simple_item(html, "celebrity-bio-birthplace")
-    if bplace:
-        out["birthplace"] = bplace
-
-    # ---------------- Bio summary (data-qa) ----------------
-    # Najpouzdanije: <p ... data-qa="celebrity-bio-summary">...</p>
-    if not out["bio"]:
-        m = re.search(r'<p[^>]+data-qa="celebrity-bio-summary"[^>]*>(.*?)</p>', html, re.I | re.S)
-        if m:
-            out["bio"] = _strip_tags(m.group(1))
-
-    # fallback: og:description / meta description
-    if not out["bio"]:
-        m = re.search(r'<meta[^>]+property="og:description"[^>]+content="([^"]+)"', html, re.I)
-        if m:
-            out["bio"] = (m.group(1) or "").strip()
-    if not out["bio"]:
-        m = re.search(r'<meta[^>]+name="description"[^>]+content="([^"]+)"', html, re.I)
-        if m:
-            out["bio"] = (m.group(1) or "").strip()
-
-    # cleanup
-    for k in ("name", "image", "highest", "lowest", "birthday", "birthplace", "bio"):
-        if isinstance(out.get(k), str):
-            out[k] = out[k].strip()
-
-    return out
 
 class CiefpRTBackdrop(Screen):
     skin = """
@@ -2699,16 +4754,19 @@ class CiefpRTCelebrity(Screen):
 
         self.picload = ePicLoad()
         self.picload.PictureData.get().append(self._on_pic_ready)
+        self._dispatcher = UIDispatcher()
+        self._action = TRACER.current()
         self.onLayoutFinish.append(self._start)
+        self.onClose.append(self._dispatcher.close)
 
     def _start(self):
-        threading.Thread(target=self._thread, daemon=True).start()
+        start_thread(self._action, self._thread)
 
     def _thread(self):
         try:
             raw = http_get(self.url, timeout=10)
             html = raw.decode("utf-8", "ignore")
-            d = parse_celebrity(html)
+            d = parse_celebrity(html, self.url)
 
             def apply():
                 name = d.get("name") or self.fallback_name
@@ -2734,11 +4792,7 @@ class CiefpRTCelebrity(Screen):
                 if img:
                     self._download_and_decode(img)
 
-            # tiny ui dispatch
-            t = eTimer()
-            t.callback.append(apply)
-            t.start(1, True)
-            self._celebtimer = t  # keep ref
+            self._dispatcher.post(apply)
 
         except Exception as e:
             dlog("CELEB error: %s" % e)
@@ -2746,8 +4800,8 @@ class CiefpRTCelebrity(Screen):
     def _download_and_decode(self, img_url):
         try:
             ensure_dirs()
-            fn = os.path.join(CACHE_POSTERS, cache_key(img_url) + ".cel.img")
-            if not os.path.exists(fn):
+            fn = poster_path(img_url, ".cel.img")
+            if not poster_cache_hit(fn):
                 data = http_get(img_url, timeout=10)
                 with open(fn, "wb") as f:
                     f.write(data)
@@ -2772,6 +4826,671 @@ class CiefpRTCelebrity(Screen):
             pass
 
 
+SEARCH_DEBOUNCE = 400   # ms bez nove tipke prije upita
+SEARCH_MIN_CHARS = 2
+
+
+class CiefpRTSearch(Screen):
+    """
+    Search as you type. Every edit restarts a debounce timer; when it
+    fires, the cache answers at once (exact query, or a shorter complete
+    query filtered locally) and only a miss asks the autocomplete API.
+    Late answers for an older text are dropped. Closes with the chosen
+    BrowseItem.
+    """
+    skin = """
+    <screen name="CiefpRTSearch" position="center,center" size="1200,860" title="Search" backgroundColor="#011a2e">
+        <widget name="input" position="30,25" size="1140,60" font="Regular;40" foregroundColor="#00ff6e" backgroundColor="#011a2e" />
+        <widget name="status" position="30,95" size="1140,40" font="Regular;26" transparent="1" foregroundColor="#00e1ff" />
+        <widget name="list" position="30,150" size="1140,630" font="Regular;30" itemHeight="45" scrollbarMode="showOnDemand" />
+        <ePixmap pixmap="buttons/red.png" position="30,800" size="35,35" alphatest="blend" />
+        <eLabel text="Close" position="75,795" size="220,45" font="Regular;26" backgroundColor="#011a2e" />
+        <ePixmap pixmap="buttons/green.png" position="320,800" size="35,35" alphatest="blend" />
+        <eLabel text="Full search" position="365,795" size="260,45" font="Regular;26" backgroundColor="#011a2e" />
+        <ePixmap pixmap="buttons/yellow.png" position="650,800" size="35,35" alphatest="blend" />
+        <widget name="filter" position="695,795" size="470,45" font="Regular;26" backgroundColor="#011a2e" />
+    </screen>
+    """
+
+    FILTERS = ((None, "All"), ("movie", "Movies"), ("tv", "Series"))
+
+    def __init__(self, session, search_type=None):
+        Screen.__init__(self, session)
+        self["input"] = Input(text="", maxSize=False, type=Input.TEXT, allMarked=False)
+        self["status"] = Label("Type a title (numbers = SMS input)")
+        self["list"] = MenuList([])
+        self["filter"] = Label("")
+
+        self._filter = [f[0] for f in self.FILTERS].index(search_type) if search_type in ("movie", "tv") else 0
+        self._results = []
+        self._seq = 0
+        self._key_t = None
+        self._closing = False
+        self._dispatcher = UIDispatcher()
+        self._action = TRACER.current()
+
+        self._debounce = eTimer()
+        self._debounce.callback.append(self._lookup)
+
+        keys = dict((str(n), self.keyNumber) for n in range(10))
+        keys.update({
+            "gotAsciiCode": self.keyAscii,
+            "ok": self.keyOk,
+            "back": self.keyCancel,
+            "left": self.keyLeft,
+            "right": self.keyRight,
+            "up": lambda: self["list"].up(),
+            "down": lambda: self["list"].down(),
+            "deleteBackward": self.keyBackspace,
+            "deleteForward": self.keyDelete,
+        })
+        self["actions"] = NumberActionMap(
+            ["WizardActions", "InputBoxActions", "InputAsciiActions", "KeyboardInputActions"], keys, -1)
+        self["colors"] = ActionMap(["ColorActions"], {
+            "red": self.keyCancel,
+            "green": self.keyFullSearch,
+            "yellow": self.keyFilter,
+        }, -1)
+
+        self.onExecBegin.append(self._keyboard_ascii)
+        self.onClose.append(self._on_close)
+        self.onLayoutFinish.append(self._show_filter)
+
+    # --- tastatura ---
+    def _keyboard_ascii(self):
+        try:
+            rc = eRCInput.getInstance()
+            rc.setKeyboardMode(rc.kmAscii)
+        except:
+            pass
+
+    def _edited(self):
+        self._key_t = time.monotonic()
+        self._debounce.start(SEARCH_DEBOUNCE, True)
+
+    def keyNumber(self, number):
+        self["input"].number(number)
+        self._edited()
+
+    def keyAscii(self):
+        self["input"].handleAscii(getPrevAsciiCode())
+        self._edited()
+
+    def keyBackspace(self):
+        self["input"].deleteBackward()
+        self._edited()
+
+    def keyDelete(self):
+        self["input"].delete()
+        self._edited()
+
+    def keyLeft(self):
+        self["input"].left()
+
+    def keyRight(self):
+        self["input"].right()
+
+    def keyFilter(self):
+        self._filter = (self._filter + 1) % len(self.FILTERS)
+        self._show_filter()
+        self._show(self._results)
+
+    def _show_filter(self):
+        self["filter"].setText("Show: %s" % self.FILTERS[self._filter][1])
+
+    def keyOk(self):
+        cur = self["list"].getCurrent()
+        if cur:
+            self.close(cur[1])
+        else:
+            self.keyFullSearch()
+
+    def keyCancel(self):
+        self.close(None)
+
+    # --- pretraga ---
+    def _text(self):
+        return self["input"].getText().strip()
+
+    def _lookup(self, fallback=False):
+        query = self._text()
+        self._seq += 1
+        if len(normalize_query(query)) < SEARCH_MIN_CHARS:
+            self._results = []
+            self._show([])
+            self["status"].setText("Type a title (numbers = SMS input)")
+            return
+
+        cached = SEARCH_CACHE.get(normalize_query(query))
+        if cached is not None:
+            self._done(self._seq, query, cached, "cache")
+            return
+
+        # offline indeks odmah, mreza ih zamijeni kad stigne
+        local = index_search(query, int(config.plugins.ciefprt.max_items.value))
+        if local:
+            self._done(self._seq, query, local, "index")
+            self["status"].setText("%d offline results, searching: %s ..." % (len(local), query))
+        else:
+            self["status"].setText("Searching: %s ..." % query)
+        self._action = begin_action("search" if fallback else "live search", query)
+        start_thread(self._action, self._fetch, self._seq, query, fallback)
+
+    def keyFullSearch(self):
+        self._debounce.stop()
+        if self._key_t is None:
+            self._key_t = time.monotonic()
+        self._lookup(fallback=True)
+
+    def _fetch(self, seq, query, fallback):
+        try:
+            results = search_all(query, fallback=fallback)
+        except Exception as e:
+            dlog("LIVE SEARCH error: %s" % e)
+            results = None
+        self._dispatcher.post(lambda: self._done(seq, query, results, "network"))
+
+    def _done(self, seq, query, results, source):
+        if self._closing or seq != self._seq:
+            return
+        if results is None:
+            self["status"].setText("Live search unavailable - GREEN for full search")
+            return
+
+        self._results = results
+        shown = self._show(results)
+        if self._key_t is not None:
+            dt = time.monotonic() - self._key_t
+            self._key_t = None
+            TRACER.sample("search.keystroke", dt)
+            METRICS.observe("ciefprt_search_keystroke_seconds", dt, source=source)
+            self["status"].setText("%d results for '%s' (%s)" % (shown, query, fmt_ms(dt)))
+        else:
+            self["status"].setText("%d results for '%s'" % (shown, query))
+
+    def _show(self, results):
+        wanted = self.FILTERS[self._filter][0]
+        limit = int(config.plugins.ciefprt.max_items.value)
+        entries = []
+        for r in results:
+            if wanted and r["type"] != wanted:
+                continue
+            label = "%s  [%s]" % (r["name"], "Series" if r["type"] == "tv" else "Movie")
+            if r.get("tomatometer"):
+                label += "  %s%%" % r["tomatometer"]
+            entries.append((label, r))
+            if len(entries) >= limit:
+                break
+        self["list"].setList(entries)
+        return len(entries)
+
+    def _on_close(self):
+        self._closing = True
+        self._debounce.stop()
+        self._dispatcher.close()
+        try:
+            rc = eRCInput.getInstance()
+            rc.setKeyboardMode(rc.kmNone)
+        except:
+            pass
+
+
+class CiefpRTEventInfo(Screen):
+    """
+    Compact overlay for the EPG / event info entry point. Shows what is
+    known without a request (EPG map, offline index, DETAIL_STORE, poster
+    cache) at once, then fetches only what is missing. OK closes with
+    (item, epg) so the caller can open the full CiefpRTMain on it.
+    """
+    skin = """
+    <screen name="CiefpRTEventInfo" position="center,730" size="1200,300" title="Rotten Tomatoes" backgroundColor="#011a2e">
+        <widget name="poster" position="20,20" size="173,260" alphatest="blend" />
+        <widget name="title" position="215,20" size="965,55" font="Regular;40" transparent="1" foregroundColor="#00ff6e" />
+        <widget name="meta" position="215,80" size="965,40" font="Regular;28" transparent="1" foregroundColor="#00e1ff" />
+        <widget name="score_tomo" position="215,130" size="965,40" font="Regular;30" transparent="1" foregroundColor="#00FF4040" />
+        <widget name="score_pop" position="215,175" size="965,40" font="Regular;30" transparent="1" foregroundColor="#00FFD84A" />
+        <widget name="status" position="215,240" size="965,40" font="Regular;24" transparent="1" />
+    </screen>
+    """
+
+    def __init__(self, session, epg=None):
+        Screen.__init__(self, session)
+        self["poster"] = Pixmap()
+        self["title"] = Label((epg or {}).get("title", ""))
+        self["meta"] = Label("")
+        self["score_tomo"] = Label("")
+        self["score_pop"] = Label("")
+        self["status"] = Label("")
+
+        self._epg = epg or {}
+        self._item = None
+        self._img = None
+        self._closing = False
+        self._dispatcher = UIDispatcher()
+        self.picload = ePicLoad()
+        self.picload.PictureData.get().append(self._on_pic_ready)
+
+        self["actions"] = ActionMap(["OkCancelActions", "EPGSelectActions"], {
+            "ok": self.keyOk,
+            "cancel": self.keyCancel,
+            "info": self.keyCancel,
+        }, -1)
+
+        self.onClose.append(self._on_close)
+        self.onLayoutFinish.append(self._start)
+
+    def _start(self):
+        title = self._epg.get("title")
+        if not title:
+            self["status"].setText("No EPG event")
+            return
+        self._action = begin_action("event info", title)
+        # bez mreze: EPG mapa / offline indeks, detalji iz DETAIL_STORE, poster iz kesa
+        item, conf, source = resolve_epg_title(title, self._epg.get("year", ""), self._epg.get("channel", ""),
+                                               network=False)
+        info = None
+        if item:
+            self._show_item(item)
+            info = DETAIL_STORE.get(item["url"])
+            if info is not None:
+                self._show_detail(info)
+            self._show_poster(item.get("image") or (info or {}).get("poster_url"), cached_only=True)
+        if item and info is not None and self._img:
+            self["status"].setText("OK = full details")
+            return
+        self["status"].setText("Loading..." if item else "Searching for: %s" % title)
+        start_thread(self._action, self._fetch_missing, item, info)
+
+    def _fetch_missing(self, item, info):
+        try:
+            if item is None:
+                item, conf, source = resolve_epg_title(self._epg["title"], self._epg.get("year", ""),
+                                                       self._epg.get("channel", ""))
+                if item is None:
+                    self._dispatcher.post(lambda: self["status"].setText("Not found on Rotten Tomatoes"))
+                    return
+                self._dispatcher.post(lambda: self._show_item(item))
+            if info is None:
+                info = load_detail(item["url"], trailer=False)
+                self._dispatcher.post(lambda: self._show_detail(info))
+            img = item.get("image") or info.get("poster_url")
+            if img and not self._img:
+                fetch_poster(img)
+                self._dispatcher.post(lambda: self._show_poster(img))
+            self._dispatcher.post(lambda: self["status"].setText("OK = full details"))
+        except Exception as e:
+            dlog("EVENTINFO: %s" % e, LOG_WARNING)
+            self._dispatcher.post(lambda: self["status"].setText("Load failed - OK = full screen"))
+
+    def _show_item(self, item):
+        if self._closing:
+            return
+        self._item = item
+        self["title"].setText(item.get("name", ""))
+        self["meta"].setText(" ".join(x for x in [item.get("year") or "", self._epg.get("channel", "")] if x))
+        if item.get("tomatometer"):
+            self["score_tomo"].setText("%s%% Tomatometer" % item["tomatometer"])
+
+    def _show_detail(self, d):
+        if self._closing:
+            return
+        meta = ", ".join(x for x in [d.get("mpaa"), d.get("runtime"), d.get("genres")] if x)
+        if meta:
+            self["meta"].setText(meta)
+        self["score_tomo"].setText("%s%% Tomatometer (%s reviews)" % (
+            d.get("tomatometer") or "?", d.get("critic_count") or "?"))
+        self["score_pop"].setText("%s%% Popcornmeter (%s)" % (d.get("popcorn") or "?", d.get("audience_count") or "?"))
+
+    def _show_poster(self, img_url, cached_only=False):
+        if self._closing or not img_url or not self["poster"].instance:
+            return
+        fn = poster_path(img_url)
+        if cached_only and not os.path.exists(fn):
+            return
+        self._img = fn
+        size = self["poster"].instance.size()
+        self.picload.setPara((size.width(), size.height(), 1, 1, 0, 1, "#00000000"))
+        self.picload.startDecode(fn)
+
+    def _on_pic_ready(self, picInfo=None):
+        try:
+            ptr = self.picload.getData()
+            if ptr and self["poster"].instance:
+                self["poster"].instance.setPixmap(ptr)
+        except:
+            pass
+
+    def keyOk(self):
+        self.close((self._item, self._epg) if self._item else (None, self._epg))
+
+    def keyCancel(self):
+        self.close(None)
+
+    def _on_close(self):
+        self._closing = True
+        self._dispatcher.close()
+
+
+class CiefpRTNowOnTv(Screen):
+    """
+    Programmes now running on a bouquet's channels, ranked by critic or
+    audience score. Rows appear as the RateJob workers rate them
+    (redrawn at most every NOW_TV_REDRAW ms). Closes with the chosen
+    BrowseItem.
+    """
+    skin = """
+    <screen name="CiefpRTNowOnTv" position="center,center" size="1400,900" title="Now on TV" backgroundColor="#011a2e">
+        <widget name="status" position="30,20" size="1340,40" font="Regular;28" transparent="1" foregroundColor="#00e1ff" />
+        <widget name="list" position="30,75" size="1340,720" font="Regular;30" itemHeight="45" scrollbarMode="showOnDemand" />
+        <ePixmap pixmap="buttons/red.png" position="30,840" size="35,35" alphatest="blend" />
+        <eLabel text="Close" position="75,835" size="220,45" font="Regular;26" backgroundColor="#011a2e" />
+        <ePixmap pixmap="buttons/yellow.png" position="320,840" size="35,35" alphatest="blend" />
+        <widget name="sort" position="365,835" size="500,45" font="Regular;26" backgroundColor="#011a2e" />
+    </screen>
+    """
+
+    NOW_TV_REDRAW = 300  # ms
+    SORTS = (("tomatometer", "Tomatometer"), ("popcorn", "Popcornmeter"))
+
+    def __init__(self, session, bouquet_ref, bouquet_name=""):
+        Screen.__init__(self, session)
+        self.setTitle("Now on TV - %s" % bouquet_name if bouquet_name else "Now on TV")
+        self["status"] = Label("Reading EPG...")
+        self["list"] = MenuList([])
+        self["sort"] = Label("")
+
+        self._bouquet = bouquet_ref
+        self._rows = []
+        self._total = 0
+        self._done = 0
+        self._finished = False
+        self._sort = 0
+        self._job = None
+        self._closing = False
+        self._dispatcher = UIDispatcher()
+        self._redraw = eTimer()
+        self._redraw.callback.append(self._show)
+
+        self["actions"] = ActionMap(["OkCancelActions", "ColorActions"], {
+            "ok": self.keyOk,
+            "cancel": self.keyCancel,
+            "red": self.keyCancel,
+            "yellow": self.keySort,
+        }, -1)
+
+        self.onClose.append(self._on_close)
+        self.onLayoutFinish.append(self._start)
+
+    def _start(self):
+        self._show_sort()
+        begin_action("now on tv")
+        try:
+            events = now_events(bouquet_services(self._bouquet))
+        except Exception as e:
+            dlog("NOW TV: %s" % e, LOG_WARNING)
+            events = []
+        self._total = len(events)
+        if not events:
+            self["status"].setText("No films or series on air in this bouquet")
+            return
+        self["status"].setText("Rating %d programmes..." % self._total)
+        self._job = RateJob(events, self._result, lambda: self._dispatcher.post(self._job_done))
+        self._job.start()
+
+    def _result(self, ev, rated, failed):
+        # worker thread
+        self._dispatcher.post(lambda: self._add(ev, rated))
+
+    def _add(self, ev, rated):
+        if self._closing:
+            return
+        self._done += 1
+        if rated:
+            item, info = rated
+            self._rows.append((ev, item, info))
+        if not self._redraw.isActive():
+            self._redraw.start(self.NOW_TV_REDRAW, True)
+
+    def _job_done(self):
+        self._finished = True
+        self._show()
+
+    @staticmethod
+    def _score(value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return -1
+
+    def _show(self):
+        if self._closing:
+            return
+        key = self.SORTS[self._sort][0]
+        other = self.SORTS[1 - self._sort][0]
+        rows = sorted(self._rows, key=lambda r: (self._score(r[2].get(key)), self._score(r[2].get(other))),
+                      reverse=True)
+        current = self["list"].getCurrent()
+        lst = []
+        for (ref, channel, title, year), item, info in rows:
+            tomo = info.get("tomatometer") or "--"
+            pop = info.get("popcorn") or "--"
+            name = item.get("name") or title
+            if item.get("year"):
+                name = "%s (%s)" % (name, item["year"])
+            lst.append(("%3s%%  %3s%%   %s  -  %s" % (tomo, pop, name, channel), item))
+        self["list"].setList(lst)
+        if current:
+            for i, row in enumerate(lst):
+                if row[1] is current[1]:
+                    self["list"].moveToIndex(i)
+                    break
+        if self._finished:
+            self["status"].setText("%d of %d programmes rated" % (len(rows), self._total))
+        else:
+            self["status"].setText("Rating... %d/%d (%d found)" % (self._done, self._total, len(rows)))
+
+    def _show_sort(self):
+        self["sort"].setText("Sort: %s" % self.SORTS[self._sort][1])
+
+    def keySort(self):
+        self._sort = 1 - self._sort
+        self._show_sort()
+        self._show()
+
+    def keyOk(self):
+        cur = self["list"].getCurrent()
+        if cur:
+            self.close(cur[1])
+
+    def keyCancel(self):
+        self.close(None)
+
+    def _on_close(self):
+        self._closing = True
+        self._redraw.stop()
+        if self._job:
+            self._job.cancel()
+        self._dispatcher.close()
+
+
+class CiefpRTRecordings(Screen):
+    """
+    Recordings on local storage with their RT scores (REC_INDEX), sorted
+    by Tomatometer, Popcornmeter or title. On open, recordings that are
+    new, changed or due for a retry are rated in the background and
+    appear as they come in. Closes with the chosen BrowseItem.
+    """
+    skin = """
+    <screen name="CiefpRTRecordings" position="center,center" size="1400,900" title="Recordings" backgroundColor="#011a2e">
+        <widget name="status" position="30,20" size="1340,40" font="Regular;28" transparent="1" foregroundColor="#00e1ff" />
+        <widget name="list" position="30,75" size="1340,720" font="Regular;30" itemHeight="45" scrollbarMode="showOnDemand" />
+        <ePixmap pixmap="buttons/red.png" position="30,840" size="35,35" alphatest="blend" />
+        <eLabel text="Close" position="75,835" size="220,45" font="Regular;26" backgroundColor="#011a2e" />
+        <ePixmap pixmap="buttons/yellow.png" position="320,840" size="35,35" alphatest="blend" />
+        <widget name="sort" position="365,835" size="500,45" font="Regular;26" backgroundColor="#011a2e" />
+    </screen>
+    """
+
+    REDRAW = 500  # ms
+    SORTS = (("tomatometer", "Tomatometer"), ("popcorn", "Popcornmeter"), ("title", "Title"))
+
+    def __init__(self, session):
+        Screen.__init__(self, session)
+        self["status"] = Label("Scanning recordings...")
+        self["list"] = MenuList([])
+        self["sort"] = Label("")
+
+        self._sort = 0
+        self._job = None
+        self._mtimes = {}
+        self._total = 0
+        self._done = 0
+        self._rated = 0
+        self._lock = threading.Lock()
+        self._finished = False
+        self._closing = False
+        self._dispatcher = UIDispatcher()
+        self._redraw = eTimer()
+        self._redraw.callback.append(self._show)
+
+        self["actions"] = ActionMap(["OkCancelActions", "ColorActions"], {
+            "ok": self.keyOk,
+            "cancel": self.keyCancel,
+            "red": self.keyCancel,
+            "yellow": self.keySort,
+        }, -1)
+
+        self.onClose.append(self._on_close)
+        self.onLayoutFinish.append(self._start)
+
+    def _start(self):
+        self._show_sort()
+        self._show()
+        dirs = recording_dirs()
+        if not dirs:
+            self["status"].setText("No recording folder found")
+            return
+        start_thread(begin_action("recordings"), self._scan, dirs)
+
+    def _scan(self, dirs):
+        # worker thread: listanje foldera i citanje .meta/.eit
+        try:
+            events, mtimes = pending_recordings(dirs)
+        except Exception as e:
+            dlog("RECORDINGS: scan failed: %s" % e, LOG_WARNING)
+            events, mtimes = [], {}
+        self._dispatcher.post(lambda: self._rate(events, mtimes))
+
+    def _rate(self, events, mtimes):
+        if self._closing:
+            return
+        self._mtimes = mtimes
+        self._total = len(events)
+        if not events:
+            self._finished = True
+            self._show()
+            return
+        self._job = RateJob(events, self._result, lambda: self._dispatcher.post(self._job_done),
+                            workers=REC_WORKERS, gap=REC_GAP, name="recordings")
+        self._job.start()
+        self._show()
+
+    def _result(self, ev, rated, failed):
+        # worker thread: zapis u indeks odmah (nastavak nakon prekida)
+        path, channel, title, year = ev
+        if failed:
+            # greska (offline, pretraga, detalji) nije "nije nadjeno" - ostaje na cekanju
+            self._dispatcher.post(self._progress)
+            return
+        item, info = rated or (None, None)
+        REC_INDEX.put(path, self._mtimes.get(path, 0), title, year, channel, item, info)
+        with self._lock:
+            self._rated += 1
+            save = self._rated % REC_SAVE_EVERY == 0
+        if save:
+            save_recording_index()
+        self._dispatcher.post(self._progress)
+
+    def _progress(self):
+        if self._closing:
+            return
+        self._done += 1
+        if not self._redraw.isActive():
+            self._redraw.start(self.REDRAW, True)
+
+    def _job_done(self):
+        self._finished = True
+        self._show()
+
+    @staticmethod
+    def _score(value):
+        try:
+            return int(value)
+        except (TypeError, ValueError):
+            return -1
+
+    def _show(self):
+        if self._closing:
+            return
+        key = self.SORTS[self._sort][0]
+        rows = REC_INDEX.rows()
+        if key == "title":
+            rows.sort(key=lambda r: (r[1].get("name") or r[1]["title"]).lower())
+        else:
+            rows.sort(key=lambda r: (self._score(r[1].get(key)), (r[1].get("name") or r[1]["title"]).lower()),
+                      reverse=True)
+        current = self["list"].getCurrent()
+        lst = []
+        for path, e in rows:
+            name = e.get("name") or e["title"]
+            year = e.get("item_year") or e.get("year")
+            if year:
+                name = "%s (%s)" % (name, year)
+            lst.append(("%3s%%  %3s%%   %s" % (e.get("tomatometer") or "--", e.get("popcorn") or "--", name),
+                        (path, e)))
+        self["list"].setList(lst)
+        if current:
+            for i, row in enumerate(lst):
+                if row[1][0] == current[1][0]:
+                    self["list"].moveToIndex(i)
+                    break
+        rated = sum(1 for path, e in rows if e.get("url"))
+        if self._finished or not self._total:
+            self["status"].setText("%d recordings, %d rated" % (len(rows), rated))
+        else:
+            self["status"].setText("Rating new recordings... %d/%d" % (self._done, self._total))
+
+    def _show_sort(self):
+        self["sort"].setText("Sort: %s" % self.SORTS[self._sort][1])
+
+    def keySort(self):
+        self._sort = (self._sort + 1) % len(self.SORTS)
+        self._show_sort()
+        self._show()
+
+    def keyOk(self):
+        cur = self["list"].getCurrent()
+        if not cur:
+            return
+        e = cur[1][1]
+        if not e.get("url"):
+            self["status"].setText("Not found on Rotten Tomatoes: %s" % e["title"])
+            return
+        self.close(BrowseItem(e.get("name") or e["title"], e["url"], e.get("image") or "", e.get("item_year") or "",
+                              e.get("type") or ""))
+
+    def keyCancel(self):
+        self.close(None)
+
+    def _on_close(self):
+        self._closing = True
+        self._redraw.stop()
+        if self._job:
+            self._job.cancel()
+        self._dispatcher.close()
+        save_recording_index()
+
+
 class CiefpRTPlayer(Screen):
     """Screen for playing trailers using Movie Player"""
     skin = """
@@ -2816,6 +5535,8 @@ class CiefpRTPlayer(Screen):
             -1
         )
 
+        self._dispatcher = UIDispatcher()
+
         self._startTimer = eTimer()
         self._startTimer.callback.append(self._auto_play)
         self._startTimer.start(1000, True)
@@ -2953,7 +5674,7 @@ class CiefpRTPlayer(Screen):
             import subprocess
 
             cmd = ['yt-dlp', '-f', 'best[height<=720]', '-o', self._downloaded_file, self.trailer_url]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=120)
+            result = run_ytdlp("download", cmd, timeout=120)
 
             if result.returncode == 0 and os.path.exists(self._downloaded_file):
                 file_size = os.path.getsize(self._downloaded_file)
@@ -2986,24 +5707,65 @@ class CiefpRTPlayer(Screen):
         """UI thread dispatcher"""
         if self._closing or self._exiting:
             return
-        # Koristi eTimer za UI ažuriranje
-        timer = eTimer()
-        timer.callback.append(fn)
-        timer.start(1, True)
-        self._ui_timer = timer
+        self._dispatcher.post(fn)
 
     def _on_close(self):
         """Called when player is closed"""
         dlog("TRAILER: Player closed")
+        self._closing = True
+        self._dispatcher.close()
         # Ovdje možete dodati bilo kakvo čišćenje
 
 # ---------- plugin entry ----------
 def main(session, **kwargs):
+    METRICS_EXPORTER.ensure_running()
+    start_title_index()
     session.open(CiefpRTMain)
 
 
+def eventinfo(session, **kwargs):
+    """EPG / event info: compact overlay first, full screen on OK"""
+    METRICS_EXPORTER.ensure_running()
+    start_title_index()
+
+    def _handoff(result):
+        if result:
+            item, epg = result
+            session.open(CiefpRTMain, item=item, epg=epg)
+
+    session.openWithCallback(_handoff, CiefpRTEventInfo, epg_info_for_event(session, **kwargs))
+
+
+def sessionstart(reason, session=None, **kwargs):
+    """enigma2 start: background jobs that work without the plugin open"""
+    if reason != 0:
+        return
+    # metrike od boota, ne tek kad se plugin prvi put otvori
+    METRICS_EXPORTER.ensure_running()
+    if config.plugins.ciefprt.epg_bulk.value:
+        start_title_index()
+        start_epg_bulk()
+    if config.plugins.ciefprt.zap_prefetch.value and session is not None:
+        start_title_index()
+        start_zap_prefetch(session)
+
+
+def autostart(reason, **kwargs):
+    """enigma2 shutdown (reason 1): write the title index while there is still time"""
+    if reason == 1:
+        save_title_index(wait=True)
+
+
 def Plugins(**kwargs):
     return [
+        PluginDescriptor(
+            where=PluginDescriptor.WHERE_SESSIONSTART,
+            fnc=sessionstart
+        ),
+        PluginDescriptor(
+            where=PluginDescriptor.WHERE_AUTOSTART,
+            fnc=autostart
+        ),
         PluginDescriptor(
             name=f"{PLUGIN_NAME} v{PLUGIN_VERSION}",
             description="Browse RottenTomatoes",
@@ -3021,6 +5783,6 @@ def Plugins(**kwargs):
             name=f"{PLUGIN_NAME} EPG",
             description="RottenTomatoes from EPG",
             where=PluginDescriptor.WHERE_EVENTINFO,
-            fnc=main
+            fnc=eventinfo
         )
     ]
\ No newline at end of file
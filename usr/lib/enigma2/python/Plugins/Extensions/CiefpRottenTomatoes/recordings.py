@@ -0,0 +1,197 @@
+# -*- coding: utf-8 -*-
+# Snimci na disku za CiefpRottenTomatoes (bez enigma importa).
+# Naslov snimka se cita iz .ts.meta, pa iz .eit (short event descriptor),
+# pa iz imena fajla; sam .ts se nikad ne otvara. Ocjene se pamte u jednom
+# JSON indeksu (putanja -> naslov, RT url, ocjene), pa se prekinuto
+# ocjenjivanje nastavlja tamo gdje je stalo.
+import os
+import json
+import time
+import threading
+
+REC_EXTS = (".ts",)
+REC_SCAN_DEPTH = 2             # podfoldera ispod svakog foldera snimaka
+REC_RETRY = 7 * 24 * 3600      # nenadjeni naslovi se ponovo traze nakon N s
+REC_INDEX_VERSION = 1
+
+_EIT_SHORT_EVENT = 0x4D
+
+
+def _decode_dvb(raw):
+    """DVB text (optional charset byte first) -> str"""
+    if raw and raw[0] < 0x20:
+        utf8 = raw[0] == 0x15
+        raw = raw[1:]
+        if utf8:
+            return raw.decode("utf-8", "replace")
+    try:
+        return raw.decode("utf-8")
+    except UnicodeDecodeError:
+        return raw.decode("latin-1")
+
+
+def read_meta(ts_path):
+    """(title, description) from the .ts.meta sidecar, ("", "") if missing"""
+    try:
+        with open(ts_path + ".meta", "rb") as f:
+            lines = f.read(4096).decode("utf-8", "replace").splitlines()
+    except OSError:
+        return "", ""
+    # 0: service ref, 1: naslov, 2: opis, 3: vrijeme snimanja, ...
+    title = lines[1].strip() if len(lines) > 1 else ""
+    desc = lines[2].strip() if len(lines) > 2 else ""
+    return title, desc
+
+
+def read_eit_name(ts_path):
+    """Event name from the .eit sidecar (first short event descriptor), "" if missing"""
+    eit = os.path.splitext(ts_path)[0] + ".eit"
+    try:
+        with open(eit, "rb") as f:
+            data = f.read(4096)
+    except OSError:
+        return ""
+    # 12 bajtova zaglavlja (event id, start, trajanje, duzina deskriptora), pa deskriptori
+    pos = 12
+    while pos + 2 <= len(data):
+        tag, size = data[pos], data[pos + 1]
+        body = data[pos + 2:pos + 2 + size]
+        if tag == _EIT_SHORT_EVENT and len(body) >= 4:
+            return _decode_dvb(body[4:4 + body[3]]).strip()
+        pos += 2 + size
+    return ""
+
+
+def filename_title(ts_path):
+    """("Channel", "Title") from "YYYYMMDD HHMM - Channel - Title.ts" names"""
+    base = os.path.splitext(os.path.basename(ts_path))[0]
+    parts = base.split(" - ")
+    if len(parts) >= 3:
+        return parts[1].strip(), " - ".join(parts[2:]).strip()
+    return "", parts[-1].replace("_", " ").strip()
+
+
+def recording_title(ts_path):
+    """(event name, channel) of a recording: .meta, then .eit, then the file name"""
+    channel, name = filename_title(ts_path)
+    title = read_meta(ts_path)[0] or read_eit_name(ts_path)
+    return title or name, channel
+
+
+def scan_recordings(dirs, depth=REC_SCAN_DEPTH):
+    """(path, mtime) of every recording under dirs, up to depth subfolders deep"""
+    seen = set()
+    for top in dirs:
+        top = os.path.realpath(top)
+        stack = [(top, 0)]
+        while stack:
+            folder, level = stack.pop()
+            if folder in seen:
+                continue
+            seen.add(folder)
+            try:
+                entries = list(os.scandir(folder))
+            except OSError:
+                continue
+            for e in entries:
+                try:
+                    if e.is_dir(follow_symlinks=False):
+                        if level < depth and not e.name.startswith("."):
+                            stack.append((e.path, level + 1))
+                    elif e.name.endswith(REC_EXTS):
+                        yield e.path, int(e.stat().st_mtime)
+                except OSError:
+                    continue
+
+
+class RecordingIndex(object):
+    """
+    Recording path -> {mtime, title, year, channel, url, name, type,
+    tomatometer, popcorn, checked}. A recording is pending until it has
+    an RT url for its current mtime; titles not found are tried again
+    after REC_RETRY. Entries for deleted recordings are dropped on the
+    next scan (prune).
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.dirty = False
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._items = {}
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == REC_INDEX_VERSION:
+                self._items = data.get("recordings") or {}
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._items)
+
+    def pending(self, found, now=None):
+        """Paths from scan_recordings() output that still need rating"""
+        now = now or time.time()
+        out = []
+        with self._lock:
+            self._ensure_loaded()
+            for path, mtime in found:
+                e = self._items.get(path)
+                if e is None or e["mtime"] != mtime:
+                    out.append((path, mtime))
+                elif not e.get("url") and now - e.get("checked", 0) > REC_RETRY:
+                    out.append((path, mtime))
+        return out
+
+    def prune(self, found):
+        """Forget recordings that are no longer on disk; returns how many"""
+        keep = set(path for path, mtime in found)
+        with self._lock:
+            self._ensure_loaded()
+            gone = [p for p in self._items if p not in keep]
+            for p in gone:
+                del self._items[p]
+            self.dirty = self.dirty or bool(gone)
+            return len(gone)
+
+    def put(self, path, mtime, title, year="", channel="", item=None, info=None):
+        e = {"mtime": mtime, "title": title, "year": year, "channel": channel, "checked": int(time.time())}
+        if item:
+            e.update(url=item.get("url"), name=item.get("name") or title, item_year=str(item.get("year") or ""),
+                     type=item.get("type") or "", image=item.get("image") or "")
+        if info:
+            e.update(tomatometer=info.get("tomatometer") or "", popcorn=info.get("popcorn") or "")
+        with self._lock:
+            self._ensure_loaded()
+            self._items[path] = e
+            self.dirty = True
+
+    def rows(self):
+        """(path, entry) of every indexed recording"""
+        with self._lock:
+            self._ensure_loaded()
+            return [(p, dict(e)) for p, e in self._items.items()]
+
+    def save(self):
+        with self._lock:
+            if not self.dirty:
+                return False
+            data = json.dumps({"version": REC_INDEX_VERSION, "recordings": self._items}, ensure_ascii=False)
+            self.dirty = False
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp, self.path)
+        except OSError:
+            self.dirty = True
+            raise
+        return True
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+# Kes stranica i postera + HTTP zahtjevi za CiefpRottenTomatoes (bez enigma
+# importa). plugin.py i cli.py koriste iste putanje, imena fajlova i ttl-ove,
+# pa "cli warm" puni tacno one fajlove koje plugin kasnije cita.
+import os
+import re
+import ssl
+import time
+import threading
+import urllib.request
+
+try:
+    from .rtparse import BASE
+except ImportError:  # pokrenut van paketa (komandna linija)
+    from rtparse import BASE
+
+CACHE_DIR = "/tmp/CiefpRottenTomatoes"
+CACHE_PAGES = os.path.join(CACHE_DIR, "pages")
+CACHE_POSTERS = os.path.join(CACHE_DIR, "posters")
+USER_AGENT = "Mozilla/5.0 (Enigma2; CiefpRottenTomatoes)"
+
+# s - koliko stara stranica iz kesa jos vazi
+LIST_TTL = 300       # liste: browse HTML, /napi/browse, editorial
+DETAIL_TTL = 900     # detalji: stranica i media JSON
+
+
+def cache_key(url):
+    return re.sub(r"[^a-zA-Z0-9]+", "_", url).strip("_")
+
+
+def page_path(url, cache_dir=CACHE_DIR):
+    """Page cache file of url (HTML and JSON replies alike)"""
+    return os.path.join(cache_dir, "pages", cache_key(url) + ".html")
+
+
+def poster_path(img_url, suffix=".img", cache_dir=CACHE_DIR):
+    """Poster cache file of an image url; suffix tells poster/backdrop/portrait apart"""
+    return os.path.join(cache_dir, "posters", cache_key(img_url) + suffix)
+
+
+def read_cached(fn, ttl=0):
+    """File bytes if it exists and (ttl > 0) is at most ttl seconds old, else None"""
+    try:
+        if ttl and time.time() - os.path.getmtime(fn) > ttl:
+            return None
+        with open(fn, "rb") as f:
+            return f.read()
+    except OSError:
+        return None
+
+
+def write_cached(fn, data):
+    """Atomic write (a reader never sees half a file); errors are ignored"""
+    tmp = fn + ".tmp%d" % threading.get_ident()
+    try:
+        with open(tmp, "wb") as f:
+            f.write(data)
+        os.replace(tmp, fn)
+    except OSError:
+        try:
+            os.remove(tmp)
+        except OSError:
+            pass
+
+
+def ssl_ctx():
+    ctx = ssl.create_default_context()
+    ctx.check_hostname = False
+    ctx.verify_mode = ssl.CERT_NONE
+    return ctx
+
+
+def rt_request(url):
+    """GET request with the headers RT expects from the plugin"""
+    req = urllib.request.Request(url)
+    req.add_header("User-Agent", USER_AGENT)
+    req.add_header("Accept", "*/*")
+    req.add_header("Referer", BASE + "/")
+    req.add_header("Origin", BASE)
+    return req
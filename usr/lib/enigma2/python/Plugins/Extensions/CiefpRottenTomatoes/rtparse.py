@@ -0,0 +1,1262 @@
+# -*- coding: utf-8 -*-
+# Parseri za RT stranice (bez enigma2 importa).
+# Koristi ih plugin.py u threadu, a parse_worker.py u zasebnom procesu.
+import re
+import json
+import html as _html
+import urllib.parse
+
+BASE = "https://www.rottentomatoes.com"
+
+
+def normalize_rt_url(u):
+    if not u:
+        return None
+
+    u = u.strip()
+
+    # --- FIX za //www.rottentomatoes.com/...
+    if u.startswith("//"):
+        return "https:" + u
+
+    if u.startswith("http"):
+        return u
+    if u.startswith("/"):
+        return BASE + u
+    return BASE + "/" + u
+
+
+# ---------- Records ----------
+# Stavke liste i rezultati parsera su __slots__ objekti (bez __dict__ po
+# stavci), ali se citaju kao dict: it["name"], it.get("image"), "url" in it.
+# URL-ovi idu kroz jednu tabelu, pa lista, dedup set i sljedeca strana
+# dijele isti string.
+URL_TABLE_MAX = 4096
+_URL_TABLE = {}
+
+
+def intern_url(u):
+    """Return the shared copy of url u (the table is reset at URL_TABLE_MAX)"""
+    if not u:
+        return u
+    if len(_URL_TABLE) >= URL_TABLE_MAX:
+        _URL_TABLE.clear()
+    return _URL_TABLE.setdefault(u, u)
+
+
+class Record(object):
+    """
+    Fixed-field record with read/write dict-style access. Fields and
+    defaults come from FIELDS; positional args follow FIELDS order.
+    """
+    __slots__ = ()
+    FIELDS = ()
+    _KEYS = frozenset()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cls._KEYS = frozenset(k for k, _ in cls.FIELDS)
+
+    def __init__(self, *args, **kwargs):
+        for i, (key, default) in enumerate(self.FIELDS):
+            if i < len(args):
+                value = args[i]
+            elif key in kwargs:
+                value = kwargs[key]
+            else:
+                value = list(default) if isinstance(default, list) else default
+            object.__setattr__(self, key, value)
+
+    def __getitem__(self, key):
+        if key not in self._KEYS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __setitem__(self, key, value):
+        if key not in self._KEYS:
+            raise KeyError(key)
+        setattr(self, key, value)
+
+    def get(self, key, default=None):
+        if key not in self._KEYS:
+            return default
+        return getattr(self, key)
+
+    def __contains__(self, key):
+        return key in self._KEYS
+
+    def __iter__(self):
+        return iter(self.__slots__)
+
+    def __len__(self):
+        return len(self.__slots__)
+
+    def keys(self):
+        return list(self.__slots__)
+
+    def values(self):
+        return [getattr(self, k) for k in self.__slots__]
+
+    def items(self):
+        return [(k, getattr(self, k)) for k in self.__slots__]
+
+    def to_dict(self):
+        return dict(self.items())
+
+    def __eq__(self, other):
+        if isinstance(other, Record):
+            other = other.to_dict()
+        return isinstance(other, dict) and self.to_dict() == other
+
+    def __ne__(self, other):
+        return not self.__eq__(other)
+
+    __hash__ = None
+
+    def __reduce__(self):
+        # kompaktno za worker pipe: (klasa, vrijednosti po redu polja)
+        return (self.__class__, tuple(self.values()))
+
+    def __repr__(self):
+        return "%s(%s)" % (self.__class__.__name__, ", ".join("%s=%r" % kv for kv in self.items()))
+
+
+class BrowseItem(Record):
+    """List entry (browse, search, editorial)"""
+    FIELDS = (("name", ""), ("url", ""), ("image", ""), ("year", ""), ("type", ""), ("tomatometer", ""))
+    __slots__ = tuple(k for k, _ in FIELDS)
+
+    def __init__(self, *args, **kwargs):
+        Record.__init__(self, *args, **kwargs)
+        self.url = intern_url(self.url)
+
+
+class DetailInfo(Record):
+    """Movie/TV detail page; page_title/page_year are set only when there is no trailer"""
+    FIELDS = (
+        ("mpaa", ""), ("status", ""), ("runtime", ""), ("genres", ""), ("synopsis", ""),
+        ("director", ""), ("cast", ""), ("director_list", []), ("cast_list", []),
+        ("poster_url", ""), ("backdrop_url", ""),
+        ("tomatometer", ""), ("critic_count", ""), ("popcorn", ""), ("audience_count", ""),
+        ("trailer_url", ""), ("trailer_type", ""),
+        ("page_title", ""), ("page_year", ""),
+    )
+    __slots__ = tuple(k for k, _ in FIELDS)
+
+
+class CelebrityInfo(Record):
+    """Celebrity page"""
+    FIELDS = (("name", ""), ("image", ""), ("highest", ""), ("lowest", ""),
+              ("birthday", ""), ("birthplace", ""), ("bio", ""))
+    __slots__ = tuple(k for k, _ in FIELDS)
+
+
+# za unpickle worker odgovora (klase po imenu)
+RECORD_TYPES = dict((c.__name__, c) for c in (BrowseItem, DetailInfo, CelebrityInfo))
+
+
+# ---------- JSON-LD ----------
+_JSONLD_BLOCK_RE = re.compile(r'<script[^>]+type="application/ld\+json"[^>]*>(.*?)</script>', re.S | re.I)
+
+
+class JsonLdDoc(object):
+    """
+    All JSON-LD objects of one page, decoded once. Top-level lists are
+    flattened, objects are indexed by @type and keep page order.
+    """
+    __slots__ = ("objects", "_by_type")
+
+    def __init__(self, objects=()):
+        self.objects = [o for o in objects if isinstance(o, dict)]
+        self._by_type = {}
+        for i, obj in enumerate(self.objects):
+            t = obj.get("@type")
+            for name in (t if isinstance(t, list) else [t]):
+                if isinstance(name, str):
+                    self._by_type.setdefault(name, []).append(i)
+
+    @classmethod
+    def from_html(cls, html):
+        return cls.from_blocks(_JSONLD_BLOCK_RE.findall(html))
+
+    @classmethod
+    def from_blocks(cls, blocks):
+        objects = []
+        for b in blocks:
+            try:
+                data = json.loads((b or "").strip())
+            except:
+                continue
+            if isinstance(data, list):
+                objects.extend(data)
+            else:
+                objects.append(data)
+        return cls(objects)
+
+    def all(self, *types):
+        idx = sorted(i for t in types for i in self._by_type.get(t, ()))
+        return [self.objects[i] for i in idx]
+
+    def first(self, *types):
+        idx = [self._by_type[t][0] for t in types if t in self._by_type]
+        return self.objects[min(idx)] if idx else None
+
+
+# ---------- Search page parser ----------
+# Jedan linearan prolaz kroz BASE/search: <search-page-media-row> (novi
+# layout), <search-results-item> (stari layout), a JSON-LD ItemList samo
+# ako stranica nema ni jedne ni druge stavke.
+_SEARCH_TAG_RE = re.compile(r'<(search-page-media-row|search-results-item|script)\b([^>]*)>', re.I)
+_SEARCH_END_RE = {
+    "search-page-media-row": re.compile(r'</search-page-media-row>', re.I),
+    "search-results-item": re.compile(r'</search-results-item>', re.I),
+}
+_SEARCH_INNER_RE = re.compile(r'<(a|img|rt-text)\b([^>]*)>', re.I)
+_ATTR_RE = re.compile(r'([\w:.-]+)\s*=\s*"([^"]*)"')
+_HREF_RE = re.compile(r'\bhref="([^"]+)"', re.I)
+_SRC_RE = re.compile(r'\bsrc="([^"]+)"', re.I)
+_TAGS_RE = re.compile(r'<[^>]+>')
+_WS_RE = re.compile(r'\s+')
+_RELEASE_YEAR_RE = re.compile(r'\b(19\d{2}|20\d{2})\b')
+_A_END_RE = re.compile(r'</a>', re.I)
+
+
+def rt_media_type(url):
+    """"movie" / "tv" for an RT title url (absolute or relative), else "" """
+    u = normalize_rt_url(url) or ""
+    if u.startswith(BASE):
+        u = u[len(BASE):]
+    if u.startswith("/m/"):
+        return "movie"
+    if u.startswith("/tv/"):
+        return "tv"
+    return ""
+
+
+def _attrs(s):
+    return dict((k.lower(), v) for k, v in _ATTR_RE.findall(s))
+
+
+def _clean_text(s):
+    return _WS_RE.sub(' ', _TAGS_RE.sub('', s)).strip()
+
+
+def _search_result(href, title, year, image, score=""):
+    if not href or not title:
+        return None
+    media_type = rt_media_type(href)
+    if not media_type:
+        return None
+    return BrowseItem(f"{title} ({year})" if year else title, normalize_rt_url(href),
+                      image, year, media_type, score)
+
+
+def _media_row(html, attrs, start, end):
+    # podaci su u atributima, link/naslov/slika u unutrasnjim tagovima
+    a = _attrs(attrs)
+    href = image = ""
+    titles = {}
+    for m in _SEARCH_INNER_RE.finditer(html, start, end):
+        tag = m.group(1).lower()
+        ta = m.group(2)
+        if tag == "img":
+            if not image:
+                im = _SRC_RE.search(ta)
+                image = im.group(1).strip() if im else ""
+        elif tag == "a":
+            if not href:
+                hm = _HREF_RE.search(ta)
+                href = hm.group(1).strip() if hm else ""
+            # naslov: data-qa="info-name", inace slot="title"
+            for key in ("info-name" if 'data-qa="info-name"' in ta else None,
+                        "title" if 'slot="title"' in ta else None):
+                if key and key not in titles:
+                    e = _A_END_RE.search(html, m.end(), end)
+                    titles[key] = _clean_text(html[m.end():e.start()]) if e else ""
+    title = titles.get("info-name") or titles.get("title") or ""
+
+    # Godina iz release-year (film) / start-year (serija) ili iz naslova
+    year = (a.get("release-year") or a.get("start-year") or "").strip()
+    if not year:
+        year_match = _YEAR_RE.search(title)
+        if year_match:
+            year = year_match.group(1)
+            title = re.sub(r'\s*\(\d{4}\)\s*$', '', title).strip()
+
+    return _search_result(href, title, year, image, a.get("tomatometer-score", "").strip())
+
+
+def _results_item(html, start, end):
+    href_m = _HREF_RE.search(html, start, end)
+    title = image = ""
+    for m in _SEARCH_INNER_RE.finditer(html, start, end):
+        tag = m.group(1).lower()
+        if tag == "rt-text" and not title and 'slot="title"' in m.group(2).lower():
+            lt = html.find("<", m.end(), end)
+            if lt > m.end() and _RT_TEXT_END_RE.match(html, lt):
+                title = html[m.end():lt].strip()
+        elif tag == "img" and not image:
+            im = _SRC_RE.search(m.group(2))
+            if im:
+                image = im.group(1).strip()
+    ym = _RELEASE_YEAR_RE.search(html, start, end)
+    return _search_result(href_m.group(1).strip() if href_m else "", title, ym.group(1) if ym else "", image)
+
+
+def iter_search_results(html, search_type=None):
+    """
+    Yield search results in page order from one pass over the page: movie
+    and tv together, or only search_type ("movie"/"tv"). Each result has
+    name/url/image/year plus type and tomatometer ("" if unknown).
+    """
+    seen = set()
+    ld_blocks = []
+    unclosed = set()
+    pos = 0
+    while True:
+        m = _SEARCH_TAG_RE.search(html, pos)
+        if not m:
+            break
+        tag = m.group(1).lower()
+        pos = m.end()
+
+        if tag == "script":
+            e = _SCRIPT_END_RE.search(html, pos)
+            if not e:
+                break
+            if _JSONLD_ATTR_RE.match(m.group(2)):
+                ld_blocks.append(html[pos:e.start()])
+            pos = e.end()
+            continue
+
+        # nema zatvarajuceg taga (odsjecena stranica) - nema ga ni dalje
+        e = None if tag in unclosed else _SEARCH_END_RE[tag].search(html, pos)
+        if not e:
+            unclosed.add(tag)
+            continue
+        if tag == "search-page-media-row":
+            item = _media_row(html, m.group(2), pos, e.start())
+        else:
+            item = _results_item(html, pos, e.start())
+        pos = e.end()
+
+        if item and item["url"] not in seen:
+            seen.add(item["url"])
+            if not search_type or item["type"] == search_type:
+                yield item
+
+    # --- JSON-LD ItemList (stranica bez ijedne stavke) ---
+    if seen or not ld_blocks:
+        return
+    for data in JsonLdDoc.from_blocks(ld_blocks).all("ItemList"):
+        items = data.get("itemListElement", [])
+        for it in (items if isinstance(items, list) else []):
+            if not isinstance(it, dict):
+                continue
+            item = _search_result((it.get("url") or "").strip(), (it.get("name") or "").strip(), "", "")
+            if item and item["url"] not in seen:
+                seen.add(item["url"])
+                if not search_type or item["type"] == search_type:
+                    yield item
+
+
+# ---------- Autocomplete (/api/autocomplete) ----------
+_QUERY_PUNCT_RE = re.compile(r"[^\w\s]+", re.U)
+
+
+def normalize_query(q):
+    """Cache key for a search: case-folded, & -> and, no punctuation, single spaces"""
+    q = (q or "").casefold().replace("&", " and ")
+    q = _QUERY_PUNCT_RE.sub(" ", q)
+    return _WS_RE.sub(" ", q).strip()
+
+
+def query_matches(key, text):
+    """True if every word of key (a normalize_query result) starts a word of text"""
+    words = normalize_query(text).split()
+    return all(any(w.startswith(q) for w in words) for q in key.split())
+
+
+def parse_autocomplete(data):
+    """
+    Movies and TV series of one autocomplete reply as typed BrowseItems,
+    movies first. Raises ValueError if data is not an autocomplete reply.
+    """
+    if not isinstance(data, dict) or not ("movies" in data or "tvSeries" in data):
+        raise ValueError("not an autocomplete reply")
+
+    results = []
+    for key, year_key, media_type in (("movies", "year", "movie"), ("tvSeries", "startYear", "tv")):
+        entries = data.get(key)
+        for it in (entries if isinstance(entries, list) else []):
+            if not isinstance(it, dict):
+                continue
+            name = (it.get("name") or "").strip()
+            url = normalize_rt_url(it.get("url"))
+            if not name or not url:
+                continue
+            year = str(it.get(year_key) or "")
+            score = it.get("meterScore")
+            results.append(BrowseItem(f"{name} ({year})" if year else name, url, it.get("image") or "",
+                                      year, media_type, str(score) if score not in (None, "") else ""))
+    return results
+
+
+# ---------- Browse JSON (/napi/browse/...) ----------
+def browse_napi_url(browse_url, cursor=""):
+    """
+    Cursor JSON endpoint for a BASE/browse/... list, or None:
+    /browse/movies_at_home/sort:popular -> /napi/browse/movies_at_home/sort:popular?after=...
+    """
+    parts = urllib.parse.urlsplit(browse_url or "")
+    if not parts.path.startswith("/browse/"):
+        return None
+    q = urllib.parse.parse_qs(parts.query)
+    q.pop("page", None)
+    q.pop("after", None)
+    if cursor:
+        q["after"] = [cursor]
+    return urllib.parse.urlunsplit((parts.scheme or "https", parts.netloc or BASE.split("//", 1)[1],
+                                    "/napi" + parts.path, urllib.parse.urlencode(q, doseq=True), ""))
+
+
+def browse_page_url(browse_url, page=1):
+    """HTML ?page=N of a BASE/browse/... list; page 1 has no page parameter"""
+    parts = urllib.parse.urlsplit(browse_url)
+    q = urllib.parse.parse_qs(parts.query)
+    if page > 1:
+        q["page"] = [str(page)]
+    else:
+        q.pop("page", None)
+    return urllib.parse.urlunsplit((parts.scheme, parts.netloc, parts.path,
+                                    urllib.parse.urlencode(q, doseq=True), parts.fragment))
+
+
+def itemlist_entries(doc):
+    """itemListElement of the first JSON-LD ItemList (JsonLdDoc of a list page), [] if none"""
+    for obj in doc.all("ItemList"):
+        ile = obj.get("itemListElement")
+        if isinstance(ile, dict) and "itemListElement" in ile:
+            return ile.get("itemListElement", [])
+        if isinstance(ile, list):
+            return ile
+    return []
+
+
+def itemlist_browse_items(entries):
+    """BrowseItems of ItemList entries; entries without a name or RT url are skipped"""
+    out = []
+    for it in entries:
+        if not isinstance(it, dict):
+            continue
+        name = (it.get("name") or "").strip()
+        item_url = normalize_rt_url(it.get("url"))
+        if name and item_url:
+            out.append(BrowseItem(name, item_url, it.get("image") or "", type=rt_media_type(item_url)))
+    return out
+
+
+def parse_browse_napi(data):
+    """
+    One decoded /napi/browse reply -> (items, end_cursor, has_next).
+    Raises ValueError if the reply has no browse grid.
+    """
+    grid = data.get("grid") if isinstance(data, dict) else None
+    if not isinstance(grid, dict) or not isinstance(grid.get("list"), list):
+        raise ValueError("no browse grid")
+
+    items = []
+    for it in grid["list"]:
+        if not isinstance(it, dict):
+            continue
+        name = (it.get("title") or "").strip()
+        item_url = normalize_rt_url(it.get("mediaUrl"))
+        if not name or not item_url:
+            continue
+        ym = _RELEASE_YEAR_RE.search(it.get("releaseDateText") or "")
+        score = it.get("criticsScore")
+        score = score.get("score") if isinstance(score, dict) else ""
+        items.append(BrowseItem(name, item_url, (it.get("posterUri") or "").strip(),
+                                ym.group(1) if ym else "", rt_media_type(item_url),
+                                str(score) if score not in (None, "") else ""))
+
+    info = data.get("pageInfo")
+    info = info if isinstance(info, dict) else {}
+    cursor = info.get("endCursor") or ""
+    return items, cursor, bool(info.get("hasNextPage")) and bool(cursor)
+
+
+# ---------- Editorial guide parser ----------
+# Linearan prolaz: trazimo pocetak bloka (div countdown-index-N), pa kraj
+# bloka od te pozicije, i nastavljamo iza njega. Nema lazy (.*?) uzoraka
+# koji na stranici bez zavrsetka skeniraju do kraja za svaki pokusaj.
+_COUNTDOWN_START_RE = re.compile(r'<div[^>]+id="countdown-index-\d+"[^>]+class="[^"]*block-countdown[^"]*"[^>]*>', re.I)
+_COUNTDOWN_END_RE = re.compile(r'</div>\s*(?:<br>|</div>|$)', re.I)
+_POSTER_HREF_RE = re.compile(r'<a[^>]+class="[^"]*poster-wrapper[^"]*"[^>]+href="([^"]+)"', re.I)
+_POSTER_IMG_RE = re.compile(r'<img[^>]+class="[^"]*article_poster[^"]*"[^>]+src="([^"]+)"', re.I)
+_META_TITLE_RE = re.compile(r'<a[^>]+class="[^"]*meta-title[^"]*"[^>]*>(.*?)</a>', re.I | re.S)
+
+# stari <article data-rank> raspored (fallback), dio po dio
+_ARTICLE_START_RE = re.compile(r'<article[^>]*data-rank[^>]*>', re.I)
+_ARTICLE_HREF_RE = re.compile(r'<a[^>]+href="([^"]+)"[^>]*>', re.I)
+_ARTICLE_IMG_RE = re.compile(r'<img[^>]+src="([^"]+)"[^>]*>', re.I)
+_ARTICLE_TITLE_RE = re.compile(r'<h[23][^>]*>(.*?)</h[23]>', re.I | re.S)
+
+
+def _editorial_item(href, img, title, seen_urls):
+    title = re.sub(r'<[^>]+>', '', title)
+    title = re.sub(r'\s+', ' ', title).strip()
+    if not href or not title:
+        return None
+
+    # --- Izdvoji godine ako postoje u naslovu ---
+    year = ""
+    year_match = _YEAR_RE.search(title)
+    if year_match:
+        year = year_match.group(1)
+        title = re.sub(r'\s*\(\d{4}\)', '', title).strip()
+
+    # --- Spriječi duplikate ---
+    item_url = normalize_rt_url(href)
+    if item_url in seen_urls:
+        return None
+    seen_urls.add(item_url)
+
+    return BrowseItem(f"{title} ({year})" if year else title, item_url, img, year, rt_media_type(item_url))
+
+
+def _iter_countdown_blocks(html):
+    pos = 0
+    while True:
+        m = _COUNTDOWN_START_RE.search(html, pos)
+        if not m:
+            return
+        pos = m.end()
+        e = _COUNTDOWN_END_RE.search(html, pos)
+        if not e:
+            # ni jedan kasniji blok nema kraj
+            return
+        yield html[pos:e.start()]
+        pos = e.end()
+
+
+def _iter_articles(html):
+    pos = 0
+    while True:
+        m = _ARTICLE_START_RE.search(html, pos)
+        if not m:
+            return
+        a = _ARTICLE_HREF_RE.search(html, m.end())
+        i = a and _ARTICLE_IMG_RE.search(html, a.end())
+        h = i and _ARTICLE_TITLE_RE.search(html, i.end())
+        if not h:
+            return
+        yield a.group(1), i.group(1), h.group(1)
+        pos = h.end()
+
+
+def iter_editorial_items(html, limit=0):
+    """
+    Yield editorial guide entries in page order. The page is scanned once,
+    so a caller can show the first entries before the rest is parsed.
+    limit > 0 stops after that many entries.
+    """
+    seen_urls = set()
+    found = 0
+
+    # --- block-countdown divovi (glavni kontejner za svaku stavku) ---
+    for block in _iter_countdown_blocks(html):
+        href_match = _POSTER_HREF_RE.search(block)
+        if not href_match:
+            continue
+        title_match = _META_TITLE_RE.search(block)
+        if not title_match:
+            continue
+        img_match = _POSTER_IMG_RE.search(block)
+        item = _editorial_item(
+            (href_match.group(1) or "").strip(),
+            (img_match.group(1) or "").strip() if img_match else "",
+            (title_match.group(1) or "").strip(),
+            seen_urls
+        )
+        if item:
+            found += 1
+            yield item
+            if found == limit:
+                return
+
+    # --- Ako nismo našli ništa, probaj sa <article> elementima (stari način) ---
+    if not found:
+        for href, img, title in _iter_articles(html):
+            item = _editorial_item((href or "").strip(), (img or "").strip(), (title or "").strip(), seen_urls)
+            if item:
+                found += 1
+                yield item
+                if found == limit:
+                    return
+
+
+# ---------- Detail parser (media-scorecard-json + metadata slots) ----------
+# Jedan linearan prolaz kroz stranicu: master regex staje samo na tagovima
+# koji nas zanimaju, a atributi se provjeravaju malim regexima nad samim
+# tagom (bez backtrackinga preko cijele stranice).
+_DETAIL_TAG_RE = re.compile(r'<(?=[mMrRsStTvV])(meta|rt-img|script|rt-text|video|title)([^>]*)>', re.I)
+_SCRIPT_END_RE = re.compile(r'</script>', re.I)
+_TITLE_END_RE = re.compile(r'</title>', re.I)
+_RT_TEXT_END_RE = re.compile(r'</rt-text>', re.I)
+
+_OG_IMAGE_ATTR_RE = re.compile(r'[^>]+property="og:image"[^>]+content="([^"]+)"', re.I)
+_OG_TITLE_ATTR_RE = re.compile(r'[^>]+property="og:title"[^>]+content="([^"]+)"', re.I)
+_ICONIC_ATTR_RE = re.compile(r'[^>]+slot="iconic"[^>]+src="([^"]+)"', re.I)
+_SCORECARD_ATTR_RE = re.compile(r'[^>]+id="media-scorecard-json"', re.I)
+_JSONLD_ATTR_RE = re.compile(r'[^>]+type="application/ld\+json"', re.I)
+_PROP_ATTR_RE = re.compile(r'[^>]+slot="metadata-(prop|genre)"', re.I)
+_VIDEO_SOURCES_ATTR_RE = re.compile(r'[^>]+data-sources="([^"]+)"', re.I)
+_VIDEO_SRC_ATTR_RE = re.compile(r'[^>]+src="([^"]+)"', re.I)
+
+# fallbacki nad slobodnim tekstom (samo ako strukturirana polja ne daju rezultat)
+_STREAM_EXT_RE = re.compile(r'\.(?:m3u8|ts)', re.I)
+_URL_START_RE = re.compile(r'https?://', re.I)
+_URL_RUN_RE = re.compile(r'https?://[^\s"\']+', re.I)
+_URL_BREAK_RE = re.compile(r'[\s"\']')
+_YEAR_RE = re.compile(r'\((\d{4})\)')
+
+
+def find_stream_url(html):
+    """
+    First URL containing .m3u8/.ts - same result as
+    re.search(r'(https?://[^\s"']+\.(?:m3u8|ts)[^\s"']*)', html) but without
+    backtracking over every URL on the page: jump to each extension hit and
+    look for the URL start only inside its run. The run start is carried
+    forward from hit to hit, so the page is scanned once.
+    """
+    run_start = seen = 0
+    for ext in _STREAM_EXT_RE.finditer(html):
+        q = ext.start()
+        # zadnji prekid (razmak / navodnik) izmedju prosle i ove pozicije
+        for b in _URL_BREAK_RE.finditer(html, seen, q):
+            run_start = b.end()
+        seen = q
+        for u in _URL_START_RE.finditer(html, run_start, q):
+            if u.end() < q:
+                return _URL_RUN_RE.match(html, u.start()).group(0)
+    return None
+
+
+def scan_detail_page(html):
+    """
+    Collect every structured field parse_detail needs in a single pass over
+    the page. Returns raw values (strings / lists), interpretation is in
+    parse_detail.
+    """
+    og_image = og_title = iconic = ""
+    title = scorecard = video_sources = video_src = None
+    props = []
+    genres = []
+    jsonld = []
+
+    for m in _DETAIL_TAG_RE.finditer(html):
+        tag = m.group(1).lower()
+        attrs = m.group(2)
+
+        if tag == "rt-text":
+            a = _PROP_ATTR_RE.match(attrs)
+            if a:
+                lt = html.find("<", m.end())
+                if lt > m.end() and _RT_TEXT_END_RE.match(html, lt):
+                    val = html[m.end():lt].strip()
+                    if val:
+                        (props if a.group(1).lower() == "prop" else genres).append(val)
+
+        elif tag == "script":
+            is_ld = _JSONLD_ATTR_RE.match(attrs)
+            is_sc = scorecard is None and _SCORECARD_ATTR_RE.match(attrs)
+            if is_ld or is_sc:
+                e = _SCRIPT_END_RE.search(html, m.end())
+                if e:
+                    body = html[m.end():e.start()]
+                    if is_ld:
+                        jsonld.append(body)
+                    if is_sc:
+                        body = body.strip()
+                        if body.startswith("{") and body.endswith("}"):
+                            scorecard = body
+
+        elif tag == "meta":
+            if not og_image:
+                a = _OG_IMAGE_ATTR_RE.match(attrs)
+                if a:
+                    og_image = a.group(1)
+            if not og_title:
+                a = _OG_TITLE_ATTR_RE.match(attrs)
+                if a:
+                    og_title = a.group(1)
+
+        elif tag == "rt-img":
+            if not iconic:
+                a = _ICONIC_ATTR_RE.match(attrs)
+                if a:
+                    iconic = a.group(1)
+
+        elif tag == "video":
+            if video_sources is None:
+                a = _VIDEO_SOURCES_ATTR_RE.match(attrs)
+                if a:
+                    video_sources = a.group(1)
+            if video_src is None:
+                a = _VIDEO_SRC_ATTR_RE.match(attrs)
+                if a:
+                    video_src = a.group(1)
+
+        elif tag == "title":
+            # kao r'<title>(.*?)</title>' bez re.S - bez atributa, u jednom redu
+            if title is None and not attrs:
+                e = _TITLE_END_RE.search(html, m.end())
+                if e and "\n" not in html[m.end():e.start()]:
+                    title = html[m.end():e.start()]
+
+    return {
+        "og_image": og_image,
+        "og_title": og_title,
+        "title": title,
+        "iconic": iconic,
+        "scorecard": scorecard,
+        "props": props,
+        "genres": genres,
+        "jsonld": jsonld,
+        "video_sources": video_sources,
+        "video_src": video_src,
+    }
+
+
+JSONLD_MEDIA_TYPES = ("Movie", "TVSeries", "TVSeason", "TVEpisode")
+
+
+def _title_year_from_scan(html, scan):
+    title = ""
+    year = ""
+
+    # Pokušaj izvući iz title taga
+    if scan["title"] is not None:
+        title = scan["title"].strip()
+        # Očisti " - Rotten Tomatoes" i slično
+        title = re.sub(r'\s*[-|]\s*Rotten Tomatoes.*$', '', title, flags=re.I)
+        title = re.sub(r'\s*[-|]\s*TV.*$', '', title, flags=re.I)
+
+    # Ako nema title, pokušaj iz og:title
+    if not title and scan["og_title"]:
+        title = scan["og_title"].strip()
+        title = re.sub(r'\s*[-|]\s*Rotten Tomatoes.*$', '', title, flags=re.I)
+
+    # Izvuci godinu
+    year_match = _YEAR_RE.search(html)
+    if year_match:
+        year = year_match.group(1)
+    else:
+        # Pokušaj iz title-a
+        year_match = re.search(r'\((\d{4})\)', title)
+        if year_match:
+            year = year_match.group(1)
+            title = re.sub(r'\s*\(\d{4}\)\s*$', '', title)
+
+    # Očisti title
+    title = title.strip()
+    title = re.sub(r'\s+', ' ', title)
+
+    return title, year
+
+
+def extract_title_from_html(html):
+    """Extract title and year from RT page HTML"""
+    return _title_year_from_scan(html, scan_detail_page(html))
+
+
+def _apply_scorecard(info, data):
+    # media-scorecard-json format (isti kljucevi i u JSON backendu)
+    critics = data.get("criticsScore", {}) or {}
+    audience = data.get("audienceScore", {}) or {}
+
+    info["tomatometer"] = str(critics.get("scorePercent", "") or "")
+    info["critic_count"] = str(critics.get("reviewCount", "") or "")
+
+    info["popcorn"] = str(audience.get("scorePercent", "") or "")
+    info["audience_count"] = str(audience.get("bandedRatingCount", "") or audience.get("ratingCount", "") or "")
+
+    if data.get("description"):
+        info["synopsis"] = (data.get("description") or "").strip()
+
+
+def _apply_people(info, j):
+    # schema.org Movie/TVSeries: director / actor
+    directors = j.get("director")
+    dir_names = []
+    if isinstance(directors, dict) and directors.get("name"):
+        dir_names = [directors.get("name")]
+    elif isinstance(directors, list):
+        dir_names = [d.get("name", "") for d in directors if isinstance(d, dict)]
+    dir_names = [n for n in dir_names if n]
+    info["director_list"] = dir_names
+    if dir_names:
+        info["director"] = ", ".join(dir_names[:2])
+
+    actors = j.get("actor") or j.get("actors")
+    cast_names = []
+    if isinstance(actors, dict) and actors.get("name"):
+        cast_names = [actors.get("name")]
+    elif isinstance(actors, list):
+        for a in actors:
+            if isinstance(a, dict) and a.get("name"):
+                cast_names.append(a["name"])
+    cast_names = [x for x in cast_names if x]
+    info["cast_list"] = cast_names
+    if cast_names:
+        info["cast"] = ", ".join(cast_names[:8])
+
+
+def parse_detail_page(html, jsonld=None):
+    """
+    Everything parse_detail can read from the page itself (no network).
+    If the page has no trailer, "page_title"/"page_year" are filled for the
+    YouTube search. jsonld: optional callable(blocks) -> JsonLdDoc, so the
+    plugin can share its per-url JSON-LD cache.
+    """
+    info = DetailInfo()
+
+    scan = scan_detail_page(html)
+
+    # poster fallback (og:image)
+    if scan["og_image"]:
+        info["poster_url"] = scan["og_image"].strip()
+
+    # Backdrop / Theme (rt-img slot="iconic")
+    if scan["iconic"]:
+        src = scan["iconic"].strip()
+        parts = [p.strip() for p in src.split(",") if p.strip()]
+        if parts:
+            info["backdrop_url"] = parts[-1]
+
+    # scores + description
+    if scan["scorecard"]:
+        try:
+            _apply_scorecard(info, json.loads(scan["scorecard"]))
+        except:
+            pass
+
+    # map props -> fields
+    for p in scan["props"]:
+        if re.match(r'^[A-Z0-9][A-Z0-9\-]{0,6}$', p) and not info["mpaa"]:
+            info["mpaa"] = p
+        elif ("h" in p and "m" in p) or re.match(r"^\d+\s*m$", p, re.I):
+            info["runtime"] = p
+        elif "playing" in p.lower() or "stream" in p.lower() or "premiere" in p.lower():
+            info["status"] = p
+    if scan["genres"]:
+        info["genres"] = "/".join(scan["genres"])
+
+    # --- Cast & Crew (JSON-LD) ---
+    j = (jsonld or JsonLdDoc.from_blocks)(scan["jsonld"]).first(*JSONLD_MEDIA_TYPES)
+    if j:
+        _apply_people(info, j)
+
+    # --- Ekstrakcija trejlera ---
+    # 1. Video element sa data-sources
+    if scan["video_sources"]:
+        try:
+            sources = json.loads(scan["video_sources"])
+            for src in sources:
+                if src.get("type") == "application/x-mpegURL":
+                    info["trailer_url"] = src.get("src", "")
+                    info["trailer_type"] = "hls"
+                    break
+        except:
+            pass
+
+    # 2. Video tag sa src
+    if not info["trailer_url"] and scan["video_src"]:
+        url = scan["video_src"]
+        if ".m3u8" in url or ".ts" in url:
+            info["trailer_url"] = url
+            info["trailer_type"] = "hls"
+
+    # 3. Bilo koji .m3u8 ili .ts link
+    if not info["trailer_url"]:
+        stream_url = find_stream_url(html)
+        if stream_url:
+            info["trailer_url"] = stream_url
+            info["trailer_type"] = "hls"
+
+    if not info["trailer_url"]:
+        info["page_title"], info["page_year"] = _title_year_from_scan(html, scan)
+
+    return info
+
+
+# ---------- Detail stream (rani prekid citanja) ----------
+# Sve sto parse_detail_page cita je u prvom dijelu stranice: head, JSON-LD,
+# media-scorecard-json, metadata slotovi i trailer. Skener prati bajtove
+# kako stizu; kad su svi markeri vidjeni (+ DETAIL_STREAM_TAIL bajtova za
+# props/iconic/video tag oko njih), ostatak stranice ne treba citati.
+# Stranica bez nekog markera (npr. bez trejlera) se cita do kraja, kao
+# prije - skraceni HTML nikad ne mijenja rezultat parsiranja.
+DETAIL_STREAM_TAIL = 65536
+_STREAM_OVERLAP = 512
+_STREAM_TOKEN_RE = re.compile(rb'[^\s"\']*$')
+
+
+def _is_stream_url(data, m):
+    # .m3u8/.ts je kraj URL-a (kao find_stream_url: https?://[^\s"']+\.(m3u8|ts))
+    token = _STREAM_TOKEN_RE.search(data, max(0, m.start() - 4096), m.start())
+    return bool(token and re.search(rb'https?://.', data[token.start():m.start()], re.I))
+
+
+# (ime, pocetak, kraj ili None, provjera ili None); atributi bez re.I da
+# pretraga ide kao literal (drugacija velika slova = citanje do kraja)
+_DETAIL_STREAM_MARKERS = (
+    ("scorecard", re.compile(rb'id="media-scorecard-json"'), re.compile(rb'</script>', re.I), None),
+    ("jsonld", re.compile(rb'"@type"\s*:\s*"(?:%s)"' % "|".join(JSONLD_MEDIA_TYPES).encode()),
+     re.compile(rb'</script>', re.I), None),
+    ("genre", re.compile(rb'slot="metadata-genre"'), None, None),
+    ("trailer", re.compile(rb'\.(?:m3u8|ts)', re.I), None, _is_stream_url),
+)
+
+
+class DetailStreamScanner(object):
+    """
+    Incremental check over a downloading detail page. feed(chunk) returns
+    True once the bytes so far hold every field parse_detail_page reads,
+    after which the rest of the page can be dropped.
+    """
+
+    def __init__(self, tail=DETAIL_STREAM_TAIL):
+        self.tail = tail
+        self.data = bytearray()
+        self.found = {}       # ime -> kraj markera
+        self._open = {}       # ime -> pozicija iza pocetka (ceka kraj)
+        self._scanned = 0
+
+    def feed(self, chunk):
+        self.data += chunk
+        start = max(0, self._scanned - _STREAM_OVERLAP)
+        for name, start_re, end_re, check in _DETAIL_STREAM_MARKERS:
+            if name in self.found:
+                continue
+            if name not in self._open:
+                m = start_re.search(self.data, start)
+                while m and check and not check(self.data, m):
+                    m = start_re.search(self.data, m.end())
+                if not m:
+                    continue
+                if end_re is None:
+                    self.found[name] = m.end()
+                    continue
+                self._open[name] = m.end()
+            e = end_re.search(self.data, self._open[name])
+            if e:
+                self.found[name] = e.end()
+            else:
+                # kraj jos nije stigao; sljedeci put trazi samo u novom dijelu
+                self._open[name] = max(self._open[name], len(self.data) - 16)
+        self._scanned = len(self.data)
+        return self.done
+
+    @property
+    def done(self):
+        if len(self.found) < len(_DETAIL_STREAM_MARKERS):
+            return False
+        return len(self.data) - max(self.found.values()) >= self.tail
+
+
+# ---------- Media JSON (JSON backend za detalje) ----------
+MEDIA_JSON_PATH = "/napi/media"
+_ISO_DURATION_RE = re.compile(r'^P(?:\d+D)?T?(?:(\d+)H)?(?:(\d+)M)?', re.I)
+
+
+def media_json_url(detail_url):
+    """Structured media endpoint for a /m/... or /tv/... page url, or None"""
+    u = normalize_rt_url(detail_url) or ""
+    path = urllib.parse.urlsplit(u).path.rstrip("/")
+    if not u.startswith(BASE) or not rt_media_type(path):
+        return None
+    return BASE + MEDIA_JSON_PATH + path
+
+
+def _first_url(v):
+    # schema.org image/trailer: str, {"url"/"contentUrl"}, ili lista toga
+    if isinstance(v, list):
+        for x in v:
+            u = _first_url(x)
+            if u:
+                return u
+        return ""
+    if isinstance(v, dict):
+        v = v.get("contentUrl") or v.get("url") or v.get("embedUrl")
+    return v.strip() if isinstance(v, str) else ""
+
+
+def parse_media_json(data):
+    """
+    DetailInfo from a structured media reply. Reads the scorecard keys of
+    media-scorecard-json and the schema.org Movie/TVSeries keys of the page
+    JSON-LD, at the top level or under "scorecard" / "media". Raises
+    ValueError if the reply has no score: a bare title would show up as
+    "?% Tomatometer". Backdrop and status are not in the reply; see
+    detail_needs_page for when the HTML page is still worth fetching.
+    """
+    if not isinstance(data, dict):
+        raise ValueError("not a JSON object")
+    score = data.get("scorecard") if isinstance(data.get("scorecard"), dict) else data
+    media = data.get("media") if isinstance(data.get("media"), dict) else data
+    title = (media.get("name") or media.get("title") or "").strip()
+    if not (score.get("criticsScore") or score.get("audienceScore")):
+        raise ValueError("no scores in media reply")
+
+    info = DetailInfo()
+    _apply_scorecard(info, score)
+    _apply_people(info, media)
+
+    if not info["synopsis"] and isinstance(media.get("description"), str):
+        info["synopsis"] = media["description"].strip()
+    info["mpaa"] = str(media.get("contentRating") or media.get("rating") or "").strip()
+
+    runtime = media.get("runtime") or ""
+    m = _ISO_DURATION_RE.match(media.get("duration") or "")
+    if m and (m.group(1) or m.group(2)):
+        runtime = " ".join(x for x in ((m.group(1) or "") and m.group(1) + "h",
+                                       (m.group(2) or "") and m.group(2) + "m") if x)
+    info["runtime"] = str(runtime).strip()
+
+    genres = media.get("genre") or media.get("genres") or []
+    if isinstance(genres, str):
+        genres = [genres]
+    info["genres"] = "/".join(g.strip() for g in genres if isinstance(g, str) and g.strip())
+
+    info["poster_url"] = _first_url(media.get("image") or media.get("posterUri"))
+
+    trailer = _first_url(media.get("trailer"))
+    if trailer and _STREAM_EXT_RE.search(trailer):
+        info["trailer_url"] = trailer
+        info["trailer_type"] = "hls"
+    else:
+        year = media.get("releaseYear") or media.get("startYear") or ""
+        if not year:
+            ym = _RELEASE_YEAR_RE.search(str(media.get("datePublished") or media.get("dateCreated") or ""))
+            year = ym.group(1) if ym else ""
+        info["page_title"], info["page_year"] = title, str(year)
+    return info
+
+
+# polja koja detalj ekran pokazuje odmah; status i backdrop (samo OK meni)
+# nisu razlog da se uz media JSON skida i cijela stranica
+DETAIL_SCREEN_FIELDS = ("synopsis", "runtime", "genres", "cast", "poster_url")
+
+
+def detail_needs_page(info):
+    """True if info (media JSON) lacks a field the detail screen shows"""
+    return not all(info[k] for k in DETAIL_SCREEN_FIELDS)
+
+
+def fill_detail(info, page):
+    """Empty fields of info (media JSON) from page, the DetailInfo of the HTML page"""
+    for key in page:
+        if page[key] and not info[key]:
+            info[key] = page[key]
+    return info
+
+
+# ---------- Celebrity parser ----------
+def parse_celebrity(html, jsonld=None):
+    """
+    Parse RottenTomatoes celebrity page (best-effort).
+    - Name (h1 or og:title)
+    - Portrait image from rt-img celebrity-bio hero
+    - Highest/Lowest rated from data-qa blocks
+    - Birthday/Birthplace from data-qa blocks (fallback JSON-LD Person if postoji)
+    - Bio summary from data-qa summary (fallback meta description)
+    jsonld: optional callable() -> JsonLdDoc (shared cache in the plugin)
+    """
+
+    out = CelebrityInfo()
+
+    # ---------------- helpers ----------------
+    def _strip_tags(s):
+        s = re.sub(r"<script\b[^>]*>.*?</script>", " ", s, flags=re.S | re.I)
+        s = re.sub(r"<style\b[^>]*>.*?</style>", " ", s, flags=re.S | re.I)
+        s = re.sub(r"<[^>]+>", " ", s)
+        try:
+            s = _html.unescape(s)
+        except:
+            pass
+        s = re.sub(r"\s+", " ", s).strip()
+        return s
+
+    def _extract_qa_block(html_text, qa_value):
+        m = re.search(
+            r'<[^>]+data-qa="%s"[^>]*>(.*?)</[^>]+>' % re.escape(qa_value),
+            html_text, re.I | re.S
+        )
+        if not m:
+            return ""
+        return m.group(1) or ""
+
+    def _extract_hi_lo(html_text, qa_value):
+        # target is <p class="celebrity-bio__item" data-qa="celebrity-bio-highest-rated">...</p>
+        m = re.search(
+            r'<p[^>]+data-qa="%s"[^>]*>(.*?)</p>' % re.escape(qa_value),
+            html_text, re.I | re.S
+        )
+        if not m:
+            return ""
+
+        block = m.group(1) or ""
+
+        pm = re.search(r'(\d{1,3})\s*%', block)
+        pct = (pm.group(1) + "%") if pm else ""
+
+        tm = re.search(r'<rt-link[^>]*>(.*?)</rt-link>', block, re.I | re.S)
+        title = _strip_tags(tm.group(1)) if tm else ""
+        title = re.sub(r"\s+", " ", title).strip()
+
+        if pct and title:
+            return "%s %s" % (pct, title)
+        return title or pct
+
+    def _extract_simple_item(html_text, qa_value):
+        # npr: <p ... data-qa="celebrity-bio-bday"> ... Oct 8, 1949 </p>
+        m = re.search(
+            r'<p[^>]+data-qa="%s"[^>]*>(.*?)</p>' % re.escape(qa_value),
+            html_text, re.I | re.S
+        )
+        if not m:
+            return ""
+        block = m.group(1) or ""
+        # izbaci label deo (Birthday: / Birthplace:)
+        block = re.sub(r'<rt-text[^>]*>.*?</rt-text>', ' ', block, flags=re.I | re.S)
+        val = _strip_tags(block)
+        return val
+
+    # ---------------- JSON-LD Person (opciono) ----------------
+    p = (jsonld() if jsonld else JsonLdDoc.from_html(html)).first("Person")
+    if p:
+        if not out["name"]:
+            out["name"] = (p.get("name") or "").strip()
+
+        # image može biti str/list/dict
+        img = p.get("image")
+        img_url = ""
+        if isinstance(img, str):
+            img_url = img.strip()
+        elif isinstance(img, list):
+            for it in img:
+                if isinstance(it, str) and it.strip():
+                    img_url = it.strip()
+                    break
+                if isinstance(it, dict):
+                    u = it.get("url") or it.get("@id")
+                    if isinstance(u, str) and u.strip():
+                        img_url = u.strip()
+                        break
+        elif isinstance(img, dict):
+            u = img.get("url") or img.get("@id")
+            if isinstance(u, str) and u.strip():
+                img_url = u.strip()
+        if img_url and not out["image"]:
+            out["image"] = img_url
+
+        if not out["birthday"]:
+            out["birthday"] = (p.get("birthDate") or "").strip()
+
+        if not out["birthplace"]:
+            bp = p.get("birthPlace")
+            if isinstance(bp, dict):
+                out["birthplace"] = (bp.get("name") or "").strip()
+            elif isinstance(bp, str):
+                out["birthplace"] = bp.strip()
+
+        if not out["bio"]:
+            desc = p.get("description")
+            if isinstance(desc, str):
+                out["bio"] = desc.strip()
+
+    # ---------------- Name fallbacks ----------------
+    if not out["name"]:
+        m = re.search(r'<h1[^>]*data-qa="celebrity-bio-header"[^>]*>(.*?)</h1>', html, re.I | re.S)
+        if m:
+            out["name"] = _strip_tags(m.group(1))
+
+    if not out["name"]:
+        m = re.search(r'<meta[^>]+property="og:title"[^>]+content="([^"]+)"', html, re.I)
+        if m:
+            t = (m.group(1) or "").strip()
+            out["name"] = t.split("|")[0].strip()
+
+    # ---------------- Portrait image (rt-img hero) ----------------
+    # Primarno: <rt-img class="celebrity-bio__hero-img" src="...">
+    if not out["image"]:
+        m = re.search(r'<rt-img[^>]+class="[^"]*celebrity-bio__hero-img[^"]*"[^>]+src="([^"]+)"', html, re.I)
+        if not m:
+            m = re.search(r'<rt-img[^>]+class="[^"]*celebrity-bio__hero-mobile[^"]*"[^>]+src="([^"]+)"', html, re.I)
+        if m:
+            out["image"] = (m.group(1) or "").strip()
+
+    # Fallback: unutrašnji <img src="...">
+    if not out["image"]:
+        m = re.search(r'celebrity-bio__hero-img[^>]*>.*?<img[^>]+src="([^"]+)"', html, re.I | re.S)
+        if not m:
+            m = re.search(r'celebrity-bio__hero-mobile[^>]*>.*?<img[^>]+src="([^"]+)"', html, re.I | re.S)
+        if m:
+            out["image"] = (m.group(1) or "").strip()
+
+    # OG image fallback (ako sve gore omane)
+    if not out["image"]:
+        m = re.search(r'<meta[^>]+property="og:image"[^>]+content="([^"]+)"', html, re.I)
+        if m:
+            out["image"] = (m.group(1) or "").strip()
+
+    # ---------------- Highest/Lowest rated (data-qa) ----------------
+    out["highest"] = out["highest"] or _extract_hi_lo(html, "celebrity-bio-highest-rated")
+    out["lowest"]  = out["lowest"]  or _extract_hi_lo(html, "celebrity-bio-lowest-rated")
+
+    # ---------------- Birthday / Birthplace (data-qa) ----------------
+    # Ovi blokovi su pouzdaniji od JSON-LD jer daju format "Oct 8, 1949"
+    bday = _extract_simple_item(html, "celebrity-bio-bday")
+    if bday:
+        out["birthday"] = bday
+
+    bplace = _extract_simple_item(html, "celebrity-bio-birthplace")
+    if bplace:
+        out["birthplace"] = bplace
+
+    # ---------------- Bio summary (data-qa) ----------------
+    # Najpouzdanije: <p ... data-qa="celebrity-bio-summary">...</p>
+    if not out["bio"]:
+        m = re.search(r'<p[^>]+data-qa="celebrity-bio-summary"[^>]*>(.*?)</p>', html, re.I | re.S)
+        if m:
+            out["bio"] = _strip_tags(m.group(1))
+
+    # fallback: og:description / meta description
+    if not out["bio"]:
+        m = re.search(r'<meta[^>]+property="og:description"[^>]+content="([^"]+)"', html, re.I)
+        if m:
+            out["bio"] = (m.group(1) or "").strip()
+    if not out["bio"]:
+        m = re.search(r'<meta[^>]+name="description"[^>]+content="([^"]+)"', html, re.I)
+        if m:
+            out["bio"] = (m.group(1) or "").strip()
+
+    # cleanup
+    for k in ("name", "image", "highest", "lowest", "birthday", "birthplace", "bio"):
+        if isinstance(out.get(k), str):
+            out[k] = out[k].strip()
+
+    return out
+
+
+# ---------- Op tabela (plugin u threadu, parse_worker u procesu) ----------
+PARSE_OPS = {
+    "detail": parse_detail_page,
+    "search": iter_search_results,
+    "editorial": iter_editorial_items,
+    "celebrity": parse_celebrity,
+}
+# generator opovi - worker ih salje u komadima dok parsira
+STREAM_OPS = ("editorial", "search")
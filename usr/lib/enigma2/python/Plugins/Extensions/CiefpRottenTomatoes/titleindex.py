@@ -0,0 +1,403 @@
+# -*- coding: utf-8 -*-
+# Offline indeks naslova i EPG mapa za CiefpRottenTomatoes (bez enigma importa).
+# Svaka ucitana lista (browse, editorial, pretraga) dopunjava indeks, a
+# pretraga po trigramima radi lokalno, bez mreze. Na disku je samo lista
+# zapisa (marshal); trigram postinzi se grade pri ucitavanju.
+import os
+import array
+import re
+import json
+import time
+import heapq
+import marshal
+import threading
+
+try:
+    from .rtparse import BrowseItem, normalize_query
+except ImportError:  # pokrenut van paketa (worker / komandna linija)
+    from rtparse import BrowseItem, normalize_query
+
+INDEX_VERSION = 2
+INDEX_MAX_TITLES = 8000    # ~4 MB u RAM-u, ~1.7 MB na disku
+INDEX_MAX_SOURCES = 200
+INDEX_MIN_SCORE = 0.6     # udio trigrama upita koji naslov mora imati
+
+_NAME_YEAR_RE = re.compile(r"\s*\((\d{4})\)\s*$")
+
+# zapis: [url, title, year, type, image, tomatometer, seen, normalize_query(title)]
+_URL, _TITLE, _YEAR, _TYPE, _IMAGE, _SCORE, _SEEN, _KEY = range(8)
+
+
+def split_title(name, year=""):
+    """("Dune (2021)", "") -> ("Dune", "2021")"""
+    name = (name or "").strip()
+    m = _NAME_YEAR_RE.search(name)
+    if m:
+        return name[:m.start()], year or m.group(1)
+    return name, year or ""
+
+
+def title_grams(key, pad=True):
+    """Trigrams of a normalize_query key; pad=False for a query still being typed"""
+    s = " " + key + (" " if pad else "")
+    return set(s[i:i + 3] for i in range(len(s) - 2))
+
+
+class TitleIndex(object):
+    """
+    url -> title/year/type/image/tomatometer, searchable by trigrams.
+    add() merges list entries (newer non-empty fields win) and remembers
+    the list URL as a source for refresh. search() is fuzzy (share of the
+    query's trigrams), lookup() an exact title match. Thread-safe.
+    """
+
+    def __init__(self, path, max_titles=INDEX_MAX_TITLES):
+        self.path = path
+        self.max_titles = max_titles
+        self.loaded = False
+        self.dirty = False
+        self.saved_at = time.monotonic()
+        self._lock = threading.RLock()
+        self._records = {}   # id -> zapis
+        self._by_url = {}    # url -> id
+        self._by_key = {}    # normalize_query(title) -> [id] (obicno jedan)
+        self._grams = {}     # trigram -> array("i") id-eva, 4 B po id-u umjesto seta
+        self._sources = {}   # url liste -> epoch zadnjeg ucitavanja
+        self._next_id = 0
+
+    def __len__(self):
+        return len(self._records)
+
+    # --- punjenje ---
+    def _insert(self, rec):
+        rid = self._next_id
+        self._next_id += 1
+        key = rec[_KEY]
+        self._records[rid] = rec
+        self._by_url[rec[_URL]] = rid
+        self._postings(rid, key)
+
+    def _postings(self, rid, key):
+        self._by_key.setdefault(key, []).append(rid)
+        for g in title_grams(key):
+            ids = self._grams.get(g)
+            if ids is None:
+                ids = self._grams[g] = array.array("i")
+            ids.append(rid)
+
+    def add(self, items, source=None):
+        """Merge list entries (BrowseItem / dict); returns how many were new"""
+        now = int(time.time())
+        new = 0
+        with self._lock:
+            for it in items:
+                url = it.get("url")
+                title, year = split_title(it.get("name"), str(it.get("year") or ""))
+                if not url or not title:
+                    continue
+                rid = self._by_url.get(url)
+                if rid is None:
+                    self._insert([url, title, year, it.get("type") or "", it.get("image") or "",
+                                  str(it.get("tomatometer") or ""), now, normalize_query(title)])
+                    new += 1
+                    continue
+                rec = self._records[rid]
+                for field, value in ((_YEAR, year), (_TYPE, it.get("type")), (_IMAGE, it.get("image")),
+                                     (_SCORE, it.get("tomatometer"))):
+                    if value:
+                        rec[field] = str(value)
+                rec[_SEEN] = now
+            if source:
+                self._sources[source] = now
+                if len(self._sources) > INDEX_MAX_SOURCES:
+                    for url in sorted(self._sources, key=self._sources.get)[:len(self._sources) - INDEX_MAX_SOURCES]:
+                        del self._sources[url]
+            if len(self._records) > self.max_titles * 1.1:
+                self._prune()
+            self.dirty = True
+        return new
+
+    def _prune(self):
+        """Drop the titles not seen for the longest time, down to max_titles"""
+        old = sorted(self._records, key=lambda rid: self._records[rid][_SEEN])
+        for rid in old[:len(self._records) - self.max_titles]:
+            del self._by_url[self._records.pop(rid)[_URL]]
+        # postinzi su nizovi: brisanje jednog po jednog je O(n), pa iznova
+        self._by_key = {}
+        self._grams = {}
+        for rid, rec in self._records.items():
+            self._postings(rid, rec[_KEY])
+
+    def stale_sources(self, max_age, limit):
+        """List URLs last loaded more than max_age seconds ago, oldest first"""
+        cutoff = time.time() - max_age
+        with self._lock:
+            stale = sorted((t, u) for u, t in self._sources.items() if t < cutoff)
+        return [u for t, u in stale[:limit]]
+
+    # --- upiti ---
+    def _item(self, rec):
+        name = "%s (%s)" % (rec[_TITLE], rec[_YEAR]) if rec[_YEAR] else rec[_TITLE]
+        return BrowseItem(name, rec[_URL], rec[_IMAGE], rec[_YEAR], rec[_TYPE], rec[_SCORE])
+
+    def search(self, query, limit=20, search_type=None, min_score=INDEX_MIN_SCORE):
+        """Best fuzzy title matches for query as BrowseItems (exact and word-prefix matches first)"""
+        key = normalize_query(query)
+        grams = title_grams(key, pad=False)
+        if not grams:
+            return []
+        qwords = key.split()
+        with self._lock:
+            hits = {}
+            for g in grams:
+                for rid in self._grams.get(g, ()):
+                    hits[rid] = hits.get(rid, 0) + 1
+            need = min_score * len(grams)
+            ranked = []
+            for rid, n in hits.items():
+                if n < need:
+                    continue
+                rec = self._records[rid]
+                if search_type and rec[_TYPE] != search_type:
+                    continue
+                title_key = rec[_KEY]
+                if title_key == key:
+                    rank = 0
+                elif all(any(w.startswith(q) for w in title_key.split()) for q in qwords):
+                    rank = 1
+                else:
+                    rank = 2
+                ranked.append((rank, -n, len(title_key), -rec[_SEEN], rid))
+            best = heapq.nsmallest(limit, ranked)
+            return [self._item(self._records[r[-1]]) for r in best]
+
+    def lookup(self, title, year="", search_type=None):
+        """
+        The one title whose normalised name equals title, else None. With
+        several (remakes, movie and series) year / search_type must single
+        one out.
+        """
+        title, year = split_title(title, year)
+        with self._lock:
+            recs = [self._records[rid] for rid in self._by_key.get(normalize_query(title), ())]
+            if search_type:
+                recs = [r for r in recs if r[_TYPE] == search_type]
+            if len(recs) > 1 and year:
+                recs = [r for r in recs if r[_YEAR] == year]
+            return self._item(recs[0]) if len(recs) == 1 else None
+
+    # --- disk ---
+    def load(self):
+        """Merge the saved index (entries already added in this session win); returns titles loaded"""
+        try:
+            with open(self.path, "rb") as f:
+                version, records, sources = marshal.load(f)
+        except (OSError, EOFError, ValueError, TypeError):
+            self.loaded = True
+            return 0
+        if version != INDEX_VERSION:
+            self.loaded = True
+            return 0
+        with self._lock:
+            for rec in records:
+                if rec[_URL] not in self._by_url:
+                    self._insert(list(rec))
+            for url, t in sources.items():
+                self._sources[url] = max(t, self._sources.get(url, 0))
+            self.loaded = True
+        return len(records)
+
+    def save(self):
+        """Write the index if it changed (atomic rename); returns True if written"""
+        with self._lock:
+            if not self.dirty:
+                return False
+            data = (INDEX_VERSION, [tuple(r) for r in self._records.values()], dict(self._sources))
+            self.dirty = False
+            self.saved_at = time.monotonic()
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "wb") as f:
+                marshal.dump(data, f)
+            os.replace(tmp, self.path)
+        except OSError:
+            self.dirty = True
+            raise
+        return True
+
+
+# ---------- EPG naslov -> RT naslov ----------
+EPG_MAP_VERSION = 1
+EPG_MAP_MAX = 2000
+EPG_TRUST = 0.7           # ispod ovoga se naslov ponovo trazi
+EPG_AGREE_BONUS = 0.1     # indeks i pretraga nezavisno daju isti naslov
+
+
+def best_title_match(title, year, items):
+    """
+    Pick the RT entry for an EPG title from search/index results and rate
+    it: (item, confidence 0..1), (None, 0.0) for no items. An exact title
+    with the EPG year beats result order; an exact title whose known year
+    is off by more than one (a remake the search does not list) stays
+    below EPG_TRUST; a first result whose title differs is a guess.
+    """
+    key = normalize_query(split_title(title)[0])
+    exact = []
+    for it in items:
+        name, item_year = split_title(it.get("name"), str(it.get("year") or ""))
+        if normalize_query(name) == key:
+            if year and item_year == year:
+                return it, 0.95
+            exact.append((it, item_year))
+    if len(exact) == 1:
+        it, item_year = exact[0]
+        if not year:
+            return it, 0.85
+        if item_year.isdigit() and year.isdigit() and abs(int(item_year) - int(year)) > 1:
+            return it, 0.5
+        # godina +-1 (premijera / TV emitovanje) ili nepoznata godina naslova
+        return it, 0.75
+    if exact:
+        return exact[0][0], 0.6
+    return (items[0], 0.3) if items else (None, 0.0)
+
+
+class EpgTitleMap(object):
+    """
+    Normalised EPG title (+ optional year, channel) -> RT entry with a
+    confidence. learn() records automatic matches: the same answer again
+    keeps the higher confidence (a repeated search is no new evidence), a
+    different one lowers it or replaces it.
+    pin() is the user's choice and is never overwritten. resolve() takes
+    the most specific entry that applies (channel, then year, then the
+    bare title). JSON on disk, so pins can be edited by hand.
+    """
+
+    def __init__(self, path, max_titles=EPG_MAP_MAX):
+        self.path = path
+        self.max_titles = max_titles
+        self.dirty = False
+        self._lock = threading.RLock()
+        self._loaded = False
+        # kljuc -> lista zapisa {year, channel, url, name, item_year, type, image, conf, pinned, uses, used}
+        self._map = {}
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        self._loaded = True
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                data = json.load(f)
+            if data.get("version") == EPG_MAP_VERSION:
+                self._map = data.get("titles") or {}
+        except (OSError, ValueError, AttributeError):
+            pass
+
+    def __len__(self):
+        with self._lock:
+            self._ensure_loaded()
+            return len(self._map)
+
+    @staticmethod
+    def _key(title):
+        return normalize_query(split_title(title)[0])
+
+    def _find(self, key, year, channel):
+        for e in self._map.get(key, ()):
+            if e["year"] == year and e["channel"] == channel:
+                return e
+        return None
+
+    def resolve(self, title, year="", channel=""):
+        """(BrowseItem, confidence, pinned) for an EPG event, or None"""
+        with self._lock:
+            self._ensure_loaded()
+            best = None
+            for e in self._map.get(self._key(title), ()):
+                if e["year"] not in ("", year) or e["channel"] not in ("", channel):
+                    continue
+                rank = (e["pinned"], bool(e["channel"]), bool(e["year"]), e["conf"])
+                if best is None or rank > best[0]:
+                    best = (rank, e)
+            if best is None:
+                return None
+            e = best[1]
+            # samo u RAM-u; na disk ide sa sljedecom pravom promjenom
+            e["uses"] += 1
+            e["used"] = int(time.time())
+            item = BrowseItem(e["name"], e["url"], e["image"], e.get("item_year", ""), e["type"])
+            return item, e["conf"], e["pinned"]
+
+    def _store(self, key, year, channel, item, conf, pinned):
+        entries = self._map.setdefault(key, [])
+        e = self._find(key, year, channel)
+        if e is None:
+            e = {"year": year, "channel": channel, "uses": 0}
+            entries.append(e)
+        e.update(url=item.get("url"), name=item.get("name") or "", item_year=str(item.get("year") or ""),
+                 type=item.get("type") or "",
+                 image=item.get("image") or "", conf=round(conf, 3), pinned=pinned, used=int(time.time()))
+        if len(self._map) > self.max_titles * 1.1:
+            self._prune()
+        self.dirty = True
+
+    def learn(self, title, item, confidence, year="", channel=""):
+        """Record an automatic match; returns the confidence now stored"""
+        key = self._key(title)
+        if not key or not item or not item.get("url"):
+            return 0.0
+        with self._lock:
+            self._ensure_loaded()
+            e = self._find(key, year, channel)
+            if e is not None and e["pinned"]:
+                return e["conf"]
+            if e is not None and e["url"] == item.get("url"):
+                # isti odgovor ponovo (cesto iz kesa pretrage) - nije potvrda
+                if e["conf"] >= confidence:
+                    return e["conf"]
+            elif e is not None and e["conf"] > confidence:
+                # drugi odgovor, slabiji od zapamcenog - samo sumnja
+                e["conf"] = round(max(0.0, e["conf"] - 0.1), 3)
+                self.dirty = True
+                return e["conf"]
+            self._store(key, year, channel, item, confidence, False)
+            return confidence
+
+    def pin(self, title, item, year="", channel=""):
+        with self._lock:
+            self._ensure_loaded()
+            self._store(self._key(title), year, channel, item, 1.0, True)
+
+    def forget(self, title):
+        """Drop every entry (pinned too) for an EPG title; returns how many"""
+        with self._lock:
+            self._ensure_loaded()
+            n = len(self._map.pop(self._key(title), ()))
+            self.dirty = self.dirty or bool(n)
+            return n
+
+    def _prune(self):
+        """Drop the least recently used titles without pins, down to max_titles"""
+        def last_use(key):
+            entries = self._map[key]
+            return (any(e["pinned"] for e in entries), max(e.get("used", 0) for e in entries))
+        for key in sorted(self._map, key=last_use)[:len(self._map) - self.max_titles]:
+            if not any(e["pinned"] for e in self._map[key]):
+                del self._map[key]
+
+    def save(self):
+        with self._lock:
+            if not self.dirty:
+                return False
+            data = json.dumps({"version": EPG_MAP_VERSION, "titles": self._map}, ensure_ascii=False)
+            self.dirty = False
+        tmp = self.path + ".tmp"
+        try:
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(data)
+            os.replace(tmp, self.path)
+        except OSError:
+            self.dirty = True
+            raise
+        return True